@@ -6,7 +6,10 @@ from lovelaice import Config
 # All models go through OpenRouter. The first entry is the default; pick
 # another at runtime with `--model <alias>` (one-shot) or `/model` (TUI).
 # Add `thinking="low"|"medium"|"high"` (or an int token budget) on a model
-# entry to opt into reasoning passthrough.
+# entry to opt into reasoning passthrough, and `cache_control=True` to mark
+# the static system prefix as a prompt-cache breakpoint (Anthropic-style
+# providers; others cache prefixes automatically). `context_budget=<tokens>`
+# compacts old turns automatically once the history outgrows it.
 MODELS = {
     "fast": {
         "model": "google/gemini-2.5-flash",
@@ -33,22 +36,36 @@ question instead of guessing. Prefer surgical edits over full rewrites.
 config = Config(
     models=MODELS,
     prompt=PROMPT,
+    # bash_persistent=True,  # keep one shell per session (cd/env carry over)
+    # bash_output_cap=1_000_000,  # bytes of bash output kept (head + tail)
     # mcp=[{"name": "...", "command": "...", "args": [...]}],
 )
 
 # --- Default tools --------------------------------------------------------
-from lovelaice.tools import bash, read, write, edit, list_, glob, grep, fetch
+from lovelaice.tools import bash, read, write, edit, list_, glob, grep, fetch, read_output
+from lovelaice.tools import bash_start, bash_poll, bash_kill, apply_edits, find_symbol, outline
 
 config.tool(bash)
+config.tool(bash_start)
+config.tool(bash_poll)
+config.tool(bash_kill)
 config.tool(read)
 config.tool(write)
 config.tool(edit)
+config.tool(apply_edits)
 config.tool(list_, name="list")
 config.tool(glob)
 config.tool(grep)
+config.tool(find_symbol)
+config.tool(outline)
 config.tool(fetch)
+config.tool(read_output)
 
 # --- Default command: ReAct loop ------------------------------------------
+# Each step asks for done/tool(s)/arguments in one LLM call and runs
+# independent calls concurrently. For models without reliable structured
+# output, `react_stepwise` spends three calls per step on one tool
+# instead. Register only one of them.
 from lovelaice.commands import react
 
 config.command(react)
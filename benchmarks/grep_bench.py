@@ -0,0 +1,100 @@
+"""Benchmark `grep` against the previous line-by-line implementation.
+
+Builds a synthetic tree (100k small source files by default, plus a few
+ignored directories) in a temp dir, then times:
+
+- ``baseline`` — the pre-engine grep: `Path.rglob`, root `.gitignore`
+  only, `read_bytes()` + `read_text()` per file, regex per line;
+- ``grep`` — the current tool (pruning walker + whole-buffer engine,
+  process pool when more than one CPU is available).
+
+Usage: python benchmarks/grep_bench.py [--files N] [--pattern REGEX]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import random
+import re
+import tempfile
+import time
+from pathlib import Path
+
+import pathspec
+
+from lovelaice.tools import scan
+from lovelaice.tools.search import grep
+
+
+WORDS = "alpha beta gamma delta epsilon zeta theta lambda sigma omega".split()
+
+
+def build_tree(root: Path, files: int) -> None:
+    rng = random.Random(0)
+    (root / ".gitignore").write_text("node_modules/\nbuild/\n")
+    for i in range(files):
+        d = root / "src" / f"pkg{i // 1000:03}" / f"mod{i // 100 % 10}"
+        d.mkdir(parents=True, exist_ok=True)
+        lines = [" ".join(rng.choices(WORDS, k=8)) for _ in range(40)]
+        if i % 997 == 0:
+            lines[rng.randrange(40)] += " needle_found_here"
+        (d / f"f{i}.py").write_text("\n".join(lines) + "\n")
+    for ignored in ("node_modules", "build"):
+        for i in range(files // 10):
+            d = root / ignored / f"d{i // 100}"
+            d.mkdir(parents=True, exist_ok=True)
+            (d / f"x{i}.js").write_text("needle_found_here\n")
+
+
+def baseline(pattern: str, path: str = ".") -> str:
+    gi = Path(".gitignore")
+    spec = pathspec.PathSpec.from_lines("gitignore", gi.read_text().splitlines()) if gi.is_file() else None
+    regex = re.compile(pattern)
+    hits: list[str] = []
+    for p in Path(path).rglob("*"):
+        if not p.is_file():
+            continue
+        rel = p.as_posix()
+        if rel.startswith(".git/") or (spec is not None and spec.match_file(rel)):
+            continue
+        try:
+            if b"\x00" in p.read_bytes()[:1024]:
+                continue
+            text = p.read_text(encoding="utf-8", errors="replace")
+        except OSError:
+            continue
+        for i, line in enumerate(text.splitlines(), start=1):
+            if regex.search(line):
+                hits.append(f"{rel}:{i}:{line}")
+                if len(hits) >= 200:
+                    return "\n".join(hits) + "\n... (truncated at 200 hits)"
+    return "\n".join(hits)
+
+
+def timed(label: str, fn) -> str:
+    start = time.perf_counter()
+    out = fn()
+    print(f"{label:>10}: {time.perf_counter() - start:7.2f}s  ({out.count(chr(10)) + bool(out)} lines)")
+    return out
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=100_000)
+    parser.add_argument("--pattern", default=r"needle_\w+")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        build_tree(Path(tmp), args.files)
+        print(f"built {args.files} files in {time.perf_counter() - start:.1f}s; "
+              f"{scan.GREP_WORKERS} grep workers")
+        os.chdir(tmp)
+        old = timed("baseline", lambda: baseline(args.pattern))
+        new = timed("grep", lambda: asyncio.run(grep(args.pattern)))
+        assert sorted(old.splitlines()) == sorted(new.splitlines()), "results differ"
+
+
+if __name__ == "__main__":
+    main()
@@ -30,6 +30,14 @@ def main(
         bool,
         typer.Option("--init", help="Write a starter .lovelaice.py in the current directory."),
     ] = False,
+    index: Annotated[
+        bool,
+        typer.Option("--index", help="Build or refresh the workspace search index used by grep, then exit."),
+    ] = False,
+    refresh_mcp: Annotated[
+        bool,
+        typer.Option("--refresh-mcp", help="Forget cached MCP tool lists, so servers are spawned and listed afresh."),
+    ] = False,
     model: Annotated[
         Optional[str],
         typer.Option("--model", "-m", help="Named model alias from .lovelaice.py."),
@@ -44,7 +52,7 @@ def main(
     ] = False,
     json_output: Annotated[
         bool,
-        typer.Option("--json", help="NDJSON event stream on stdout (reasoning, content, done, error)."),
+        typer.Option("--json", help="NDJSON event stream on stdout (reasoning, content, tool_output, llm_call, stats, done, error)."),
     ] = False,
 ):
     """
@@ -71,6 +79,14 @@ def main(
     os.chdir(config_path.parent)
     config_path = Path(".lovelaice.py")
 
+    if index:
+        _do_index()
+        raise typer.Exit()
+
+    if refresh_mcp:
+        from .mcp import invalidate_tool_cache
+        invalidate_tool_cache()
+
     prompt = " ".join(prompt_parts) if prompt_parts else ""
 
     if prompt:
@@ -93,6 +109,17 @@ def main(
         asyncio.run(run_tui(config_path, model=model))
 
 
+def _do_index() -> None:
+    from .tools.index import TrigramIndex
+
+    trigrams = TrigramIndex.load(".") or TrigramIndex(os.path.abspath("."))
+    stats = trigrams.refresh()
+    typer.echo(
+        f"Indexed {len(trigrams.files)} files into {trigrams.path} "
+        f"({stats.added} added, {stats.updated} updated, {stats.removed} removed)."
+    )
+
+
 def _do_init() -> None:
     config_path = Path(".lovelaice.py")
     if config_path.exists():
@@ -1,3 +1,3 @@
-from .react import react
+from .react import react, react_stepwise
 
-__all__ = ["react"]
+__all__ = ["react", "react_stepwise"]
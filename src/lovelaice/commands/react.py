@@ -1,4 +1,14 @@
+import asyncio
+import re
+from typing import Any, Callable, Literal, Union
+
 from lingo import Context, Engine, Message
+from lingo.tools import Tool, ToolResult
+from pydantic import BaseModel, create_model
+
+from ..tools.cache import next_step
+from ..tools.output import spill
+from ..usage import phase
 
 
 REACT_HEADER = """
@@ -22,41 +32,239 @@ DONE_INSTRUCTION = (
 )
 
 
-async def react(context: Context, engine: Engine, *, max_steps: int = 20) -> None:
+# Upper bound on tool calls from one fused step that run at the same
+# time. `Config(tool_concurrency=...)` mutates this at build-time.
+MAX_PARALLEL_TOOLS: int = 4
+
+
+NEXT_ACTION_INSTRUCTION = """
+Decide the next step of the loop in a single answer.
+
+If the user's most recent request has been fully resolved by the work
+done so far, set `done` to true and leave `calls` empty. Otherwise set
+`done` to false and fill `calls` with the tool(s) to run next and all
+of their arguments.
+
+You may put several calls in `calls` when they are independent of each
+other (e.g. reading five files, or grepping three patterns); they run
+concurrently. Never batch a call that depends on another call's result.
+
+Available tools:
+
+{tools}
+""".strip()
+
+
+FINAL_INSTRUCTION = (
+    "Reply to the user now with a concise summary of what was done and the answer to their request."
+)
+
+
+def _observation(result: ToolResult) -> str:
+    """
+    Format a ToolResult as the system-message observation the loop
+    appends. Oversized results are spilled to the scratch area and only
+    an excerpt plus a `read_output` handle goes into the context.
+    """
+    if result.error:
+        return f"[tool {result.tool} failed]\n{result.error}"
+    return f"[tool {result.tool} result]\n{spill(str(result.result))}"
+
+
+def _schema_name(name: str) -> str:
+    """Tool names like `mcp:fs:read` are not valid JSON-schema identifiers."""
+    return re.sub(r"[^A-Za-z0-9_]", "_", name)
+
+
+def _arg_fields(params: dict[str, type]) -> dict[str, str]:
+    """
+    Field name → parameter name for a tool's call model. A parameter
+    that would clash with the `tool` discriminator gets a trailing `_`.
+    """
+    out: dict[str, str] = {}
+    for name in params:
+        field = name
+        while field == "tool" or (field != name and field in params) or field in out:
+            field += "_"
+        out[field] = name
+    return out
+
+
+def _next_action_model(tools: list[Tool]) -> type[BaseModel]:
+    """
+    Build the structured-output model for one fused step: a done flag
+    plus a list of tagged per-tool argument models, so the LLM picks
+    the tool(s) and fills their parameters in the same response.
+    """
+    calls = []
+    for t in tools:
+        params = t.parameters()
+        fields = {field: (params[name], ...) for field, name in _arg_fields(params).items()}
+        calls.append(create_model(
+            f"Call_{_schema_name(t.name)}",
+            tool=(Literal[t.name], ...),
+            **fields,
+        ))
+    call_type = calls[0] if len(calls) == 1 else Union[tuple(calls)]
+    return create_model(
+        "NextAction",
+        reasoning=(str, ...),
+        done=(bool, ...),
+        calls=(list[call_type], ...),
+    )
+
+
+async def _run_call(
+    tool: Tool, args: dict, limit: asyncio.Semaphore, on_result: Callable[[ToolResult], Any] | None,
+) -> ToolResult:
+    """
+    Run one tool call under `limit`. Exceptions become `ToolResult.error`,
+    as in `Engine.invoke`. `on_result` hears about it as soon as it is done.
+    """
+    async with limit:
+        try:
+            result = ToolResult(tool=tool.name, result=await tool.run(**args))
+        except Exception as e:
+            result = ToolResult(tool=tool.name, error=str(e))
+    if on_result is not None:
+        on_result(result)
+    return result
+
+
+async def _next_action(context: Context, engine: Engine, tools: list[Tool]) -> BaseModel:
+    """
+    One LLM round-trip that yields done/tools/arguments at once, as a
+    `_next_action_model(tools)` instance.
+    """
+    model_cls = _next_action_model(tools)
+    listing = "\n".join(f"- {t.name}: {t.description}" for t in tools)
+    with phase("step"):
+        return await engine.create(
+            context, model_cls, NEXT_ACTION_INSTRUCTION.format(tools=listing)
+        )
+
+
+async def _run_calls(
+    action: BaseModel,
+    tools: list[Tool],
+    max_parallel: int,
+    on_result: Callable[[ToolResult], Any] | None = None,
+) -> list[ToolResult]:
+    """
+    Run the calls `action` asks for, concurrently (at most `max_parallel`
+    at a time), and return their ToolResults in the order the model
+    listed them. `on_result` is called with each result as its call
+    completes.
+    """
+    by_name = {t.name: t for t in tools}
+    limit = asyncio.Semaphore(max(1, max_parallel))
+    pending = []
+    for call in action.calls:
+        fields = call.model_dump()
+        tool = by_name[fields.pop("tool")]
+        names = _arg_fields(tool.parameters())
+        args = {names[field]: value for field, value in fields.items()}
+        pending.append(_run_call(tool, args, limit, on_result))
+    return list(await asyncio.gather(*pending))
+
+
+async def react(
+    context: Context,
+    engine: Engine,
+    *,
+    max_steps: int = 20,
+    fused: bool = True,
+    max_parallel: int | None = None,
+) -> None:
     """
-    Generalist ReAct loop: decide-equip-invoke until the LLM signals done.
+    Generalist ReAct loop: one structured-output call per iteration picks
+    done/tool(s)/arguments, until the LLM signals done. The answer may
+    hold a batch of independent tool calls; they run concurrently,
+    capped at `max_parallel` (default `MAX_PARALLEL_TOOLS`), and each
+    result is appended as its own observation. The host's tool-call
+    hook hears about each call as it completes.
 
-    Each iteration:
-      1. Ask the LLM whether the user's request is fully resolved.
-      2. If yes, exit the loop.
-      3. Otherwise, equip a tool (LLM picks from the registered set),
-         invoke it (LLM fills in parameters), and append the ToolResult
-         as a `tool`-role message in the context.
+    With `fused=False` (or no tools registered), each iteration instead:
+      1. Asks the LLM whether the user's request is fully resolved.
+      2. If yes, exits the loop.
+      3. Otherwise, equips a tool (LLM picks from the registered set),
+         invokes it (LLM fills in parameters), and appends the ToolResult
+         as an observation.
+
+    A fused step whose answer fails to validate is redone with
+    decide/equip/invoke (counted as `fused_fallbacks`); errors from the
+    tools themselves become observations, as on the stepwise path. The
+    number of LLM round-trips saved against the three-call path is
+    recorded under `round_trips_saved` in the turn stats the host
+    attaches as `engine._lovelaice_turn_stats`.
 
     After the loop, ask the LLM for a final natural-language reply.
     """
     context.append(Message.system(REACT_HEADER))
 
     on_tool_call = getattr(engine, "_lovelaice_on_tool_call", None)
+    stats = getattr(engine, "_lovelaice_turn_stats", None)
+    if not isinstance(stats, dict):
+        stats = {}
+
+    tools = list(getattr(engine, "_tools", None) or [])
+    # What the three-call path would spend on a tool step beyond the one
+    # call a fused step makes: invoke, plus equip unless only one tool
+    # is registered (Engine.equip short-circuits that case).
+    saved_per_step = 2 if len(tools) > 1 else 1
+    if max_parallel is None:
+        max_parallel = MAX_PARALLEL_TOOLS
+    llm_calls = 0
+    saved = 0
 
     for _ in range(max_steps):
-        done = await engine.decide(context, DONE_INSTRUCTION)
-        if done:
-            break
-
-        tool = await engine.equip(context)
-        result = await engine.invoke(context, tool)
-        if result.error:
-            observation = f"[tool {result.tool} failed]\n{result.error}"
-        else:
-            observation = f"[tool {result.tool} result]\n{result.result}"
-        context.append(Message.system(observation))
-
-        if on_tool_call is not None:
-            on_tool_call(result)
-
-    final = await engine.reply(
-        context,
-        "Reply to the user now with a concise summary of what was done and the answer to their request.",
-    )
+        # Numbers the steps `read` refers back to ("unchanged since step N").
+        next_step()
+        results = None
+        if fused and tools:
+            llm_calls += 1
+            try:
+                action = await _next_action(context, engine, tools)
+            except Exception:
+                # A structured answer that doesn't validate (bad arguments
+                # for one tool, a malformed union) or a provider error
+                # costs this step its fusing, not the whole turn: redo it
+                # with decide/equip/invoke, which reports bad arguments as
+                # an observation. Only the answer is retried; nothing has
+                # run yet.
+                stats["fused_fallbacks"] = stats.get("fused_fallbacks", 0) + 1
+            else:
+                if action.done or not action.calls:
+                    break
+                results = await _run_calls(action, tools, max_parallel, on_tool_call)
+                # The three-call path would spend a full decide/equip/invoke
+                # iteration per call in the batch.
+                saved += len(results) * (1 + saved_per_step) - 1
+        if results is None:
+            done = await engine.decide(context, DONE_INSTRUCTION)
+            llm_calls += 1
+            if done:
+                break
+
+            tool = await engine.equip(context)
+            results = [await engine.invoke(context, tool)]
+            llm_calls += saved_per_step
+            # Fused calls were reported as each one completed.
+            if on_tool_call is not None:
+                on_tool_call(results[0])
+
+        for result in results:
+            context.append(Message.system(_observation(result)))
+
+    final = await engine.reply(context, FINAL_INSTRUCTION)
     context.append(final)
+
+    stats["llm_calls"] = stats.get("llm_calls", 0) + llm_calls + 1
+    stats["round_trips_saved"] = stats.get("round_trips_saved", 0) + saved
+
+
+async def react_stepwise(context: Context, engine: Engine) -> None:
+    """
+    Generalist ReAct loop that decides, picks a tool and fills its arguments in three LLM calls per step.
+    """
+    await react(context, engine, fused=False)
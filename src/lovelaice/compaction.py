@@ -0,0 +1,121 @@
+"""Context compaction: keep long sessions under the model's token budget.
+
+The conversation history grows by every tool observation of every turn.
+When it crosses the per-model budget (`context_budget` on a `MODELS`
+entry), `compact()` shrinks everything older than the last few turns in
+two passes:
+
+1. **Elide** — old tool observations (the `[tool X result]` system
+   messages `react` appends) are replaced by a one-line stub.
+2. **Summarize** — if that is still not enough, the old turns collapse
+   into a single LLM-written summary message.
+
+Recent turns are always kept verbatim. Token counts are estimated at
+~4 characters per token, which is close enough to decide when to act.
+"""
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import Any
+
+from lingo import Message
+from pydantic import BaseModel
+
+
+CHARS_PER_TOKEN = 4
+
+# Observations shorter than this are cheaper to keep than to stub out.
+ELIDE_MIN_CHARS = 200
+
+_OBSERVATION = re.compile(r"^\[tool (?P<tool>\S+) (?P<kind>result|failed)\]")
+
+SUMMARY_INSTRUCTION = """
+Summarize the conversation above so it can replace it in your context.
+Keep every fact needed to continue the work: the user's requests and
+decisions, files read or changed (with paths), commands run and their
+outcomes, open problems, and anything promised but not yet done. Be
+terse; omit pleasantries and raw tool output.
+""".strip()
+
+
+class Summary(BaseModel):
+    """A compact summary of earlier conversation turns."""
+    summary: str
+
+
+@dataclass
+class CompactionResult:
+    """What a `compact()` pass did."""
+    tokens_before: int
+    tokens_after: int
+    elided: int = 0
+    summarized: int = 0
+
+    @property
+    def changed(self) -> bool:
+        return self.elided > 0 or self.summarized > 0
+
+
+def estimate_tokens(messages: list[Message]) -> int:
+    """Rough token count for `messages` (content characters / 4)."""
+    return sum(len(str(m.content)) for m in messages) // CHARS_PER_TOKEN
+
+
+def _old_count(messages: list[Message], keep_turns: int) -> int:
+    """Number of leading messages that precede the last `keep_turns` turns."""
+    starts = [i for i, m in enumerate(messages) if m.role == "user"]
+    if len(starts) <= keep_turns:
+        return 0
+    return starts[-keep_turns] if keep_turns > 0 else len(messages)
+
+
+def _elide(message: Message) -> Message | None:
+    """Stub for a long tool observation, or None if `message` should stay."""
+    if message.role != "system" or not isinstance(message.content, str):
+        return None
+    match = _OBSERVATION.match(message.content)
+    if match is None or len(message.content) < ELIDE_MIN_CHARS:
+        return None
+    return Message.system(
+        f"[tool {match['tool']} {match['kind']}] (elided {len(message.content)} chars during compaction)"
+    )
+
+
+async def compact(
+    messages: list[Message],
+    llm: Any,
+    *,
+    budget: int,
+    keep_turns: int = 2,
+    force: bool = False,
+) -> tuple[list[Message], CompactionResult]:
+    """
+    Return a compacted copy of `messages` and a report of what changed.
+
+    Does nothing unless the estimate exceeds `budget` or `force` is set.
+    Old turns are only summarized if eliding observations did not bring
+    the estimate back under `budget` (or, again, when forced).
+    """
+    before = estimate_tokens(messages)
+    result = CompactionResult(tokens_before=before, tokens_after=before)
+    if before <= budget and not force:
+        return messages, result
+
+    cut = _old_count(messages, keep_turns)
+    old, recent = list(messages[:cut]), list(messages[cut:])
+
+    for i, m in enumerate(old):
+        stub = _elide(m)
+        if stub is not None:
+            old[i] = stub
+            result.elided += 1
+
+    if old and (force or estimate_tokens(old) + estimate_tokens(recent) > budget):
+        summary = await llm.create(Summary, [*old, Message.system(SUMMARY_INSTRUCTION)])
+        result.summarized = len(old)
+        old = [Message.system(f"[summary of earlier conversation]\n{summary.summary}")]
+
+    compacted = old + recent
+    result.tokens_after = estimate_tokens(compacted)
+    return compacted, result
@@ -76,13 +76,25 @@ class Config:
         prompt: str,
         *,
         bash_timeout: float | None = None,
+        bash_persistent: bool = False,
+        bash_output_cap: int | None = None,
+        job_output_cap: int | None = None,
+        tool_concurrency: int | None = None,
+        observation_limit: int | None = None,
         mcp: list[dict[str, Any]] | None = None,
+        mcp_startup_timeout: float | None = None,
     ):
         self.models = models
         self.default_model = next(iter(models))
         self.prompt = prompt
         self.bash_timeout = bash_timeout
+        self.bash_persistent = bash_persistent
+        self.bash_output_cap = bash_output_cap
+        self.job_output_cap = job_output_cap
+        self.tool_concurrency = tool_concurrency
+        self.observation_limit = observation_limit
         self.mcp: list[dict[str, Any]] = list(mcp or [])
+        self.mcp_startup_timeout = mcp_startup_timeout
         self.commands: list[Callable] = []
         self.tools: list[_ToolEntry] = []
         self.agent: Lovelaice | None = None
@@ -110,15 +122,76 @@ class Config:
         bash_mod = import_module("lovelaice.tools.bash")
         bash_mod.BASH_TIMEOUT = self.bash_timeout
 
+    def _apply_bash_persistent(self) -> None:
+        """Mutate the BASH_PERSISTENT module global if enabled."""
+        if not self.bash_persistent:
+            return
+        from importlib import import_module
+        bash_mod = import_module("lovelaice.tools.bash")
+        bash_mod.BASH_PERSISTENT = True
+
+    def _apply_bash_output_cap(self) -> None:
+        """Mutate the BASH_OUTPUT_CAP module global if configured."""
+        if self.bash_output_cap is None:
+            return
+        from importlib import import_module
+        bash_mod = import_module("lovelaice.tools.bash")
+        bash_mod.BASH_OUTPUT_CAP = self.bash_output_cap
+
+    def _apply_job_output_cap(self) -> None:
+        """Mutate the JOB_OUTPUT_CAP module global if configured."""
+        if self.job_output_cap is None:
+            return
+        from importlib import import_module
+        jobs_mod = import_module("lovelaice.tools.jobs")
+        jobs_mod.JOB_OUTPUT_CAP = self.job_output_cap
+
+    def _apply_tool_concurrency(self) -> None:
+        """Mutate the MAX_PARALLEL_TOOLS module global if configured."""
+        if self.tool_concurrency is None:
+            return
+        from importlib import import_module
+        react_mod = import_module("lovelaice.commands.react")
+        react_mod.MAX_PARALLEL_TOOLS = self.tool_concurrency
+
+    def _apply_observation_limit(self) -> None:
+        """Mutate the OBSERVATION_LIMIT module global if configured."""
+        if self.observation_limit is None:
+            return
+        from importlib import import_module
+        output_mod = import_module("lovelaice.tools.output")
+        output_mod.OBSERVATION_LIMIT = self.observation_limit
+
+    def _apply_mcp_startup_timeout(self) -> None:
+        """Mutate the MCP_STARTUP_DEADLINE module global if configured."""
+        if self.mcp_startup_timeout is None:
+            return
+        from importlib import import_module
+        mcp_mod = import_module("lovelaice.mcp")
+        mcp_mod.MCP_STARTUP_DEADLINE = self.mcp_startup_timeout
+
     def build(self, model: str | None, on_token, on_reasoning_token=None) -> Lovelaice:
         if self.agent is not None:
             raise RuntimeError("Config.build() already called once.")
 
         self._apply_bash_timeout()
+        self._apply_bash_persistent()
+        self._apply_bash_output_cap()
+        self._apply_job_output_cap()
+        self._apply_tool_concurrency()
+        self._apply_observation_limit()
+        self._apply_mcp_startup_timeout()
+
+        # List the workspace in the background so glob/grep/list answer
+        # from memory once it is ready.
+        from .tools import inventory
+        inventory.start(".")
 
         model = model or self.default_model
         model_kwargs = dict(self.models[model])
         thinking = model_kwargs.pop("thinking", None)
+        cache_control = bool(model_kwargs.pop("cache_control", False))
+        context_budget = model_kwargs.pop("context_budget", None)
 
         from .thinking import build_llm
         llm = build_llm(
@@ -128,7 +201,12 @@ class Config:
             on_reasoning_token=on_reasoning_token,
         )
 
-        self.agent = Lovelaice(llm=llm, prompt=self.prompt)
+        self.agent = Lovelaice(
+            llm=llm,
+            prompt=self.prompt,
+            cache_control=cache_control,
+            context_budget=context_budget,
+        )
 
         # Register decorated tools, applying name overrides.
         for entry in self.tools:
@@ -2,20 +2,88 @@ from __future__ import annotations
 
 import getpass
 import os
+import threading
 from datetime import datetime
 
 from lingo import LLM, Context, Engine, Lingo, Message
 from lingo.engine import Engine as _Engine
+from lingo.llm import TextContent
+
+from .compaction import CompactionResult, compact, estimate_tokens
+from .mcp import aclose as close_mcp
+from .tools.cache import forget_seen
+from .tools.output import live_output
+from .usage import UsageTracker, phase
+
+
+YOLO_NOTICE = """
+You operate in YOLO mode: tool calls execute immediately without
+confirmation. Be deliberate about destructive actions (file writes,
+shell commands that modify state) — read before you write, and
+prefer surgical edits over full rewrites.
+""".strip()
+
+
+ENVIRONMENT_HEADING = "# Environment"
+
+
+def _is_volatile_tail(message: Message) -> bool:
+    return message.role == "system" and str(message.content).startswith(ENVIRONMENT_HEADING)
+
+
+class CachedText(TextContent):
+    """
+    Text content carrying an Anthropic-style `cache_control` breakpoint.
+    OpenRouter forwards it to providers that support explicit prompt
+    caching; providers with automatic prefix caching ignore it.
+    """
+    cache_control: dict = {"type": "ephemeral"}
+
+
+class _TrackedEngine(_Engine):
+    """Engine that tags each LLM call with the phase that issued it."""
+
+    async def reply(self, context, *instructions):
+        with phase("reply"):
+            return await super().reply(context, *instructions)
+
+    async def decide(self, context, *instructions):
+        with phase("decide"):
+            return await super().decide(context, *instructions)
+
+    async def choose(self, context, options, *instructions):
+        with phase("choose"):
+            return await super().choose(context, options, *instructions)
+
+    async def equip(self, context, *tools):
+        with phase("equip"):
+            return await super().equip(context, *tools)
+
+    async def infer(self, context, tool, *instructions, **kwargs):
+        with phase("invoke"):
+            return await super().infer(context, tool, *instructions, **kwargs)
+
+    async def create(self, context, model, *instructions):
+        with phase("create"):
+            return await super().create(context, model, *instructions)
 
 
 class Lovelaice(Lingo):
     """
-    The Lovelaice agent: a thin Lingo subclass that injects environment
-    awareness into the system prompt before each turn and forwards a
-    tool-call hook through to the running Engine.
+    The Lovelaice agent: a thin Lingo subclass that lays the prompt out
+    cache-first (a static prefix computed once, volatile environment
+    facts at the tail of each turn) and forwards a tool-call hook
+    through to the running Engine.
     """
 
-    def __init__(self, llm: LLM, prompt: str):
+    def __init__(
+        self,
+        llm: LLM,
+        prompt: str,
+        *,
+        cache_control: bool = False,
+        context_budget: int | None = None,
+    ):
         super().__init__(
             name="Lovelaice",
             description="A local-first coding agent.",
@@ -26,9 +94,66 @@ class Lovelaice(Lingo):
         # Set by the host (TUI / oneshot) before chat() to receive tool
         # observations. None → no hook fires.
         self._on_tool_call = None
+        # Set by the host to receive partial output from running tools
+        # (`emit_live(tool, text)`). None → live output is dropped.
+        self._on_tool_output = None
+        # Per-turn counters filled in by commands (e.g. react's LLM call
+        # and round-trips-saved tallies). Reset at the start of chat().
+        self.turn_stats: dict = {}
+        # Mark the static prefix as a cache breakpoint (opt-in per model).
+        self.cache_control = cache_control
+        self._static_prefix: Message | None = None
+        self.usage = UsageTracker()
+        self.usage.attach(llm)
+        # Token budget for the conversation history; crossing it triggers
+        # compaction at the start of the next turn. None → never automatic.
+        self.context_budget = context_budget
+        # Startup status of each MCP server (see `mcp.register_mcp_tools`).
+        self.mcp_servers: list = []
+        # Tool changes made after startup, waiting for the next turn:
+        # ("add", tools) and ("remove", names), in arrival order.
+        self._pending_tools: list[tuple[str, list]] = []
+        self._pending_lock = threading.Lock()
+
+    def add_tools(self, tools: list) -> None:
+        """
+        Register tools after startup (e.g. a slow MCP server). Safe to
+        call from any thread, or in the middle of a turn: the tools are
+        queued and join at the start of the next `chat`, where the cached
+        prefix is rebuilt once so the listing includes them.
+        """
+        with self._pending_lock:
+            self._pending_tools.append(("add", list(tools)))
+
+    def remove_tools(self, names: list[str]) -> None:
+        """
+        Unregister tools by name (e.g. ones an MCP server stopped
+        listing). Queued like `add_tools`.
+        """
+        with self._pending_lock:
+            self._pending_tools.append(("remove", list(names)))
+
+    def _apply_pending_tools(self) -> None:
+        with self._pending_lock:
+            pending, self._pending_tools = self._pending_tools, []
+        for op, items in pending:
+            if op == "add":
+                self.tools.extend(items)
+            else:
+                self.tools[:] = [t for t in self.tools if t.name not in items]
+        if pending:
+            self._static_prefix = None
+
+    def static_prefix(self) -> Message:
+        """
+        The system message every LLM call starts with: the configured
+        prompt plus the command and tool listings. Built on first use
+        (after `Config.build()` has registered everything) and reused
+        verbatim afterwards, so the provider sees a byte-identical prefix.
+        """
+        if self._static_prefix is not None:
+            return self._static_prefix
 
-    async def explain_context(self, context: Context, engine: Engine):
-        """Prepend a fresh system message describing the current environment."""
         # Skills don't expose .name/.description directly — they wrap a
         # plain function. Pull both from the wrapped function's metadata.
         def _skill_summary(c):
@@ -40,12 +165,8 @@ class Lovelaice(Lingo):
         commands = "\n".join(_skill_summary(c) for c in self.skills) or "  - (none)"
         tools = "\n".join(f"  - {t.name}: {t.description}" for t in self.tools) or "  - (none)"
 
-        status = f"""
-# Environment
-
-- Time: {datetime.now().strftime("%A, %Y-%m-%d %H:%M:%S")}
-- User: {getpass.getuser()}
-- Workspace root (cwd): {os.getcwd()}
+        text = f"""
+{self.system_prompt.strip()}
 
 # Registered commands
 
@@ -55,22 +176,102 @@ class Lovelaice(Lingo):
 
 {tools}
 
-You operate in YOLO mode: tool calls execute immediately without
-confirmation. Be deliberate about destructive actions (file writes,
-shell commands that modify state) — read before you write, and
-prefer surgical edits over full rewrites.
+{YOLO_NOTICE}
 """.strip()
 
-        context.append(Message.system(status))
+        content = CachedText(text=text) if self.cache_control else text
+        self._static_prefix = Message(role="system", content=content)
+        return self._static_prefix
+
+    def volatile_tail(self) -> Message:
+        """Per-turn environment facts, appended after the user's message."""
+        return Message.system(f"""
+{ENVIRONMENT_HEADING}
+
+- Time: {datetime.now().strftime("%A, %Y-%m-%d %H:%M")}
+- User: {getpass.getuser()}
+- Workspace root (cwd): {os.getcwd()}
+""".strip())
+
+    async def explain_context(self, context: Context, engine: Engine):
+        """
+        Swap the bare system prompt the flow prepends for the static
+        prefix, and append the volatile environment facts at the tail.
+        """
+        prefix = self.static_prefix()
+        if context.messages and context.messages[0].role == "system":
+            context.messages[0] = prefix
+        else:
+            context.prepend(prefix)
+        context.append(self.volatile_tail())
+
+    async def compact(self, *, force: bool = False) -> CompactionResult:
+        """
+        Compact the conversation history if it is over `context_budget`
+        (or unconditionally with `force=True`, as `/compact` does). Old
+        tool observations are elided and old turns summarized; the most
+        recent turns stay verbatim.
+        """
+        budget = self.context_budget
+        if budget is None:
+            if not force:
+                tokens = estimate_tokens(list(self.messages))
+                return CompactionResult(tokens_before=tokens, tokens_after=tokens)
+            budget = estimate_tokens(list(self.messages))
+        # The static prefix rides along on every call, so it counts too.
+        budget -= estimate_tokens([self.static_prefix()])
+        with phase("compact"):
+            messages, result = await compact(
+                list(self.messages), self.llm, budget=max(budget, 0), force=force,
+            )
+        if result.changed:
+            self.messages = messages
+            # Pages `read` showed earlier may have been elided or summarized.
+            forget_seen()
+        return result
 
     async def chat(self, msg: str) -> Message:
-        """Same as Lingo.chat() but attaches `_lovelaice_on_tool_call` to the engine."""
+        """
+        Same as Lingo.chat() but attaches `_lovelaice_on_tool_call` and
+        `_lovelaice_turn_stats` to the engine, tags every LLM call with
+        its phase for `self.usage`, and compacts the history first when
+        it has outgrown the model's context budget.
+        """
+        self.usage.begin_turn()
+        before = self.usage.snapshot()
+        self._apply_pending_tools()
+        compaction = await self.compact()
         self.messages.append(Message.user(msg))
+        history = len(self.messages)
         context = Context(list(self.messages))
-        engine = _Engine(self.llm, self.tools)
+        engine = _TrackedEngine(self.llm, self.tools)
         engine._lovelaice_on_tool_call = self._on_tool_call
+        self.turn_stats = {}
+        if compaction.changed:
+            self.turn_stats["compacted_tokens"] = compaction.tokens_before - compaction.tokens_after
+        engine._lovelaice_turn_stats = self.turn_stats
         flow = self._build_flow()
-        await flow.execute(context, engine)
-        for m in context.messages[len(self.messages):]:
-            self.messages.append(m)
+        try:
+            with live_output(self._on_tool_output):
+                await flow.execute(context, engine)
+        except BaseException:
+            # The turn's messages are dropped, so pages `read` marked as
+            # seen during it are no longer anywhere in the history.
+            forget_seen()
+            raise
+        # The flow prepends the system prefix, so this turn's messages
+        # start one past the history. They are appended as-is, keeping
+        # the conversation an append-only (cache-friendly) prefix; the
+        # environment tail is left out, as each turn gets a fresh one.
+        for m in context.messages[history + 1:]:
+            if not _is_volatile_tail(m):
+                self.messages.append(m)
+        spent = self.usage.snapshot().minus(before)
+        self.turn_stats["prompt_tokens"] = spent.prompt_tokens
+        self.turn_stats["completion_tokens"] = spent.completion_tokens
+        self.turn_stats["cached_tokens"] = spent.cached_tokens
         return self.messages[-1]
+
+    async def aclose(self) -> None:
+        """Close the MCP sessions (and stop the servers) this agent started."""
+        await close_mcp()
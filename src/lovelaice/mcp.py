@@ -1,19 +1,50 @@
-"""MCP support: spawn stdio MCP servers and register their tools on the agent.
+"""MCP support: connect to MCP servers and register their tools on the agent.
+
+A server spec either has a `command` (spawned as a child process, spoken
+to over stdio) or a `url` of an already-running server shared by many
+agents (streamable HTTP, or SSE for URLs ending in `/sse` or with
+`"transport": "sse"`). URL servers on a loop share one pooled
+keep-alive HTTP client per set of `headers`.
 
 This is a thin wrapper around the official `mcp` Python SDK. Each tool
 exposed by an MCP server becomes a `lingo.tools.Tool` with display name
 `mcp:<server>:<tool>` and a JSON-schema-derived parameter map.
 
-Lifecycle: servers spawn at `Config.build()` time and inherit the parent
-process lifetime. v1 does not clean them up on exit — the OS reaps the
-subprocesses. A future `agent.close()` could do graceful teardown.
+Lifecycle: a server whose tool list is in the on-disk cache (see
+`_ToolCache`) is registered from it without spawning anything, and only
+spawned on the first call to one of its tools. The others spawn at
+`Config.build()` time, all at once; `build()` waits for them up to a
+total deadline and servers slower than that register their tools when
+ready.
+
+Sessions live on a `_Runtime`: servers spawned at build time (while the
+agent's loop is blocked in `build()`) share one background loop thread,
+and servers spawned on first use are hosted on the agent's own loop, so
+their calls are plain awaits. `aclose()` (or `Lovelaice.aclose()`)
+closes every session and stops the servers; anything left over is
+reaped with the process.
+
+Supervision: every tool calls through its server's `_Supervisor`, which
+times calls out, caps how many run at once, and respawns (with
+backoff) a server that died or stopped answering pings. Cancelling a
+tool call cancels it on the session's loop too.
 """
 from __future__ import annotations
 
 import asyncio
+import concurrent.futures
+import hashlib
 import json
+import os
+import sys
 import threading
-from typing import Any
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, Callable
+from urllib.parse import urlparse
 
 from lingo.tools import Tool
 
@@ -25,6 +56,41 @@ except ImportError:  # pragma: no cover
     stdio_client = None  # type: ignore[assignment]
     StdioServerParameters = None  # type: ignore[assignment]
 
+try:
+    from mcp.client.sse import sse_client
+    from mcp.client.streamable_http import streamable_http_client
+except ImportError:  # pragma: no cover
+    sse_client = None  # type: ignore[assignment]
+    streamable_http_client = None  # type: ignore[assignment]
+
+# The HTTP transports take the SDK's own client type: httpx2 in current
+# mcp releases, httpx before that.
+try:
+    import httpx2 as _httpx
+except ImportError:  # pragma: no cover
+    import httpx as _httpx
+
+
+# Total time `Config.build()` waits for servers to start.
+MCP_STARTUP_DEADLINE: float = 15.0
+# How long `aclose()` lets each session shut down before cancelling it.
+MCP_CLOSE_TIMEOUT: float = 5.0
+# Per-call limits; a spec's "timeout" and "max_concurrency" override them.
+MCP_CALL_TIMEOUT: float = 120.0
+MCP_MAX_CONCURRENT_CALLS: int = 4
+# A running server is pinged this often, and retired if a ping takes longer
+# than MCP_PING_TIMEOUT; so is one whose tool call failed.
+MCP_HEALTH_INTERVAL: float = 30.0
+MCP_PING_TIMEOUT: float = 5.0
+# Respawn delay after a server dies or fails to start, doubling while it
+# keeps failing.
+MCP_RESTART_BACKOFF: float = 1.0
+MCP_RESTART_BACKOFF_MAX: float = 60.0
+# HTTP timeouts for URL servers; reads get longer, as a server may hold a
+# response stream open between events.
+MCP_HTTP_TIMEOUT: float = 30.0
+MCP_HTTP_READ_TIMEOUT: float = 300.0
+
 
 _PYTHON_TYPE_FROM_JSON: dict[str, type] = {
     "string": str,
@@ -40,6 +106,15 @@ def _mcp_display_name(server: str, tool: str) -> str:
     return f"mcp:{server}:{tool}"
 
 
+def _field(obj: Any, *names: str) -> Any:
+    """The first of `names` set on `obj` (the SDK went from camelCase to snake_case)."""
+    for name in names:
+        value = getattr(obj, name, None)
+        if value is not None:
+            return value
+    return None
+
+
 def _params_from_input_schema(schema: dict[str, Any]) -> dict[str, type]:
     """Pluck a `dict[name, python_type]` from a JSON Schema input descriptor."""
     props = (schema or {}).get("properties", {}) or {}
@@ -89,87 +164,638 @@ def _wrap_mcp_tool(*, server_name: str, tool: Any, session: Any) -> _MCPTool:
     return _MCPTool(
         display_name=_mcp_display_name(server_name, tool.name),
         description=getattr(tool, "description", "") or "MCP tool",
-        params=_params_from_input_schema(getattr(tool, "inputSchema", None) or {}),
+        params=_params_from_input_schema(_field(tool, "inputSchema", "input_schema") or {}),
         session=session,
         tool_name=tool.name,
     )
 
 
-def register_mcp_tools(agent: Any, specs: list[dict[str, Any]]) -> None:
+@dataclass
+class ServerStartup:
     """
-    For each spec, spawn the MCP server, fetch its tools, and register
-    each on `agent.tools`. Failures on individual servers log + skip.
+    How one MCP server is doing — its startup, restarts and tool calls —
+    for the startup report and `/mcp`.
     """
-    for spec in specs:
+    name: str
+    status: str = "starting"  # "cached" | "starting" | "ready" | "failed" | "down" | "stopped"
+    seconds: float | None = None
+    tools: int = 0
+    error: str | None = None
+    restarts: int = 0
+    calls: int = 0
+    failed_calls: int = 0
+    call_seconds: float = 0.0
+    max_call_seconds: float = 0.0
+
+    def record_call(self, seconds: float, *, failed: bool = False) -> None:
+        self.calls += 1
+        self.failed_calls += failed
+        self.call_seconds += seconds
+        self.max_call_seconds = max(self.max_call_seconds, seconds)
+
+    def describe(self) -> str:
+        if self.status == "ready":
+            out = f"{self.name}: ready in {self.seconds:.2f}s ({self.tools} tools)"
+        elif self.status == "failed":
+            out = f"{self.name}: failed after {self.seconds:.2f}s ({self.error})"
+        elif self.status == "cached":
+            out = f"{self.name}: {self.tools} tools from cache; starts on first call"
+        elif self.status == "down":
+            out = f"{self.name}: down ({self.error}); restarts on next call"
+        elif self.status == "stopped":
+            out = f"{self.name}: stopped"
+        else:
+            out = f"{self.name}: still starting"
+        if self.calls:
+            out += (
+                f"; {self.calls} calls ({self.failed_calls} failed), "
+                f"avg {self.call_seconds / self.calls:.2f}s, max {self.max_call_seconds:.2f}s"
+            )
+        if self.restarts:
+            out += f"; restarted {self.restarts}x"
+        return out
+
+
+# --- Tool-list cache ----------------------------------------------------------
+
+
+def tool_cache_path() -> Path:
+    from .tools.index import cache_dir
+    return cache_dir() / "mcp-tools.json"
+
+
+def _spec_key(spec: dict[str, Any]) -> str:
+    """
+    Identify a server by how it is launched (or, for a URL server, where it
+    is); env and header values are hashed, never stored. The server's
+    version can't be part of the key: it is only known once the server
+    runs, and the key is what lets a launch skip running it. It is kept
+    in the entry instead, which is replaced when the server reports
+    another version or tool list.
+    """
+    secrets = spec.get("headers" if "url" in spec else "env") or {}
+    secrets_hash = hashlib.sha1(json.dumps(sorted(secrets.items())).encode("utf-8")).hexdigest()
+    where = [spec["url"]] if "url" in spec else [spec["command"], list(spec.get("args", []))]
+    launch = json.dumps([*where, secrets_hash])
+    return hashlib.sha1(launch.encode("utf-8")).hexdigest()
+
+
+def _tool_record(tool: Any) -> dict[str, Any]:
+    return {
+        "name": tool.name,
+        "description": getattr(tool, "description", "") or "",
+        "inputSchema": _field(tool, "inputSchema", "input_schema") or {},
+    }
+
+
+class _ToolCache:
+    """
+    Each server's tool list and input schemas, with the server version
+    that reported them, keyed by `_spec_key`. A server is spawned when
+    it is first used, and the entry is replaced if its version or tool
+    list has changed by then.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        try:
+            self._entries: dict[str, Any] = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            self._entries = {}
+
+    def get(self, spec: dict[str, Any]) -> dict[str, Any] | None:
+        with self._lock:
+            return self._entries.get(_spec_key(spec))
+
+    def store(self, spec: dict[str, Any], version: str | None, tools: list[Any]) -> bool:
+        """Record what the server reported; True if that differs from the cached entry."""
+        entry = {"server": spec.get("name"), "version": version, "tools": [_tool_record(t) for t in tools]}
+        with self._lock:
+            key = _spec_key(spec)
+            if self._entries.get(key) == entry:
+                return False
+            self._entries[key] = entry
+            self._save()
+            return True
+
+    def _save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self._entries, indent=1), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+
+def invalidate_tool_cache(specs: list[dict[str, Any]] | None = None) -> None:
+    """
+    Forget the cached tool lists of `specs` (or of every server), so the
+    next launch spawns those servers and lists their tools afresh.
+    """
+    path = tool_cache_path()
+    if specs is None:
+        path.unlink(missing_ok=True)
+        return
+    cache = _ToolCache(path)
+    with cache._lock:
+        for spec in specs:
+            cache._entries.pop(_spec_key(spec), None)
+        cache._save()
+
+
+class _Supervisor:
+    """
+    Stands between a server's tools and its session. Spawns the server on
+    the first call if it isn't running (cached servers, or one that
+    died), bounds every call by `timeout` and the calls in flight by
+    `max_concurrency`, and when a call fails checks the server with a
+    ping and retires it if it doesn't answer. Respawns back off
+    exponentially while a server keeps failing; calls in the meantime
+    fail at once instead of waiting on it.
+    """
+
+    def __init__(
+        self, spec: dict[str, Any], report: ServerStartup, cache: _ToolCache, agent: Any,
+        *, known: set[str] | None = None, startup: _Startup | None = None,
+    ) -> None:
+        self.spec = spec
+        self.name = spec.get("name", "<unnamed>")
+        self.timeout = float(spec.get("timeout", MCP_CALL_TIMEOUT))
+        self.report = report
+        self._cache = cache
+        self._agent = agent
+        self._known = set(known or ())
+        self._startup = startup
+        self._lock = asyncio.Lock()
+        self._slots = asyncio.Semaphore(int(spec.get("max_concurrency", MCP_MAX_CONCURRENT_CALLS)))
+        self._failures = 0
+        self._counted: _Startup | None = None
+
+    async def _session(self) -> _HostedSession:
+        async with self._lock:
+            startup = self._startup
+            if startup is None or startup.over or startup.runtime.loop.is_closed():
+                if startup is not None:
+                    self._backoff(startup)
+                    self.report.restarts += 1
+                self.report.status = "starting"
+                # Hosted on the caller's loop, so its calls skip the thread hop.
+                runtime = _runtime(asyncio.get_running_loop())
+                startup = self._startup = _Startup(self.spec, self.report, runtime)
+                await startup.wait(MCP_STARTUP_DEADLINE)
+                if startup.done.is_set() and startup.error is None:
+                    new = self._listed(startup)
+                    if new:
+                        # Usually mid-turn: queued for the agent's next one.
+                        self._agent.add_tools(new)
+        if not startup.done.is_set():
+            raise TimeoutError(f"MCP server {startup.name} not ready after {MCP_STARTUP_DEADLINE:g}s")
+        if startup.error is not None:
+            raise RuntimeError(f"MCP server {startup.name} failed to start: {startup.error!r}")
+        return startup.session
+
+    def _backoff(self, startup: _Startup) -> None:
+        """Raise if `startup` ended too recently to spawn the server again."""
+        if startup is not self._counted:
+            self._counted = startup
+            self._failures += 1
+        delay = min(MCP_RESTART_BACKOFF_MAX, MCP_RESTART_BACKOFF * 2 ** (self._failures - 1))
+        wait = (startup.ended_at or 0.0) + delay - time.monotonic()
+        if wait > 0:
+            raise RuntimeError(
+                f"MCP server {self.name} is down ({startup.report.error}); "
+                f"next restart in {wait:.1f}s"
+            )
+
+    def _listed(self, startup: _Startup) -> list[_MCPTool]:
+        """
+        Refresh the cache with what the server reports and wrap the tools
+        not seen before. Tools it no longer lists are taken off the agent;
+        a cached tool whose schema changed is replaced.
+        """
+        listed = {t.name for t in startup.tools}
+        gone = self._known - listed
+        if self.spec.get("lazy", True):
+            cached = {r["name"]: r for r in (self._cache.get(self.spec) or {}).get("tools", [])}
+            if self._cache.store(self.spec, startup.version, startup.tools):
+                gone |= {
+                    t.name for t in startup.tools
+                    if t.name in self._known and cached.get(t.name, _tool_record(t)) != _tool_record(t)
+                }
+        if gone:
+            self._known -= gone
+            self._agent.remove_tools(sorted(_mcp_display_name(self.spec["name"], n) for n in gone))
+        new = [t for t in startup.tools if t.name not in self._known]
+        self._known.update(t.name for t in new)
+        return [_wrap_mcp_tool(server_name=self.spec["name"], tool=t, session=self) for t in new]
+
+    def ready_tools(self) -> list[_MCPTool]:
+        """The tools of a server that finished starting at build time (none if it failed)."""
+        startup = self._startup
+        if startup.error is not None:
+            print(f"[mcp] {startup.name}: failed to start ({startup.error!r})", file=sys.stderr)
+            return []
+        print(f"[mcp] {startup.report.describe()}", file=sys.stderr)
+        return self._listed(startup)
+
+    async def call_tool(self, name: str, kwargs: dict[str, Any]) -> Any:
+        session = await self._session()
+        startup = self._startup
+        async with self._slots:
+            started = time.monotonic()
+            try:
+                result = await asyncio.wait_for(session.call_tool(name, kwargs), self.timeout)
+            except asyncio.TimeoutError:
+                self.report.record_call(time.monotonic() - started, failed=True)
+                await self._check(startup)
+                raise TimeoutError(
+                    f"MCP tool {self.name}:{name} did not answer within {self.timeout:g}s"
+                ) from None
+            except Exception:
+                self.report.record_call(time.monotonic() - started, failed=True)
+                await self._check(startup)
+                raise
+        self.report.record_call(time.monotonic() - started)
+        self._failures = 0
+        return result
+
+    async def _check(self, startup: _Startup) -> None:
+        """After a failed call: retire the server if it doesn't answer a ping."""
+        if startup.over:
+            return
         try:
-            session = _start_session_in_background(spec)
-            tools = _list_tools_blocking(session)
-        except Exception as exc:
-            print(f"[mcp] {spec.get('name', '<unnamed>')}: failed to start ({exc!r})")
+            await asyncio.wait_for(startup.session.send_ping(), MCP_PING_TIMEOUT)
+        except Exception as e:
+            startup.retire(f"no answer to ping: {e!r}" if str(e) else "no answer to ping")
+
+
+def register_mcp_tools(agent: Any, specs: list[dict[str, Any]]) -> list[ServerStartup]:
+    """
+    Register every server's tools on `agent`. Servers with a cached tool
+    list are registered from it and spawned on first use (set
+    `"lazy": False` in a spec to always spawn it). The rest spawn at
+    once; this waits at most `MCP_STARTUP_DEADLINE` seconds in total,
+    after which servers still starting keep going in the background and
+    their tools join at the first turn after they become ready. Failures
+    on individual servers log + skip. Every tool calls through its server's
+    `_Supervisor`. Returns one `ServerStartup` per server (also kept on
+    `agent.mcp_servers`), updated in place as servers start and run.
+    """
+    cache = _ToolCache(tool_cache_path())
+    reports: list[ServerStartup] = []
+    tools: list[list[_MCPTool]] = []
+    supervisors: list[_Supervisor | None] = []
+    for spec in specs:
+        entry = cache.get(spec) if spec.get("lazy", True) else None
+        if entry is None:
+            startup = _Startup(spec)
+            reports.append(startup.report)
+            supervisors.append(_Supervisor(spec, startup.report, cache, agent, startup=startup))
+            tools.append([])
             continue
-        for t in tools:
-            wrapped = _wrap_mcp_tool(server_name=spec["name"], tool=t, session=session)
-            agent.tools.append(wrapped)
+        report = ServerStartup(spec.get("name", "<unnamed>"), status="cached", tools=len(entry["tools"]))
+        supervisor = _Supervisor(spec, report, cache, agent, known={t["name"] for t in entry["tools"]})
+        reports.append(report)
+        supervisors.append(None)
+        tools.append([
+            _wrap_mcp_tool(server_name=spec["name"], tool=SimpleNamespace(**t), session=supervisor)
+            for t in entry["tools"]
+        ])
+
+    deadline = time.monotonic() + MCP_STARTUP_DEADLINE
+    for supervisor in supervisors:
+        if supervisor is not None:
+            supervisor._startup.done.wait(max(0.0, deadline - time.monotonic()))
+
+    agent.mcp_servers = reports
+    late: list[_Supervisor] = []
+    for supervisor, wrapped in zip(supervisors, tools):
+        if supervisor is not None and supervisor._startup.done.is_set():
+            wrapped.extend(supervisor.ready_tools())
+        elif supervisor is not None:
+            late.append(supervisor)
+        # Registered in spec order, so the tool listing is stable.
+        agent.tools.extend(wrapped)
+    for supervisor in late:
+        print(
+            f"[mcp] {supervisor.name}: not ready after {MCP_STARTUP_DEADLINE:g}s; "
+            "its tools will be added when it is",
+            file=sys.stderr,
+        )
+        # Called on the runtime's thread; the agent queues them for its
+        # next turn.
+        supervisor._startup.then(lambda _s, sup=supervisor: agent.add_tools(sup.ready_tools()))
+    return reports
 
 
-# --- Cross-thread session machinery ----------------------------------------
+# --- Session runtime ----------------------------------------------------------
 
 
-class _BackgroundSession:
-    """Holds an MCP ClientSession alive on a dedicated background loop."""
+class _HostedSession:
+    """
+    An MCP ClientSession living on its runtime's loop. Calls made on that
+    loop await it directly; calls from any other loop are handed over
+    with `run_coroutine_threadsafe`.
+    """
 
     def __init__(self, loop: asyncio.AbstractEventLoop, session: Any) -> None:
         self.loop = loop
         self.session = session
 
-    async def call_tool(self, name: str, kwargs: dict[str, Any]) -> Any:
-        fut = asyncio.run_coroutine_threadsafe(
-            self.session.call_tool(name, kwargs),
-            self.loop,
-        )
+    async def _call(self, method: Callable[..., Any], *args: Any) -> Any:
+        if asyncio.get_running_loop() is self.loop:
+            return await method(*args)
+        # Cancelling the wrapper cancels the call on the session's loop too.
+        fut = asyncio.run_coroutine_threadsafe(method(*args), self.loop)
         return await asyncio.wrap_future(fut)
 
+    async def call_tool(self, name: str, kwargs: dict[str, Any]) -> Any:
+        return await self._call(self.session.call_tool, name, kwargs)
+
+    async def send_ping(self) -> Any:
+        return await self._call(self.session.send_ping)
+
+
+def _http_transport(spec: dict[str, Any]) -> str:
+    """"sse" or "http" (streamable HTTP): the spec's "transport", else guessed from the URL."""
+    transport = spec.get("transport")
+    if transport is None:
+        transport = "sse" if urlparse(spec["url"]).path.rstrip("/").endswith("/sse") else "http"
+    if transport not in ("sse", "http"):
+        raise ValueError(f"unknown MCP transport {transport!r} (expected 'http' or 'sse')")
+    return transport
+
 
-def _start_session_in_background(spec: dict[str, Any]) -> _BackgroundSession:
-    """Spawn the MCP server, init the session, and keep it alive on a thread."""
+def _borrowed(client: Any) -> Callable[..., Any]:
+    """An `httpx_client_factory` that lends `client` without closing it afterwards."""
+    @asynccontextmanager
+    async def factory(**_: Any) -> AsyncIterator[Any]:
+        yield client
+    return factory
+
+
+def _connect(spec: dict[str, Any]) -> Any:
+    """The transport for `spec`: a spawned process's stdio, or an HTTP connection to its `url`."""
+    if "url" not in spec:
+        params = StdioServerParameters(
+            command=spec["command"],
+            args=spec.get("args", []),
+            env=spec.get("env"),
+        )
+        return stdio_client(params)
+    if streamable_http_client is None:
+        raise RuntimeError("this mcp SDK has no HTTP client transports")
+    client = _runtime(asyncio.get_running_loop()).http_client(spec.get("headers"))
+    if _http_transport(spec) == "sse":
+        return sse_client(spec["url"], httpx_client_factory=_borrowed(client))
+    return streamable_http_client(spec["url"], http_client=client)
+
+
+@asynccontextmanager
+async def _open_session(spec: dict[str, Any]) -> AsyncIterator[Any]:
+    """Connect to the server described by `spec` and yield a ClientSession on it."""
     if ClientSession is None or stdio_client is None:
         raise RuntimeError("mcp Python SDK not installed")
+    async with _connect(spec) as streams:
+        async with ClientSession(streams[0], streams[1]) as session:
+            yield session
 
-    ready = threading.Event()
-    holder: dict[str, Any] = {}
 
-    def _runner() -> None:
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-
-        async def _init_and_park() -> None:
-            params = StdioServerParameters(
-                command=spec["command"],
-                args=spec.get("args", []),
-                env=spec.get("env"),
-            )
-            async with stdio_client(params) as (read, write):
-                async with ClientSession(read, write) as session:
-                    await session.initialize()
-                    holder["session"] = session
-                    holder["loop"] = loop
-                    ready.set()
-                    await asyncio.Event().wait()
+class _Runtime:
+    """
+    One event loop hosting MCP sessions, each as a task that holds its
+    server's session open until `aclose()`. Either a loop adopted from
+    the caller, or (`loop=None`) a loop of its own on a daemon thread,
+    shared by every server spawned while the caller's loop is blocked.
+    """
 
+    def __init__(self, loop: asyncio.AbstractEventLoop | None = None) -> None:
+        self.loop = loop or asyncio.new_event_loop()
+        self._served: list[tuple[_Startup, Any]] = []
+        self._lock = threading.Lock()
+        # Keep-alive HTTP clients by headers; only touched on `loop`.
+        self._clients: dict[str, Any] = {}
+        self.thread: threading.Thread | None = None
+        if loop is None:
+            self.thread = threading.Thread(target=self._run, name="mcp-runtime", daemon=True)
+            self.thread.start()
+
+    def _run(self) -> None:
+        asyncio.set_event_loop(self.loop)
         try:
-            loop.run_until_complete(_init_and_park())
-        except Exception as e:
-            holder["error"] = e
-            ready.set()
+            self.loop.run_forever()
+        finally:
+            self.loop.close()
+
+    def host(self, startup: "_Startup") -> None:
+        """Start serving `startup` on this runtime's loop."""
+        coro = startup.serve(self.loop)
+        if _running_loop() is self.loop:
+            fut: Any = self.loop.create_task(coro)
+        else:
+            fut = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        with self._lock:
+            self._served.append((startup, fut))
+
+    def http_client(self, headers: dict[str, str] | None) -> Any:
+        """
+        The pooled keep-alive HTTP client sending `headers`, shared by every
+        URL server on this loop and by their reconnects.
+        """
+        key = json.dumps(sorted((headers or {}).items()))
+        client = self._clients.get(key)
+        if client is None:
+            client = self._clients[key] = _httpx.AsyncClient(
+                headers=headers,
+                timeout=_httpx.Timeout(MCP_HTTP_TIMEOUT, read=MCP_HTTP_READ_TIMEOUT),
+            )
+        return client
+
+    async def _on_loop(self, coro: Any) -> Any:
+        if _running_loop() is self.loop:
+            return await coro
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, self.loop))
+
+    async def aclose(self) -> None:
+        """
+        Let every session exit its context (which stops a spawned server, or
+        ends the session with a URL server), cancel those that don't within
+        `MCP_CLOSE_TIMEOUT`, close the HTTP clients, then stop an owned loop.
+        """
+        with self._lock:
+            served, self._served = self._served, []
+        for startup, _ in served:
+            startup.stop()
+        futures = [
+            asyncio.wrap_future(f) if isinstance(f, concurrent.futures.Future) else f
+            for _, f in served
+        ]
+        if futures:
+            _, pending = await asyncio.wait(futures, timeout=MCP_CLOSE_TIMEOUT)
+            for f in pending:
+                f.cancel()
+            if pending:
+                await asyncio.wait(pending, timeout=MCP_CLOSE_TIMEOUT)
+        clients, self._clients = list(self._clients.values()), {}
+        if clients and not self.loop.is_closed():
+            await self._on_loop(_close_clients(clients))
+        if self.thread is not None and not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            await asyncio.to_thread(self.thread.join, MCP_CLOSE_TIMEOUT)
+
+
+async def _close_clients(clients: list[Any]) -> None:
+    await asyncio.gather(*(c.aclose() for c in clients), return_exceptions=True)
+
+
+_runtimes: list[_Runtime] = []
+_runtimes_lock = threading.Lock()
+
+
+def _running_loop() -> asyncio.AbstractEventLoop | None:
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+def _runtime(loop: asyncio.AbstractEventLoop | None = None) -> _Runtime:
+    """The runtime hosting sessions on `loop`, or the shared background one."""
+    with _runtimes_lock:
+        _runtimes[:] = [rt for rt in _runtimes if not rt.loop.is_closed()]
+        for rt in _runtimes:
+            if (rt.loop is loop) if loop is not None else rt.thread is not None:
+                return rt
+        rt = _Runtime(loop)
+        _runtimes.append(rt)
+        return rt
+
+
+async def aclose() -> None:
+    """
+    Shut down every MCP session: each server's session is closed and its
+    process stopped, and the background loop exits. Sessions hosted on
+    some other loop that is still running are left alone. Servers used
+    after this are spawned again.
+    """
+    current = asyncio.get_running_loop()
+    with _runtimes_lock:
+        closing = [rt for rt in _runtimes if rt.thread is not None or rt.loop is current]
+        _runtimes[:] = [rt for rt in _runtimes if rt not in closing]
+    for rt in closing:
+        await rt.aclose()
 
-    threading.Thread(target=_runner, daemon=True).start()
-    ready.wait(timeout=15.0)
-    if "error" in holder:
-        raise holder["error"]
-    return _BackgroundSession(loop=holder["loop"], session=holder["session"])
 
+class _Startup:
+    """
+    One server being spawned, initialized and listed as a task on a
+    runtime's loop, which then holds the session open — pinging the
+    server every `MCP_HEALTH_INTERVAL` — until `stop()` or `retire()`.
+    `then(fn)` runs `fn(self)` once startup is over, right away if it
+    already is.
+    """
 
-def _list_tools_blocking(bg: _BackgroundSession) -> list[Any]:
-    """Synchronously fetch the tool list from a backgrounded session."""
-    fut = asyncio.run_coroutine_threadsafe(bg.session.list_tools(), bg.loop)
-    return fut.result(timeout=15.0).tools
+    def __init__(
+        self, spec: dict[str, Any], report: ServerStartup | None = None,
+        runtime: _Runtime | None = None,
+    ) -> None:
+        self.spec = spec
+        self.name = spec.get("name", "<unnamed>")
+        self.report = report or ServerStartup(self.name)
+        self.session: _HostedSession | None = None
+        self.version: str | None = None
+        self.tools: list[Any] = []
+        self.error: BaseException | None = None
+        # When the session ended (failed start, death, or stop); None while it is up.
+        self.ended_at: float | None = None
+        self.done = threading.Event()
+        self._ready = asyncio.Event()
+        self._stop = asyncio.Event()
+        self._lock = threading.Lock()
+        self._then: Callable[[_Startup], None] | None = None
+        self._started = time.monotonic()
+        self.runtime = runtime or _runtime()
+        self.runtime.host(self)
+
+    async def serve(self, loop: asyncio.AbstractEventLoop) -> None:
+        try:
+            async with _open_session(self.spec) as session:
+                init = await session.initialize()
+                self.version = getattr(_field(init, "serverInfo", "server_info"), "version", None)
+                listed = await session.list_tools()
+                self._finish(session=_HostedSession(loop, session), tools=listed.tools)
+                await self._watch(session)
+        except Exception as e:
+            self._finish(error=e)
+            self.retire(repr(e))
+        finally:
+            self._finish(error=RuntimeError("closed before it was ready"))
+            self.retire("session closed" if not self._stop.is_set() else None)
+
+    async def _watch(self, session: Any) -> None:
+        """Hold the session open until stopped; retire the server if a ping fails."""
+        while not self._stop.is_set():
+            try:
+                await asyncio.wait_for(self._stop.wait(), MCP_HEALTH_INTERVAL)
+            except asyncio.TimeoutError:
+                try:
+                    await asyncio.wait_for(session.send_ping(), MCP_PING_TIMEOUT)
+                except Exception as e:
+                    self.retire(f"health check failed: {e!r}")
+
+    @property
+    def over(self) -> bool:
+        return self.ended_at is not None
+
+    def retire(self, reason: str | None) -> None:
+        """
+        Mark the session ended — "down" with `reason`, or "stopped" without
+        one — and close it. Safe from any thread; only the first call counts.
+        """
+        with self._lock:
+            if self.ended_at is not None:
+                return
+            self.ended_at = time.monotonic()
+            if self.report.status == "ready":
+                self.report.status = "down" if reason else "stopped"
+                self.report.error = reason
+        self.stop()
+
+    def stop(self) -> None:
+        """Ask the session to close; safe from any thread."""
+        if not self.runtime.loop.is_closed():
+            self.runtime.loop.call_soon_threadsafe(self._stop.set)
+
+    async def wait(self, timeout: float) -> None:
+        """Wait up to `timeout` seconds for startup to be over."""
+        if _running_loop() is self.runtime.loop:
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        else:
+            await asyncio.to_thread(self.done.wait, timeout)
+
+    def _finish(
+        self, *, session: _HostedSession | None = None, tools: list[Any] | None = None,
+        error: BaseException | None = None,
+    ) -> None:
+        with self._lock:
+            if self.done.is_set():
+                return
+            self.session, self.tools, self.error = session, tools or [], error
+            self.report.seconds = time.monotonic() - self._started
+            self.report.status = "failed" if error is not None else "ready"
+            self.report.tools = len(self.tools)
+            self.report.error = None if error is None else repr(error)
+            self.done.set()
+            self._ready.set()
+            then = self._then
+        if then is not None:
+            then(self)
+
+    def then(self, fn: Callable[["_Startup"], None]) -> None:
+        with self._lock:
+            if not self.done.is_set():
+                self._then = fn
+                return
+        fn(self)
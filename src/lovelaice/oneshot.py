@@ -7,7 +7,8 @@ of three output formats:
 - ``plain`` — raw streaming text. Content tokens go to stdout, reasoning
   tokens go to stderr. No Rich, no panels, no markup. Pipeline-friendly.
 - ``json`` — newline-delimited JSON event stream on stdout. One event
-  per line: ``reasoning``, ``content``, ``done``, ``error``. Programmatic
+  per line: ``reasoning``, ``content``, ``tool_output``, ``llm_call``, ``stats``,
+  ``done``, ``error``. Programmatic
   consumers (tests, automation, frontends) should use this mode.
 
 The mode is selected by the CLI via mutually-exclusive ``--plain`` /
@@ -18,6 +19,7 @@ from __future__ import annotations
 import asyncio
 import json
 import sys
+from dataclasses import asdict
 from pathlib import Path
 from typing import IO, Literal, Optional
 
@@ -27,6 +29,7 @@ from rich.markdown import Markdown
 from rich.panel import Panel
 
 from .config import load_agent_from_config
+from .mcp import aclose as close_mcp
 
 
 OutputMode = Literal["rich", "plain", "json"]
@@ -83,8 +86,18 @@ async def _run_json(config_path: Path, *, model: Optional[str], prompt: str) ->
         emit({"type": "error", "stage": "build", "message": str(e)})
         return 2
 
+    usage = getattr(bot, "usage", None)
+    if usage is not None:
+        usage.on_call = lambda rec: emit({"type": "llm_call", **asdict(rec)})
+    bot._on_tool_output = lambda key, delta: emit(
+        {"type": "tool_output", "tool": key.partition("#")[0], "call": key, "delta": delta}
+    )
+
     try:
         result = await bot.chat(prompt)
+        stats = getattr(bot, "turn_stats", None)
+        if isinstance(stats, dict) and stats:
+            emit({"type": "stats", **stats})
         emit({"type": "done", "content": getattr(result, "content", "") or ""})
         return 0
     except asyncio.TimeoutError:
@@ -97,6 +110,8 @@ async def _run_json(config_path: Path, *, model: Optional[str], prompt: str) ->
             "message": f"{type(e).__name__}: {e}",
         })
         return 2
+    finally:
+        await close_mcp()
 
 
 # --- plain mode ---------------------------------------------------------
@@ -138,6 +153,8 @@ async def _run_plain(config_path: Path, *, model: Optional[str], prompt: str) ->
     except Exception as e:
         print(f"\nLLM error: {type(e).__name__}: {e}", file=sys.stderr)
         return 2
+    finally:
+        await close_mcp()
 
 
 # --- rich mode ----------------------------------------------------------
@@ -226,3 +243,5 @@ async def _run_rich(
     except Exception as e:
         print(f"LLM error: {type(e).__name__}: {e}", file=sys.stderr)
         return 2
+    finally:
+        await close_mcp()
@@ -1,7 +1,15 @@
 """Built-in tools for lovelaice agents."""
 from .bash import bash
 from .files import edit, list_, read, write
+from .jobs import bash_kill, bash_poll, bash_start
+from .output import read_output
+from .patch import apply_edits
 from .search import glob, grep
+from .symbols import find_symbol, outline
 from .web import fetch
 
-__all__ = ["bash", "read", "write", "edit", "list_", "glob", "grep", "fetch"]
+__all__ = [
+    "bash", "bash_start", "bash_poll", "bash_kill",
+    "read", "write", "edit", "apply_edits", "list_", "glob", "grep", "find_symbol", "outline",
+    "fetch", "read_output",
+]
@@ -2,13 +2,42 @@
 
 `Config(bash_timeout=...)` mutates `BASH_TIMEOUT` at build-time; the
 default is 120 seconds.
+
+Output is read incrementally, never buffered whole: at most
+`BASH_OUTPUT_CAP` bytes are kept (the first and last halves), with a
+marker counting the bytes elided in between. `Config(bash_output_cap=...)`
+mutates the cap; the default is 1 MB. Chunks are also forwarded live
+through `tools.output.emit_live` as they arrive.
+
+`Config(bash_persistent=True)` mutates `BASH_PERSISTENT`: instead of a
+fresh shell per call, commands run in one long-lived bash process per
+session, so `cd`, exported variables and activated virtualenvs carry
+over between calls. Each command is delimited by a random sentinel that
+carries its exit status. A command that times out takes the shell down
+with it; a shell that died (timeout, `exit`, crash) is restarted
+transparently on the next call.
 """
 from __future__ import annotations
 
 import asyncio
+import atexit
+import base64
+import codecs
+import itertools
+import os
+import re
+import signal
+import uuid
+
+from .output import emit_live
 
 
 BASH_TIMEOUT: float = 120.0
+BASH_PERSISTENT: bool = False
+BASH_OUTPUT_CAP: int = 1_000_000
+
+# Numbers each call's live-output block, so concurrent calls stay apart.
+_calls = itertools.count(1)
 
 
 async def bash(command: str) -> str:
@@ -17,24 +46,216 @@ async def bash(command: str) -> str:
     order. Nonzero exit codes do not raise — the output is returned and the
     agent decides what to do.
 
-    Times out after BASH_TIMEOUT seconds; on timeout, the subprocess is
-    SIGTERM'd (then SIGKILL'd 1 second later if still alive) and a
-    TimeoutError is raised.
+    Times out after BASH_TIMEOUT seconds; on timeout, the command and
+    everything it started are SIGTERM'd (then SIGKILL'd 1 second later if
+    still alive) and a TimeoutError is raised.
     """
+    if BASH_PERSISTENT:
+        return await _session().run(command, timeout=BASH_TIMEOUT)
+
+    # Its own process group, so a timeout also reaches the command's
+    # children; a surviving child would hold the pipe open.
     proc = await asyncio.create_subprocess_shell(
         command,
         stdout=asyncio.subprocess.PIPE,
         stderr=asyncio.subprocess.STDOUT,
+        start_new_session=True,
     )
+    capture = _Capture(BASH_OUTPUT_CAP)
+
+    async def _drain() -> None:
+        assert proc.stdout is not None
+        while chunk := await proc.stdout.read(65536):
+            capture.feed(chunk)
+        await proc.wait()
+
     try:
-        stdout, _ = await asyncio.wait_for(proc.communicate(), timeout=BASH_TIMEOUT)
+        await asyncio.wait_for(_drain(), timeout=BASH_TIMEOUT)
     except asyncio.TimeoutError:
-        proc.terminate()
-        try:
-            await asyncio.wait_for(proc.wait(), timeout=1.0)
-        except asyncio.TimeoutError:
-            proc.kill()
-            await proc.wait()
+        await _terminate(proc, group=True)
         raise TimeoutError(f"bash timed out after {BASH_TIMEOUT}s")
 
-    return stdout.decode("utf-8", errors="replace")
+    return capture.text()
+
+
+class _Capture:
+    """
+    Head+tail byte buffer capped at `cap` bytes. Everything fed is also
+    decoded incrementally and forwarded live via `emit_live`, under a
+    `bash#<n>` key of its own.
+    """
+
+    def __init__(self, cap: int) -> None:
+        self._key = f"bash#{next(_calls)}"
+        self._head_cap = cap - cap // 2
+        self._tail_cap = cap // 2
+        self._head = bytearray()
+        self._tail = bytearray()
+        self.elided = 0
+        self._live = codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+    def feed(self, chunk: bytes) -> None:
+        emit_live(self._key, self._live.decode(chunk))
+        room = self._head_cap - len(self._head)
+        if room > 0:
+            self._head += chunk[:room]
+            chunk = chunk[room:]
+        if not chunk:
+            return
+        self._tail += chunk
+        overflow = len(self._tail) - self._tail_cap
+        if overflow > 0:
+            del self._tail[:overflow]
+            self.elided += overflow
+
+    def text(self) -> str:
+        head = self._head.decode("utf-8", errors="replace")
+        tail = self._tail.decode("utf-8", errors="replace")
+        if not self.elided:
+            return head + tail
+        return f"{head}\n... [{self.elided} bytes of output elided] ...\n{tail}"
+
+
+async def _terminate(proc: asyncio.subprocess.Process, *, group: bool = False) -> None:
+    """SIGTERM `proc` (its whole process group if `group`), SIGKILL after 1s."""
+    def _send(sig: int) -> None:
+        try:
+            if group:
+                os.killpg(proc.pid, sig)
+            else:
+                proc.send_signal(sig)
+        except ProcessLookupError:
+            pass
+
+    _send(signal.SIGTERM)
+    try:
+        await asyncio.wait_for(proc.wait(), timeout=1.0)
+    except asyncio.TimeoutError:
+        _send(signal.SIGKILL)
+        await proc.wait()
+
+
+# --- Persistent session -----------------------------------------------------
+
+
+class _ShellSession:
+    """One long-lived `bash` driven through sentinel-delimited commands."""
+
+    def __init__(self) -> None:
+        self._proc: asyncio.subprocess.Process | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._lock: asyncio.Lock | None = None
+
+    def _alive(self) -> bool:
+        return (
+            self._proc is not None
+            and self._proc.returncode is None
+            and self._loop is asyncio.get_running_loop()
+        )
+
+    async def _start(self) -> None:
+        # A shell left over from another event loop can't be driven from
+        # this one; kill it outright.
+        _kill_group(self._proc)
+        # A new process group lets a timeout kill the command's children too.
+        self._proc = await asyncio.create_subprocess_exec(
+            "bash", "--noprofile", "--norc",
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT,
+            start_new_session=True,
+        )
+        self._loop = asyncio.get_running_loop()
+
+    async def run(self, command: str, *, timeout: float) -> str:
+        if self._lock is None or self._loop is not asyncio.get_running_loop():
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if not self._alive():
+                await self._start()
+            assert self._proc is not None and self._proc.stdin and self._proc.stdout
+
+            marker = f"__lovelaice_{uuid.uuid4().hex}__"
+            # `eval` keeps syntax errors from killing the shell; stdin from
+            # /dev/null keeps the command from eating the next script line.
+            encoded = base64.b64encode(command.encode("utf-8")).decode("ascii")
+            script = (
+                f'eval "$(printf %s {encoded} | base64 -d)" < /dev/null\n'
+                f"printf '{marker}%d\\n' \"$?\"\n"
+            )
+            try:
+                self._proc.stdin.write(script.encode("utf-8"))
+                await self._proc.stdin.drain()
+                output, exited = await asyncio.wait_for(
+                    self._read_until(marker), timeout=timeout,
+                )
+            except asyncio.TimeoutError:
+                await self.close()
+                raise TimeoutError(f"bash timed out after {timeout}s")
+            except BaseException:
+                # Cancelled (or broken) mid-command: the command would keep
+                # running and leave its output for the next call to read.
+                proc, self._proc = self._proc, None
+                _kill_group(proc)
+                await asyncio.shield(proc.wait())
+                raise
+
+            if exited:
+                await self._proc.wait()
+                self._proc = None
+                output += "\n[shell exited; a fresh shell will start on the next call]"
+            return output
+
+    async def _read_until(self, marker: str) -> tuple[str, bool]:
+        """Read output up to the sentinel. Returns (output, shell_exited)."""
+        assert self._proc is not None and self._proc.stdout
+        pattern = re.compile(re.escape(marker.encode()) + rb"(\d+)\n")
+        # Hold back enough bytes that a sentinel split across two reads is
+        # still found, and never captured as output.
+        keep = len(marker) + 16
+        capture = _Capture(BASH_OUTPUT_CAP)
+        pending = b""
+        while True:
+            chunk = await self._proc.stdout.read(65536)
+            if not chunk:
+                capture.feed(pending)
+                return capture.text(), True
+            pending += chunk
+            match = pattern.search(pending)
+            if match:
+                capture.feed(pending[:match.start()])
+                return capture.text(), False
+            if len(pending) > keep:
+                capture.feed(pending[:-keep])
+                pending = pending[-keep:]
+
+    async def close(self) -> None:
+        proc, self._proc = self._proc, None
+        if proc is not None and proc.returncode is None:
+            await _terminate(proc, group=True)
+
+
+_shell: _ShellSession | None = None
+
+
+def _session() -> _ShellSession:
+    global _shell
+    if _shell is None:
+        _shell = _ShellSession()
+        atexit.register(_kill_session)
+    return _shell
+
+
+def _kill_group(proc: asyncio.subprocess.Process | None) -> None:
+    """SIGKILL a session shell's process group without needing its loop."""
+    if proc is not None and proc.returncode is None:
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+
+def _kill_session() -> None:
+    """Interpreter shutdown: the loop is gone, so signal the group directly."""
+    if _shell is not None:
+        _kill_group(_shell._proc)
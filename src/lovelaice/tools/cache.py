@@ -0,0 +1,168 @@
+"""Session file cache shared by read, write, edit and grep.
+
+File contents are stored once per distinct body (keyed by SHA-1) and
+looked up by path, with an entry trusted only while the file's
+(mtime, size, inode) stamp is unchanged. The whole cache is capped at
+`CACHE_BYTES`, oldest entries first out; files over `MAX_ENTRY_BYTES`
+are never cached. grep only `peek()`s, so a workspace-wide search uses
+what is cached without flushing it.
+
+The cache also remembers which pages `read` has already shown and at
+which ReAct step (`next_step()` is called by the loop). Re-reading the
+same page returns "unchanged since step N" or a unified diff against
+the body shown then, instead of the full text. `forget_seen()` drops
+those records whenever the earlier output may have left the context
+(compaction, `/clear`).
+"""
+from __future__ import annotations
+
+import difflib
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+
+CACHE_BYTES: int = 64 * 1024 * 1024
+MAX_ENTRY_BYTES: int = 4 * 1024 * 1024
+
+Stamp = tuple[int, int, int]
+
+
+def stamp_of(st: os.stat_result) -> Stamp:
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+@dataclass
+class Seen:
+    """A page `read` returned: when, and which file version it showed."""
+    step: int
+    stamp: Stamp
+    digest: str | None
+    header: str
+
+
+class FileCache:
+    """Path → (stamp, digest) entries over a content-addressed blob store."""
+
+    def __init__(self) -> None:
+        self._paths: dict[str, tuple[Stamp, str]] = {}
+        self._blobs: OrderedDict[str, bytes] = OrderedDict()
+        self._size = 0
+        # grep reads through the cache from a worker thread.
+        self._lock = threading.Lock()
+        self._seen: dict[tuple, Seen] = {}
+        self.step = 0
+        self.hits = 0
+        self.misses = 0
+
+    # --- contents -----------------------------------------------------
+
+    def read_bytes(self, path: str, st: os.stat_result | None = None) -> bytes | None:
+        """
+        The bytes of `path`, from the cache when its stamp still matches.
+        Returns None for files too large to cache; callers read those
+        themselves (e.g. `read` memory-maps them).
+        """
+        key = os.path.abspath(path)
+        st = st or os.stat(key)
+        stamp = stamp_of(st)
+        with self._lock:
+            cached = self._paths.get(key)
+            if cached is not None and cached[0] == stamp and cached[1] in self._blobs:
+                self._blobs.move_to_end(cached[1])
+                self.hits += 1
+                return self._blobs[cached[1]]
+        if st.st_size > MAX_ENTRY_BYTES:
+            return None
+        self.misses += 1
+        with open(key, "rb") as f:
+            data = f.read()
+        self._store(key, stamp, data)
+        return data
+
+    def peek(self, path: str) -> bytes | None:
+        """The cached bytes of `path` if still fresh; never reads the file."""
+        key = os.path.abspath(path)
+        with self._lock:
+            cached = self._paths.get(key)
+        if cached is None:
+            return None
+        try:
+            fresh = stamp_of(os.stat(key)) == cached[0]
+        except OSError:
+            return None
+        with self._lock:
+            data = self._blobs.get(cached[1]) if fresh else None
+        if data is not None:
+            self.hits += 1
+        return data
+
+    def digest(self, path: str) -> str | None:
+        """The content digest last recorded for `path`, if any."""
+        cached = self._paths.get(os.path.abspath(path))
+        return cached[1] if cached is not None else None
+
+    def blob(self, digest: str | None) -> bytes | None:
+        return self._blobs.get(digest) if digest is not None else None
+
+    def update(self, path: str, data: bytes) -> None:
+        """Record what write/edit just put on disk at `path`."""
+        key = os.path.abspath(path)
+        if len(data) <= MAX_ENTRY_BYTES:
+            self._store(key, stamp_of(os.stat(key)), data)
+        else:
+            self._paths.pop(key, None)
+
+    def _store(self, key: str, stamp: Stamp, data: bytes) -> None:
+        digest = hashlib.sha1(data).hexdigest()
+        with self._lock:
+            self._paths[key] = (stamp, digest)
+            if digest in self._blobs:
+                self._blobs.move_to_end(digest)
+                return
+            self._blobs[digest] = data
+            self._size += len(data)
+            while self._size > CACHE_BYTES and len(self._blobs) > 1:
+                _, old = self._blobs.popitem(last=False)
+                self._size -= len(old)
+
+    # --- what the agent has seen -----------------------------------------
+
+    def next_step(self) -> int:
+        self.step += 1
+        return self.step
+
+    def seen(self, page: tuple) -> Seen | None:
+        return self._seen.get(page)
+
+    def mark_seen(self, page: tuple, stamp: Stamp, digest: str | None, header: str) -> None:
+        self._seen[page] = Seen(step=self.step, stamp=stamp, digest=digest, header=header)
+
+    def forget_seen(self) -> None:
+        self._seen.clear()
+
+
+def unified_diff(old: bytes, new: bytes, path: str) -> str:
+    """A unified diff of two file bodies, decoded as UTF-8."""
+    def lines(data: bytes) -> list[str]:
+        out = data.decode("utf-8", errors="replace").splitlines(keepends=True)
+        if out and not out[-1].endswith("\n"):
+            out[-1] += "\n\\ No newline at end of file\n"
+        return out
+
+    return "".join(difflib.unified_diff(lines(old), lines(new), fromfile=path, tofile=path))
+
+
+file_cache = FileCache()
+
+
+def next_step() -> int:
+    """Advance the session's step counter (called once per ReAct step)."""
+    return file_cache.next_step()
+
+
+def forget_seen() -> None:
+    """Earlier `read` output may be gone from the context: show full pages again."""
+    file_cache.forget_seen()
@@ -1,15 +1,160 @@
+"""File tools: read, write, edit, list.
+
+`read` pages through files instead of loading them whole. The file is
+memory-mapped and a sparse line-offset index (the newline count before
+every `INDEX_CHUNK` bytes) is built once per (path, mtime, size), so a
+page deep inside a multi-GB log only touches the chunk it starts in
+plus the bytes it returns.
+"""
+import mmap
 import os
+import stat
+import tempfile
+from bisect import bisect_left
 from pathlib import Path
 
+from . import inventory, output
+from .cache import file_cache, stamp_of, unified_diff
+from .matching import match_edit
+
+
+# Default page size for `read`: lines, and characters of returned text.
+READ_LINE_LIMIT: int = 2000
+READ_BYTE_CAP: int = 15_000
+
+# Granularity of the line-offset index.
+INDEX_CHUNK = 1 << 20
+
+# Lines longer than this are cut in `read` output.
+MAX_LINE_CHARS = 2000
+
+
+class _LineIndex:
+    """Newline counts at fixed byte strides through a file's bytes."""
+
+    def __init__(self, mm: bytes | mmap.mmap) -> None:
+        size = len(mm)
+        # checkpoints[k] = newlines before byte k * INDEX_CHUNK.
+        self.checkpoints: list[int] = []
+        count = 0
+        for start in range(0, size, INDEX_CHUNK):
+            self.checkpoints.append(count)
+            count += mm[start:start + INDEX_CHUNK].count(b"\n")
+        self.lines = count + (1 if size and mm[size - 1] != ord("\n") else 0)
 
-async def read(path: str) -> str:
+    def line_start(self, mm: bytes | mmap.mmap, line: int) -> int:
+        """Byte offset where 0-based `line` starts."""
+        if line == 0:
+            return 0
+        # The chunk holding the line-th newline: checkpoints[k] < line.
+        k = bisect_left(self.checkpoints, line) - 1
+        pos, seen = k * INDEX_CHUNK, self.checkpoints[k]
+        while seen < line:
+            pos = mm.find(b"\n", pos) + 1
+            seen += 1
+        return pos
+
+
+_indexes: dict[str, tuple[tuple[int, int], _LineIndex]] = {}
+_INDEX_CACHE_SIZE = 64
+
+
+def _line_index(path: str, mm: bytes | mmap.mmap, st: os.stat_result) -> _LineIndex:
+    key = os.path.abspath(path)
+    stamp = (st.st_mtime_ns, st.st_size)
+    cached = _indexes.get(key)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+    index = _LineIndex(mm)
+    if len(_indexes) >= _INDEX_CACHE_SIZE:
+        _indexes.pop(next(iter(_indexes)))
+    _indexes[key] = (stamp, index)
+    return index
+
+
+async def read(
+    path: str,
+    offset: int = 1,
+    limit: int = READ_LINE_LIMIT,
+    max_bytes: int = READ_BYTE_CAP,
+) -> str:
     """
-    Read the entire contents of a text file and return it as a string.
+    Read a text file and return its lines numbered, one page at a time.
 
-    Use this whenever you need to inspect a file's contents — source code,
-    configuration, prose, anything text. Binary files are not supported.
+    Returns up to `limit` lines starting at line `offset` (1-based), cut
+    short once the page reaches `max_bytes` characters (at most about
+    the observation limit, so a page is always shown whole). The header
+    gives the total line count and the offset of the next page; call
+    again with that offset to keep reading. Re-reading a page you have already
+    seen returns only whether (and how) the file changed since. Use this
+    to inspect source code, configuration, logs — anything text.
     """
-    return Path(path).read_text(encoding="utf-8")
+    st = os.stat(path)
+    if st.st_size == 0:
+        return f"[{path}: empty file]"
+    first = max(1, offset)
+    # A bigger page would be spilled, and only its excerpt seen.
+    max_bytes = min(max_bytes, max(1, output.OBSERVATION_LIMIT - output.PAGE_HEADER_CHARS))
+    page = (os.path.abspath(path), first, limit, max_bytes)
+    stamp = stamp_of(st)
+    data = file_cache.read_bytes(path, st)
+    digest = file_cache.digest(path) if data is not None else None
+
+    seen = file_cache.seen(page)
+    if seen is not None:
+        if seen.stamp == stamp or (digest is not None and seen.digest == digest):
+            return f"{seen.header[:-1]}; unchanged since step {seen.step}, not repeated]"
+        old = file_cache.blob(seen.digest)
+        if old is not None and data is not None:
+            diff = unified_diff(old, data, path)
+            if len(diff) <= max_bytes:
+                header = f"[{path}: changed since step {seen.step}; unified diff against the version read then]"
+                file_cache.mark_seen(page, stamp, digest, seen.header)
+                return f"{header}\n{diff}"
+
+    if data is not None:
+        header, body = _page(path, data, st, first, limit, max_bytes)
+    else:
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            header, body = _page(path, mm, st, first, limit, max_bytes)
+    out = f"{header}\n{body}" if body else header
+    # Even so, a long path can push it over; then it was not seen whole.
+    if len(out) <= output.OBSERVATION_LIMIT:
+        file_cache.mark_seen(page, stamp, digest, header)
+    return out
+
+
+def _page(
+    path: str, buf, st: os.stat_result, first: int, limit: int, max_bytes: int,
+) -> tuple[str, str]:
+    """Render one numbered page of `buf` (bytes or mmap): (header, body)."""
+    index = _line_index(path, buf, st)
+    if first > index.lines:
+        return f"[{path}: {index.lines} lines; offset {first} is past the end]", ""
+
+    pos = index.line_start(buf, first - 1)
+    width = len(str(index.lines))
+    out: list[str] = []
+    used = 0
+    line = first
+    while line <= index.lines and line - first < max(1, limit):
+        end = buf.find(b"\n", pos)
+        end = len(buf) if end < 0 else end
+        raw = buf[pos:min(end, pos + MAX_LINE_CHARS * 4)]
+        text = raw.decode("utf-8", errors="replace").rstrip("\r")
+        if len(text) > MAX_LINE_CHARS or end - pos > len(raw):
+            text = text[:MAX_LINE_CHARS] + f" ... [line cut at {MAX_LINE_CHARS} chars]"
+        rendered = f"{line:>{width}}\t{text}"
+        if out and used + len(rendered) + 1 > max_bytes:
+            break
+        out.append(rendered)
+        used += len(rendered) + 1
+        pos = end + 1
+        line += 1
+
+    last = line - 1
+    more = f"; next offset {line}" if last < index.lines else "; end of file"
+    return f"[{path}: lines {first}-{last} of {index.lines}{more}]", "\n".join(out)
 
 
 async def write(path: str, content: str) -> str:
@@ -21,37 +166,108 @@ async def write(path: str, content: str) -> str:
     changes inside an existing file, prefer `edit` so the rest of the file
     is preserved verbatim.
     """
-    p = Path(path)
-    p.parent.mkdir(parents=True, exist_ok=True)
-    p.write_text(content, encoding="utf-8")
+    commit({path: content.encode("utf-8")})
     return f"wrote {len(content)} chars to {path}"
 
 
 async def edit(path: str, old: str, new: str) -> str:
     """
-    Replace the first exact occurrence of `old` with `new` in the file at
-    `path`. Both `old` and `new` are matched literally (no regex).
+    Replace the occurrence of `old` with `new` in the file at `path`.
+    `old` is matched literally (no regex); if that fails, it is matched
+    ignoring whitespace differences, then ignoring indentation (and `new`
+    is re-indented to fit). The result says which of these matched.
+
+    Fails if `old` matches nowhere (the error quotes the closest regions
+    of the file), or more than once — in that case, include more
+    surrounding context in `old` so the match is unique.
+    """
+    text = read_text(path)
+    match = match_edit(text, old, new, path)
+    commit({path: (text[:match.start] + match.new + text[match.end:]).encode("utf-8")})
+    return f"edited {path} ({match.describe()})"
+
+
+def read_text(path: str) -> str:
+    """The current text of `path`, through the session file cache."""
+    data = file_cache.read_bytes(path)
+    return Path(path).read_text(encoding="utf-8") if data is None else data.decode("utf-8")
 
-    Fails if `old` does not appear in the file, or if it appears more than
-    once — in that case, include more surrounding context in `old` so the
-    match is unique.
+
+def _umask() -> int:
+    mask = os.umask(0)
+    os.umask(mask)
+    return mask
+
+
+def commit(changes: dict[str, bytes | None]) -> None:
+    """
+    Write every file in `changes` (None deletes it) all-or-nothing. New
+    bodies go to temp files beside their targets first; only once all are
+    on disk are they moved into place with `os.replace`. If a move fails,
+    the files already replaced are restored. Writing to a symlink writes
+    the file it points to; new files get the usual umask-based mode.
     """
-    p = Path(path)
-    text = p.read_text(encoding="utf-8")
-    count = text.count(old)
-    if count == 0:
-        raise ValueError(f"`old` not found in {path}")
-    if count > 1:
-        raise ValueError(
-            f"`old` appears {count} times in {path}; provide more context to disambiguate"
-        )
-    p.write_text(text.replace(old, new, 1), encoding="utf-8")
-    return f"edited {path}"
+    staged: list[tuple[str, str | None]] = []
+    try:
+        for path, data in changes.items():
+            if data is None:
+                staged.append((path, None))
+                continue
+            # Replacing the link itself would turn it into a regular file.
+            target = Path(os.path.realpath(path))
+            target.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=target.parent, prefix=f".{target.name}.", suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            # mkstemp creates files as 0600.
+            mode = stat.S_IMODE(os.stat(target).st_mode) if target.exists() else 0o666 & ~_umask()
+            os.chmod(tmp, mode)
+            staged.append((str(target), tmp))
+    except BaseException:
+        for _, tmp in staged:
+            if tmp is not None:
+                os.unlink(tmp)
+        raise
+
+    originals: list[tuple[str, bytes | None]] = []
+    try:
+        for path, tmp in staged:
+            before = _current_bytes(path)
+            if tmp is None:
+                os.remove(path)
+            else:
+                os.replace(tmp, path)
+            originals.append((path, before))
+    except BaseException:
+        for path, before in reversed(originals):
+            if before is None:
+                os.remove(path)
+            else:
+                Path(path).write_bytes(before)
+        for path, tmp in staged[len(originals):]:
+            if tmp is not None and os.path.exists(tmp):
+                os.unlink(tmp)
+        raise
+
+    for path, data in changes.items():
+        if data is not None:
+            file_cache.update(path, data)
+
+
+def _current_bytes(path: str) -> bytes | None:
+    if not os.path.exists(path):
+        return None
+    data = file_cache.read_bytes(path)
+    return Path(path).read_bytes() if data is None else data
 
 
-async def list_(path: str = ".") -> list[str]:
+async def list_(path: str = ".", recursive: bool = False) -> list[str]:
     """
-    List the entries in a directory. Returns a flat, sorted list of names
-    (not recursive). Use `bash("find ...")` for recursive listings.
+    List the entries in a directory as a flat, sorted list of names. With
+    `recursive=True`, list every file below it instead, as paths relative
+    to `path`, skipping anything `.gitignore`/`.ignore` excludes.
     """
-    return sorted(os.listdir(path))
+    if not recursive:
+        return sorted(os.listdir(path))
+    cut = len(Path(path).as_posix().rstrip("/")) + 1 if os.path.normpath(path) != "." else 0
+    return sorted(p[cut:] for p in inventory.walk(path))
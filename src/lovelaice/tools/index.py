@@ -0,0 +1,247 @@
+"""Optional on-disk trigram index that lets grep skip most files.
+
+For every file the walker yields, the index stores its (mtime, size)
+and a trigram signature: each distinct trigram of the lowercased bytes
+is hashed into a `SIGNATURE_BITS`-bit set. A regex's required literals
+(found by parsing it) give a mask; only files whose signature covers the
+mask can match, so grep runs the regex over just those. Signatures can
+give false positives but never false negatives.
+
+The index lives in one SQLite file under the user cache dir
+(`$XDG_CACHE_HOME/lovelaice`, else `~/.cache/lovelaice`), named after
+the workspace root. It is built and refreshed with `lovelaice --index`;
+a refresh only re-reads files whose (mtime, size) changed. grep uses it
+only when it exists, falls back to a full scan when the regex has no
+usable literals or more than `STALE_LIMIT` of the files have changed
+since the last refresh, and always scans the files that changed. Which
+files changed comes from the workspace inventory's metadata while it is
+watching for changes, and from a stat of each file otherwise.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import sqlite3
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from . import inventory
+from .scan import parse_regex
+from .walk import walk
+
+
+SIGNATURE_BITS = 4096
+# Files larger than this get an all-ones signature (always a candidate).
+INDEX_MAX_FILE = 1 << 20
+STALE_LIMIT = 0.25
+
+_FULL = (1 << SIGNATURE_BITS) - 1
+
+
+def cache_dir() -> Path:
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return Path(base) / "lovelaice"
+
+
+def index_path(root: str = ".") -> Path:
+    root = os.path.abspath(root)
+    digest = hashlib.sha1(root.encode("utf-8")).hexdigest()[:16]
+    return cache_dir() / f"index-{Path(root).name}-{digest}.sqlite"
+
+
+def _bit(trigram: tuple[int, int, int]) -> int:
+    a, b, c = trigram
+    return (((a << 16) | (b << 8) | c) * 2654435761 & 0xFFFFFFFF) % SIGNATURE_BITS
+
+
+def signature(data: bytes) -> int:
+    """The trigram signature of `data` (0 for binary, all ones if too large)."""
+    if len(data) > INDEX_MAX_FILE:
+        return _FULL
+    if b"\x00" in data[:1024]:
+        return 0
+    low = data.lower()
+    bits = bytearray(SIGNATURE_BITS // 8)
+    for tri in set(zip(low, low[1:], low[2:])):
+        n = _bit(tri)
+        bits[n >> 3] |= 1 << (n & 7)
+    return int.from_bytes(bits, "little")
+
+
+def required_literals(pattern: str) -> list[bytes]:
+    """
+    ASCII literal runs every match of `pattern` must contain, lowercased.
+    Conservative: anything inside alternations or optional parts is
+    ignored, and so is a case-insensitive non-ASCII pattern (Unicode case
+    folding maps e.g. 'k' to the Kelvin sign).
+    """
+    parsed = parse_regex(pattern)
+    if parsed is None:
+        return []
+    tree, c = parsed
+    folding = not pattern.isascii()
+
+    runs: list[bytes] = []
+
+    def flush(run: bytearray) -> None:
+        if len(run) >= 3:
+            runs.append(bytes(run).lower())
+        run.clear()
+
+    def visit(seq) -> None:
+        run = bytearray()
+        for op, av in seq:
+            if op is c.LITERAL and av < 128:
+                run.append(av)
+                continue
+            flush(run)
+            if op is c.SUBPATTERN:
+                _, add_flags, _, body = av
+                if not (folding and add_flags & re.IGNORECASE):
+                    visit(body)
+            elif op in (c.MAX_REPEAT, c.MIN_REPEAT, c.POSSESSIVE_REPEAT) and av[0] >= 1:
+                visit(av[2])
+            elif op is c.ATOMIC_GROUP:
+                visit(av)
+        flush(run)
+
+    try:
+        if folding and tree.state.flags & re.IGNORECASE:
+            return []
+        visit(tree)
+    except (AttributeError, TypeError, ValueError):
+        # The parse tree's shape changed; no literals is always safe.
+        return []
+    return runs
+
+
+def literal_mask(literals: list[bytes]) -> int:
+    mask = 0
+    for lit in literals:
+        for tri in zip(lit, lit[1:], lit[2:]):
+            mask |= 1 << _bit(tri)
+    return mask
+
+
+@dataclass
+class RefreshStats:
+    added: int = 0
+    updated: int = 0
+    removed: int = 0
+    unchanged: int = 0
+
+
+@dataclass
+class TrigramIndex:
+    """The index of one workspace, loaded into memory."""
+    root: str
+    # Workspace-relative path → (mtime_ns, size, signature).
+    files: dict[str, tuple[int, int, int]] = field(default_factory=dict)
+
+    @property
+    def path(self) -> Path:
+        return index_path(self.root)
+
+    @classmethod
+    def load(cls, root: str = ".") -> "TrigramIndex | None":
+        """The stored index of `root`, or None if it was never built."""
+        path = index_path(root)
+        if not path.is_file():
+            return None
+        index = cls(os.path.abspath(root))
+        with sqlite3.connect(path) as db:
+            for rel, mtime, size, sig in db.execute("SELECT path, mtime_ns, size, sig FROM files"):
+                index.files[rel] = (mtime, size, int.from_bytes(sig, "little"))
+        return index
+
+    def refresh(self) -> RefreshStats:
+        """Bring the index up to date with the workspace and save it."""
+        stats = RefreshStats()
+        seen: set[str] = set()
+        changed: list[tuple[str, int, int, bytes]] = []
+        root = self.root
+        for p in walk(root):
+            rel = Path(os.path.relpath(p, root)).as_posix()
+            seen.add(rel)
+            try:
+                st = os.stat(os.path.join(root, rel))
+                old = self.files.get(rel)
+                if old is not None and old[:2] == (st.st_mtime_ns, st.st_size):
+                    stats.unchanged += 1
+                    continue
+                with open(os.path.join(root, rel), "rb") as f:
+                    sig = signature(f.read(INDEX_MAX_FILE + 1))
+            except OSError:
+                continue
+            if old is None:
+                stats.added += 1
+            else:
+                stats.updated += 1
+            self.files[rel] = (st.st_mtime_ns, st.st_size, sig)
+            changed.append((rel, st.st_mtime_ns, st.st_size, sig.to_bytes(SIGNATURE_BITS // 8, "little")))
+        gone = [rel for rel in self.files if rel not in seen]
+        for rel in gone:
+            del self.files[rel]
+        stats.removed = len(gone)
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with sqlite3.connect(self.path) as db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS files "
+                "(path TEXT PRIMARY KEY, mtime_ns INTEGER, size INTEGER, sig BLOB)"
+            )
+            db.executemany("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)", changed)
+            db.executemany("DELETE FROM files WHERE path = ?", [(rel,) for rel in gone])
+        return stats
+
+    def narrow(self, pattern: str, paths: list[str]) -> list[str] | None:
+        """
+        The subset of `paths` (relative to cwd) that may match `pattern`,
+        or None when the index can't help and a full scan is needed.
+        """
+        literals = required_literals(pattern)
+        if not literals:
+            return None
+        mask = literal_mask(literals)
+        out: list[str] = []
+        stale = 0
+        # The inventory already knows most files' metadata; stat the rest.
+        known = inventory.stats(paths) or [None] * len(paths)
+        for p, meta in zip(paths, known):
+            rel = os.path.relpath(os.path.abspath(p), self.root)
+            entry = self.files.get(rel)
+            if meta is None:
+                try:
+                    st = os.stat(p)
+                except OSError:
+                    continue
+                meta = (st.st_mtime_ns, st.st_size)
+            if entry is None or entry[:2] != meta:
+                stale += 1
+                out.append(p)
+            elif entry[2] & mask == mask:
+                out.append(p)
+        if paths and stale / len(paths) > STALE_LIMIT:
+            return None
+        return out
+
+
+_loaded: tuple[str, float, TrigramIndex] | None = None
+
+
+def workspace_index() -> TrigramIndex | None:
+    """The index of the workspace (cwd), reloaded whenever it is refreshed."""
+    global _loaded
+    path = index_path(".")
+    try:
+        mtime = path.stat().st_mtime
+    except OSError:
+        return None
+    key = os.path.abspath(".")
+    if _loaded is None or _loaded[:2] != (key, mtime):
+        index = TrigramIndex.load(".")
+        if index is None:
+            return None
+        _loaded = (key, mtime, index)
+    return _loaded[2]
@@ -0,0 +1,417 @@
+"""In-memory inventory of the workspace, shared by glob, grep and list.
+
+`start()` (called by `Config.build()`) lists the workspace once in a
+background thread, applying the same ignore rules as `walk.walk()`, and
+keeps every non-ignored directory's sorted entries with their stat
+metadata. `walk()` then answers from memory, in the same order and
+format as `walk.walk()`, instead of touching the disk, and `stats()`
+hands the trigram index each file's (mtime, size) without a stat call.
+
+The inventory is brought up to date before each query. On Linux every
+directory gets an inotify watch and the pending events are drained
+(non-blocking) first; elsewhere, or when the watch limit is reached, the
+directories in scope are stat'ed and those whose mtime (or whose ignore
+files' mtime) moved are listed again. Either way a file created a
+moment ago shows up. Until the first listing finishes, for paths outside
+the inventoried root (or below an ignored directory), and for
+workspaces over `INVENTORY_MAX_FILES` files, `walk()` falls back to
+`walk.walk()`.
+"""
+from __future__ import annotations
+
+import bisect
+import ctypes
+import ctypes.util
+import os
+import struct
+import sys
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+
+from . import walk as disk
+from .walk import ALWAYS_SKIP, IGNORE_FILES, _Layer, _layer, is_ignored
+
+
+# Past this many files the inventory gives up and queries walk the disk.
+INVENTORY_MAX_FILES = 200_000
+
+_IN_MODIFY = 0x002
+_IN_ATTRIB = 0x004
+_IN_CLOSE_WRITE = 0x008
+_IN_MOVED_FROM = 0x040
+_IN_MOVED_TO = 0x080
+_IN_CREATE = 0x100
+_IN_DELETE = 0x200
+_IN_DELETE_SELF = 0x400
+_IN_MOVE_SELF = 0x800
+_IN_Q_OVERFLOW = 0x4000
+_IN_IGNORED = 0x8000
+_IN_ONLYDIR = 0x01000000
+_IN_NONBLOCK = os.O_NONBLOCK
+_IN_CLOEXEC = os.O_CLOEXEC
+_WATCH_MASK = (
+    _IN_MODIFY | _IN_ATTRIB | _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO
+    | _IN_CREATE | _IN_DELETE | _IN_DELETE_SELF | _IN_MOVE_SELF | _IN_ONLYDIR
+)
+_EVENT = struct.Struct("iIII")
+
+
+@dataclass(frozen=True)
+class Entry:
+    """One non-ignored directory entry."""
+    name: str
+    is_dir: bool
+    size: int
+    mtime_ns: int
+
+
+@dataclass
+class _Dir:
+    # Ignore layers in force inside this directory (its own included).
+    layers: list[_Layer]
+    entries: list[Entry]
+    mtime_ns: int
+    # (name, mtime_ns) of the ignore files it declares.
+    ignore_stamps: tuple[tuple[str, int], ...]
+
+
+class _Inotify:
+    """A minimal ctypes binding: one watch per directory, drained on demand."""
+
+    def __init__(self) -> None:
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._add = libc.inotify_add_watch
+        self._add.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._rm = libc.inotify_rm_watch
+        self._rm.argtypes = [ctypes.c_int, ctypes.c_int]
+        self.fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.dirs: dict[int, str] = {}
+        self._wds: dict[str, int] = {}
+
+    def watch(self, path: str, rel: str) -> None:
+        wd = self._add(self.fd, os.fsencode(path), _WATCH_MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {path}")
+        # A watch follows its directory, so a renamed or moved directory
+        # comes back with its old descriptor: point that at the new path.
+        old = self.dirs.get(wd)
+        if old is not None and old != rel:
+            self._wds.pop(old, None)
+        # A directory replaced under the same path leaves a stale watch.
+        stale = self._wds.get(rel)
+        if stale is not None and stale != wd:
+            self.dirs.pop(stale, None)
+            self._rm(self.fd, stale)
+        self.dirs[wd] = rel
+        self._wds[rel] = wd
+
+    def unwatch(self, rel: str) -> None:
+        """Stop watching `rel` (gone, moved away, or now ignored)."""
+        wd = self._wds.pop(rel, None)
+        if wd is not None:
+            self.dirs.pop(wd, None)
+            # Fails harmlessly if the kernel already dropped it.
+            self._rm(self.fd, wd)
+
+    def drain(self) -> list[tuple[str | None, int, str]]:
+        """Pending (directory, mask, name) events; directory None on overflow."""
+        events = []
+        while True:
+            try:
+                data = os.read(self.fd, 1 << 16)
+            except BlockingIOError:
+                return events
+            pos = 0
+            while pos < len(data):
+                wd, mask, _, length = _EVENT.unpack_from(data, pos)
+                name = data[pos + _EVENT.size:pos + _EVENT.size + length].rstrip(b"\0")
+                pos += _EVENT.size + length
+                if mask & _IN_IGNORED:
+                    # The kernel removed the watch (its directory was deleted).
+                    rel = self.dirs.pop(wd, None)
+                    if rel is not None and self._wds.get(rel) == wd:
+                        del self._wds[rel]
+                    continue
+                rel = None if mask & _IN_Q_OVERFLOW else self.dirs.get(wd)
+                if rel is not None or mask & _IN_Q_OVERFLOW:
+                    events.append((rel, mask, os.fsdecode(name)))
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+def _stamp(path: str) -> int:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return -1
+
+
+class Inventory:
+    """The non-ignored files and directories below `root`, kept in memory."""
+
+    def __init__(self, root: str) -> None:
+        self.root = os.path.abspath(root)
+        self._dirs: dict[str, _Dir] = {}
+        self._files = 0
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._inotify: _Inotify | None = None
+        self.overflowed = False
+
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set() and not self.overflowed
+
+    @property
+    def watching(self) -> bool:
+        """Whether changes arrive through inotify (else by mtime polling)."""
+        return self._inotify is not None
+
+    def build(self, *, use_inotify: bool = True) -> None:
+        """List the whole workspace (blocking). Safe to call from a thread."""
+        if use_inotify and sys.platform.startswith("linux"):
+            try:
+                self._inotify = _Inotify()
+            except (OSError, AttributeError):
+                self._inotify = None
+        with self._lock:
+            self._scan("", [], deep=True)
+        self._ready.set()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._inotify is not None:
+                self._inotify.close()
+                self._inotify = None
+
+    def _abs(self, rel: str) -> str:
+        return os.path.join(self.root, rel) if rel else self.root
+
+    # -- listing ---------------------------------------------------------
+
+    def _scan(self, rel: str, parent_layers: list[_Layer], *, deep: bool) -> None:
+        """
+        (Re)list directory `rel`. Child directories already known are kept
+        unless `deep`; new ones are listed in full, vanished ones dropped.
+        """
+        path = self._abs(rel)
+        if self._inotify is not None:
+            try:
+                # Watch first, so nothing changing mid-listing is missed.
+                self._inotify.watch(path, rel)
+            except OSError:
+                self._inotify.close()
+                self._inotify = None
+        mtime = _stamp(path)
+        try:
+            with os.scandir(path) as it:
+                raw = sorted(it, key=lambda e: e.name)
+        except OSError:
+            self._drop(rel)
+            return
+        names = {e.name for e in raw}
+        stamps = tuple(
+            (name, _stamp(os.path.join(path, name)))
+            for name in (*IGNORE_FILES, *((".git/info/exclude",) if not rel else ()))
+            if name.split("/")[0] in names
+        )
+        old = self._dirs.get(rel)
+        if old is not None and not deep and stamps == old.ignore_stamps:
+            layers = old.layers
+        else:
+            # New ignore rules here change what every directory below sees.
+            deep = deep or old is not None
+            layer = _layer(path, rel, root=not rel, names=names)
+            layers = [*parent_layers, layer] if layer is not None else parent_layers
+
+        entries: list[Entry] = []
+        for e in raw:
+            if e.name in ALWAYS_SKIP:
+                continue
+            entry_rel = f"{rel}/{e.name}" if rel else e.name
+            try:
+                is_dir = e.is_dir(follow_symlinks=False)
+                st = e.stat(follow_symlinks=False)
+            except OSError:
+                continue
+            if is_ignored(entry_rel, is_dir, layers):
+                continue
+            entries.append(Entry(e.name, is_dir, 0 if is_dir else st.st_size, st.st_mtime_ns))
+
+        if old is not None:
+            self._files -= sum(1 for e in old.entries if not e.is_dir)
+            kept = {e.name for e in entries if e.is_dir}
+            for e in old.entries:
+                if e.is_dir and e.name not in kept:
+                    self._drop(f"{rel}/{e.name}" if rel else e.name)
+        self._files += sum(1 for e in entries if not e.is_dir)
+        self._dirs[rel] = _Dir(layers, entries, mtime, stamps)
+        if self._files > INVENTORY_MAX_FILES:
+            self.overflowed = True
+            return
+
+        for e in entries:
+            if e.is_dir:
+                child = f"{rel}/{e.name}" if rel else e.name
+                if deep or child not in self._dirs:
+                    self._scan(child, layers, deep=deep)
+                if self.overflowed:
+                    return
+
+    def _drop(self, rel: str) -> None:
+        d = self._dirs.pop(rel, None)
+        if d is None:
+            return
+        if self._inotify is not None:
+            self._inotify.unwatch(rel)
+        self._files -= sum(1 for e in d.entries if not e.is_dir)
+        for e in d.entries:
+            if e.is_dir:
+                self._drop(f"{rel}/{e.name}" if rel else e.name)
+
+    def _parent_layers(self, rel: str) -> list[_Layer]:
+        parent = self._dirs.get(rel.rpartition("/")[0]) if rel else None
+        return parent.layers if parent is not None else []
+
+    # -- freshness -------------------------------------------------------
+
+    def _sync(self, top: str) -> None:
+        """Bring the directories under `top` up to date."""
+        dirty: dict[str, bool] = {}
+        if self._inotify is not None:
+            for rel, mask, name in self._inotify.drain():
+                if rel is None:
+                    dirty[""] = True
+                elif rel in self._dirs:
+                    deep = name in IGNORE_FILES or bool(mask & (_IN_DELETE_SELF | _IN_MOVE_SELF))
+                    dirty[rel] = dirty.get(rel, False) or deep
+            # `.git/info/exclude` lives in an unwatched directory.
+            root = self._dirs.get("")
+            if root is not None and any(
+                _stamp(os.path.join(self.root, n)) != m for n, m in root.ignore_stamps
+            ):
+                dirty[""] = True
+        else:
+            for rel, d in list(self._dirs.items()):
+                if top and rel != top and not rel.startswith(top + "/"):
+                    continue
+                path = self._abs(rel)
+                if _stamp(path) != d.mtime_ns:
+                    dirty[rel] = dirty.get(rel, False)
+                if any(_stamp(os.path.join(path, n)) != m for n, m in d.ignore_stamps):
+                    dirty[rel] = True
+        # Shallowest first: rescanning a parent may already cover a child.
+        for rel in sorted(dirty, key=lambda r: (r.count("/") if r else -1, r)):
+            if rel in self._dirs:
+                self._scan(rel, self._parent_layers(rel), deep=dirty[rel])
+
+    # -- queries ---------------------------------------------------------
+
+    def covers(self, top: str) -> str | None:
+        """`top`'s workspace-relative path if the inventory can answer for it."""
+        if not self.ready or os.getcwd() != self.root:
+            return None
+        top_abs = os.path.abspath(top)
+        if top_abs == self.root:
+            return ""
+        if not top_abs.startswith(self.root + os.sep):
+            return None
+        return Path(os.path.relpath(top_abs, self.root)).as_posix()
+
+    def walk(self, top: str = ".", *, dirs: bool = False, max_depth: int | None = None) -> list[str] | None:
+        """`walk.walk()`'s result for `top` from memory, or None if not covered."""
+        rel = self.covers(top)
+        if rel is None:
+            return None
+        with self._lock:
+            self._sync(rel)
+            if self.overflowed or rel not in self._dirs:
+                return None
+            prefix = "" if os.path.normpath(top) == "." else Path(top).as_posix().rstrip("/") + "/"
+            out: list[str] = []
+            stack = [(rel, "", 1)]
+            while stack:
+                dir_rel, shown, depth = stack.pop()
+                d = self._dirs.get(dir_rel)
+                if d is None:
+                    continue
+                subdirs = []
+                for e in d.entries:
+                    entry_shown = f"{shown}{e.name}"
+                    if e.is_dir:
+                        if dirs:
+                            out.append(prefix + entry_shown)
+                        if max_depth is None or depth < max_depth:
+                            child = f"{dir_rel}/{e.name}" if dir_rel else e.name
+                            subdirs.append((child, entry_shown + "/", depth + 1))
+                    else:
+                        out.append(prefix + entry_shown)
+                stack.extend(reversed(subdirs))
+            return out
+
+
+    def stats(self, paths: list[str]) -> list[tuple[int, int] | None] | None:
+        """
+        Each of `paths`' (mtime_ns, size) as of now, or None for a path
+        that isn't an inventoried file; None altogether when the metadata
+        can't be trusted. Only inotify keeps it current: writing to a file
+        doesn't move its directory's mtime, which is all polling sees.
+        """
+        if not self.watching or self.covers(".") is None:
+            return None
+        with self._lock:
+            self._sync("")
+            if self.overflowed:
+                return None
+            out: list[tuple[int, int] | None] = []
+            for p in paths:
+                rel = Path(os.path.relpath(p, self.root) if os.path.isabs(p) else os.path.normpath(p)).as_posix()
+                parent, _, name = rel.rpartition("/")
+                d = self._dirs.get(parent)
+                entries = d.entries if d is not None else []
+                i = bisect.bisect_left(entries, name, key=lambda e: e.name)
+                if i < len(entries) and entries[i].name == name and not entries[i].is_dir:
+                    out.append((entries[i].mtime_ns, entries[i].size))
+                else:
+                    out.append(None)
+            return out
+
+
+_inventory: Inventory | None = None
+
+
+def start(root: str = ".") -> Inventory:
+    """Begin inventorying `root` in a background thread (replacing any previous one)."""
+    global _inventory
+    stop()
+    _inventory = Inventory(root)
+    threading.Thread(target=_inventory.build, name="lovelaice-inventory", daemon=True).start()
+    return _inventory
+
+
+def stop() -> None:
+    global _inventory
+    if _inventory is not None:
+        _inventory.close()
+        _inventory = None
+
+
+def stats(paths: list[str]) -> list[tuple[int, int] | None] | None:
+    """`Inventory.stats(paths)` of the running inventory, or None if there is none."""
+    return _inventory.stats(paths) if _inventory is not None else None
+
+
+def walk(top: str = ".", *, dirs: bool = False, max_depth: int | None = None) -> list[str]:
+    """
+    The same paths as `walk.walk(top, dirs=..., max_depth=...)`, answered
+    from the inventory when it covers `top`, else by walking the disk.
+    """
+    if _inventory is not None:
+        found = _inventory.walk(top, dirs=dirs, max_depth=max_depth)
+        if found is not None:
+            return found
+    return list(disk.walk(top, dirs=dirs, max_depth=max_depth))
@@ -0,0 +1,197 @@
+"""Background bash jobs: start a long-running command, keep working, poll it.
+
+`bash_start` launches a command in its own process group and returns a
+job id straight away; a reader task drains its combined stdout+stderr
+into a bounded buffer. `bash_poll(job_id, since)` returns the output
+produced after byte offset `since` plus the job's status, and
+`bash_kill` stops it. Every job still running when the process exits is
+killed.
+
+Each job keeps only the most recent `JOB_OUTPUT_CAP` bytes (1 MB by
+default, `Config(job_output_cap=...)`); a poll that asks for output that
+has already rolled off is told how many bytes it missed. A poll returns
+at most about an observation's worth of output; the header's `next
+since` picks up where it stopped.
+
+A finished job is forgotten once a poll has returned the last of its
+output. At most `MAX_FINISHED_JOBS` finished jobs that were never read
+to the end are kept; starting a new job drops the oldest beyond that.
+"""
+from __future__ import annotations
+
+import asyncio
+import atexit
+import itertools
+import os
+import signal
+import time
+from dataclasses import dataclass, field
+
+from . import output
+
+
+JOB_OUTPUT_CAP: int = 1_000_000
+MAX_FINISHED_JOBS: int = 16
+
+
+@dataclass
+class _Job:
+    """One background command and the tail of its output."""
+    id: str
+    command: str
+    proc: asyncio.subprocess.Process
+    started: float = field(default_factory=time.monotonic)
+    buffer: bytearray = field(default_factory=bytearray)
+    # Absolute stream offset of buffer[0]; grows as old output is dropped.
+    offset: int = 0
+    reader: asyncio.Task | None = None
+
+    @property
+    def end(self) -> int:
+        return self.offset + len(self.buffer)
+
+    @property
+    def finished(self) -> bool:
+        """Exited, with all of its output read from the pipe."""
+        return self.reader is not None and self.reader.done()
+
+    def feed(self, chunk: bytes) -> None:
+        self.buffer += chunk
+        overflow = len(self.buffer) - JOB_OUTPUT_CAP
+        if overflow > 0:
+            del self.buffer[:overflow]
+            self.offset += overflow
+
+    def status(self) -> str:
+        code = self.proc.returncode
+        if code is None:
+            return f"running for {time.monotonic() - self.started:.0f}s"
+        if code < 0:
+            return f"killed by signal {-code}"
+        return f"exited with status {code}"
+
+
+_jobs: dict[str, _Job] = {}
+_counter = itertools.count(1)
+_cleanup_registered = False
+
+
+def _job(job_id: str) -> _Job:
+    try:
+        return _jobs[job_id]
+    except KeyError:
+        raise ValueError(f"unknown job {job_id!r}") from None
+
+
+async def _drain(job: _Job) -> None:
+    assert job.proc.stdout is not None
+    while chunk := await job.proc.stdout.read(65536):
+        job.feed(chunk)
+    await job.proc.wait()
+
+
+async def bash_start(command: str) -> str:
+    """
+    Start `command` in the background and return its job id at once. Use
+    this for dev servers, watchers and long test runs; check on it with
+    bash_poll(job_id, since) and stop it with bash_kill(job_id).
+    """
+    global _cleanup_registered
+    if not _cleanup_registered:
+        atexit.register(_kill_all)
+        _cleanup_registered = True
+
+    _reap()
+    proc = await asyncio.create_subprocess_shell(
+        command,
+        stdin=asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.STDOUT,
+        start_new_session=True,
+    )
+    job = _Job(id=f"job-{next(_counter)}", command=command, proc=proc)
+    job.reader = asyncio.create_task(_drain(job))
+    _jobs[job.id] = job
+    return f"started {job.id} (pid {proc.pid}): {command}"
+
+
+async def bash_poll(job_id: str, since: int = 0) -> str:
+    """
+    Return the status of background job `job_id` and the output it
+    produced from byte offset `since` on. The header gives the offset to
+    pass as `since` next time, so repeated polls only show new output.
+    Once a finished job's output has all been returned, the job is
+    forgotten.
+    """
+    job = _job(job_id)
+    # Let the reader catch up with anything already in the pipe.
+    await asyncio.sleep(0)
+    since = max(0, since)
+    missed = max(0, job.offset - since)
+    start = max(since, job.offset) - job.offset
+    # Same page size as read_output, so a poll is never spilled; decoding
+    # can only shrink bytes into fewer characters.
+    stop = min(len(job.buffer), start + max(1, output.OBSERVATION_LIMIT - output.PAGE_HEADER_CHARS))
+    if stop < len(job.buffer):
+        # Don't split a UTF-8 sequence across two pages.
+        while stop > start + 1 and job.buffer[stop] & 0xC0 == 0x80:
+            stop -= 1
+    text = bytes(job.buffer[start:stop]).decode("utf-8", errors="replace")
+    header = f"[{job.id}: {job.status()}; next since {job.offset + stop}"
+    if missed:
+        header += f"; {missed} earlier bytes no longer buffered"
+    if stop < len(job.buffer):
+        header += f"; {len(job.buffer) - stop} more bytes buffered"
+    elif job.finished:
+        del _jobs[job.id]
+        header += "; all output read, job forgotten"
+    return f"{header}]\n{text}"
+
+
+async def bash_kill(job_id: str) -> str:
+    """Stop background job `job_id` (and its children) and forget it."""
+    job = _job(job_id)
+    if job.proc.returncode is None:
+        _signal(job, signal.SIGTERM)
+        try:
+            await asyncio.wait_for(job.proc.wait(), timeout=1.0)
+        except asyncio.TimeoutError:
+            _signal(job, signal.SIGKILL)
+            await job.proc.wait()
+    if job.reader is not None:
+        # A child that left the process group can hold the pipe open.
+        try:
+            await asyncio.wait_for(asyncio.shield(job.reader), timeout=1.0)
+        except asyncio.TimeoutError:
+            job.reader.cancel()
+            await asyncio.gather(job.reader, return_exceptions=True)
+            # Let go of our end of the pipe; `Process` has no public close.
+            transport = getattr(job.proc, "_transport", None)
+            if transport is not None:
+                transport.close()
+        except Exception:
+            pass
+    _jobs.pop(job.id, None)
+    return f"{job.id} {job.status()}"
+
+
+def _reap() -> None:
+    """Drop the oldest finished jobs beyond `MAX_FINISHED_JOBS`."""
+    finished = [job for job in _jobs.values() if job.finished]
+    for job in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+        del _jobs[job.id]
+
+
+def _signal(job: _Job, sig: int) -> None:
+    try:
+        os.killpg(job.proc.pid, sig)
+    except ProcessLookupError:
+        pass
+
+
+def _kill_all() -> None:
+    """Interpreter shutdown: the loop is gone, so signal each group directly."""
+    for job in list(_jobs.values()):
+        if job.proc.returncode is None:
+            _signal(job, signal.SIGKILL)
+    _jobs.clear()
@@ -0,0 +1,199 @@
+"""Tiered matching of an edit's `old` text against a file.
+
+Models often get whitespace slightly wrong when quoting code back. Rather
+than fail the whole edit (and spend another decide/equip/invoke cycle on
+the retry), `match_edit` tries three tiers in order and stops at the
+first that finds anything:
+
+1. **exact** — `old` verbatim.
+2. **whitespace** — line by line, ignoring trailing whitespace and
+   differences in the width of runs of spaces/tabs inside a line.
+3. **indentation** — line by line after removing each side's common
+   indentation; `new` is re-indented by the difference.
+
+A tier that finds more than one match is an error, never a guess (unless
+the caller passes `near_line`, as diff hunks do). When no tier matches,
+the error quotes the regions of the file that look most like `old`.
+"""
+from __future__ import annotations
+
+import difflib
+import re
+from dataclasses import dataclass
+from typing import Callable
+
+
+# How many near-miss regions a "not found" error quotes, and how long each is.
+CANDIDATES = 3
+CANDIDATE_LINES = 12
+
+
+@dataclass
+class EditMatch:
+    """Where `old` matched, what replaces it, and which tier found it."""
+    start: int
+    end: int
+    new: str
+    tier: str
+
+    def describe(self) -> str:
+        return {
+            "exact": "matched exactly",
+            "whitespace": "matched ignoring whitespace differences",
+            "indentation": "matched by relative indentation; `new` was re-indented to fit",
+        }[self.tier]
+
+
+def _indent(line: str) -> str:
+    return line[:len(line) - len(line.lstrip())]
+
+
+def _key(line: str) -> str:
+    """A line's content with indentation dropped and whitespace runs collapsed."""
+    return re.sub(r"[ \t]+", " ", line.strip())
+
+
+def _squash(line: str) -> str:
+    return _indent(line) + _key(line)
+
+
+def _common_indent(lines: list[str]) -> str:
+    indents = [_indent(l) for l in lines if l.strip()]
+    if not indents:
+        return ""
+    common = indents[0]
+    for ind in indents[1:]:
+        while not ind.startswith(common):
+            common = common[:-1]
+    return common
+
+
+def _dedent(lines: list[str]) -> list[str]:
+    cut = len(_common_indent(lines))
+    return [_squash(l[cut:]) if l.strip() else "" for l in lines]
+
+
+def _reindent(new: str, old_indent: str, found_indent: str) -> str:
+    out = []
+    for line in new.splitlines(keepends=True):
+        if line.strip():
+            if line.startswith(old_indent):
+                line = found_indent + line[len(old_indent):]
+            else:
+                line = found_indent + line.lstrip(" \t")
+        out.append(line)
+    return "".join(out)
+
+
+def _line_matches(
+    text_lines: list[str], old_lines: list[str], normalize: Callable[[list[str]], list[str]],
+) -> list[int]:
+    """Start indices of windows of `text_lines` equal to `old_lines` under `normalize`."""
+    n = len(old_lines)
+    target = normalize(old_lines)
+    # Every tier agrees on a line's `_key`, so comparing the first
+    # non-blank line's key rules out almost every window cheaply.
+    first = next((i for i, l in enumerate(old_lines) if l.strip()), 0)
+    anchor = _key(old_lines[first])
+    hits = []
+    for i in range(len(text_lines) - n + 1):
+        if _key(text_lines[i + first]) != anchor:
+            continue
+        if normalize(text_lines[i:i + n]) == target:
+            hits.append(i)
+    return hits
+
+
+def _pick(hit_lines: list[int], near_line: int | None, tier: str, path: str) -> int:
+    """Index of the hit to use: the only one, or the one nearest `near_line`."""
+    if len(hit_lines) == 1:
+        return 0
+    if near_line is None:
+        if tier == "exact":
+            raise ValueError(
+                f"`old` appears {len(hit_lines)} times in {path}; provide more context to disambiguate"
+            )
+        raise ValueError(
+            f"`old` matches {len(hit_lines)} places in {path} ({tier} match, at lines "
+            f"{', '.join(str(l + 1) for l in hit_lines[:10])}); provide more context to disambiguate"
+        )
+    return min(range(len(hit_lines)), key=lambda k: abs(hit_lines[k] + 1 - near_line))
+
+
+def match_edit(
+    text: str, old: str, new: str, path: str, *, near_line: int | None = None,
+) -> EditMatch:
+    """
+    Locate the single occurrence of `old` in `text`, trying the exact,
+    whitespace and indentation tiers in turn. `near_line` (1-based)
+    breaks ties between several matches instead of failing. Raises
+    ValueError if nothing matches or a tier's match is ambiguous.
+    """
+    starts = [m.start() for m in re.finditer(re.escape(old), text)] if old else []
+    if starts:
+        k = _pick([text.count("\n", 0, s) for s in starts], near_line, "exact", path)
+        return EditMatch(starts[k], starts[k] + len(old), new, "exact")
+
+    text_lines = text.splitlines(keepends=True)
+    old_lines = old.strip("\n").splitlines()
+    if not old_lines or not text_lines:
+        raise ValueError(f"`old` not found in {path}")
+    bare = [l.rstrip("\r\n") for l in text_lines]
+    offsets = [0]
+    for l in text_lines:
+        offsets.append(offsets[-1] + len(l))
+
+    tiers: list[tuple[str, Callable[[list[str]], list[str]]]] = [
+        ("whitespace", lambda ls: [_squash(l.rstrip()) for l in ls]),
+        ("indentation", _dedent),
+    ]
+    for tier, normalize in tiers:
+        hits = _line_matches(bare, old_lines, normalize)
+        if not hits:
+            continue
+        i = hits[_pick(hits, near_line, tier, path)]
+        j = i + len(old_lines)
+        start = offsets[i]
+        # Keep the matched region's final newline unless `old` had one.
+        end = offsets[j] if old.endswith("\n") else offsets[j - 1] + len(bare[j - 1])
+        replacement = new
+        if tier == "indentation":
+            replacement = _reindent(new, _common_indent(old_lines), _common_indent(bare[i:j]))
+        return EditMatch(start, end, replacement, tier)
+
+    raise ValueError(f"`old` not found in {path}" + _nearest(bare, old_lines))
+
+
+def _nearest(lines: list[str], old_lines: list[str]) -> str:
+    """Quote the regions of the file most similar to `old`, with line numbers."""
+    n = len(old_lines)
+    target = "\n".join(l.strip() for l in old_lines)
+    scored: list[tuple[float, int]] = []
+    matcher = difflib.SequenceMatcher(autojunk=False)
+    matcher.set_seq2(target)
+    anchor = next((l.strip() for l in old_lines if l.strip()), "")
+    for i in range(max(1, len(lines) - n + 1)):
+        # Only windows whose first line resembles `old`'s first line are scored in full.
+        head = difflib.SequenceMatcher(None, lines[i].strip(), anchor)
+        if head.real_quick_ratio() < 0.5 or head.quick_ratio() < 0.5:
+            continue
+        matcher.set_seq1("\n".join(l.strip() for l in lines[i:i + n]))
+        scored.append((matcher.ratio(), i))
+    scored.sort(reverse=True)
+
+    picked: list[int] = []
+    for score, i in scored:
+        if score < 0.5 or len(picked) == CANDIDATES:
+            break
+        if all(abs(i - p) >= n for p in picked):
+            picked.append(i)
+    if not picked:
+        return ""
+
+    width = len(str(len(lines)))
+    parts = []
+    for i in picked:
+        window = lines[i:i + min(n, CANDIDATE_LINES)]
+        body = "\n".join(f"{k:>{width}}\t{l}" for k, l in enumerate(window, start=i + 1))
+        parts.append(body)
+    return "; closest regions:\n" + "\n---\n".join(parts)
@@ -0,0 +1,126 @@
+"""Tool output plumbing: the spill store with its `read_output` tool, and
+the live-output sink long-running tools stream partial output through.
+
+When a tool result is longer than `OBSERVATION_LIMIT` characters, the
+ReAct loop writes the full text to a per-session scratch directory and
+puts only a head/tail excerpt and a handle into the context. The agent
+pages through the rest with `read_output(handle, offset, length)`.
+
+`Config(observation_limit=...)` mutates `OBSERVATION_LIMIT` at
+build-time; the default is 16,000 characters. The scratch directory is
+removed when the process exits.
+
+While a tool runs, it can call `emit_live(tool, text)` with partial
+output. A tool whose calls may run concurrently passes a per-call key
+like `bash#3` instead of its bare name; hosts group live output by the
+full key and take the tool name from the part before `#`. The host
+installs a sink around the agent turn (`live_output`); without one,
+live output is dropped.
+"""
+from __future__ import annotations
+
+import atexit
+import contextlib
+import itertools
+import shutil
+import tempfile
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Callable
+
+
+OBSERVATION_LIMIT: int = 16_000
+
+# How much of a spilled observation stays inline, at most; with a smaller
+# limit, the limit is split between head and tail in the same ratio.
+HEAD_CHARS = 4_000
+TAIL_CHARS = 2_000
+# Room left in a `read_output` page for its `[out-N: chars ...]` header.
+PAGE_HEADER_CHARS = 100
+
+_scratch: Path | None = None
+_counter = itertools.count(1)
+
+_live_sink: ContextVar[Callable[[str, str], Any] | None] = ContextVar(
+    "lovelaice_live_sink", default=None,
+)
+
+
+@contextlib.contextmanager
+def live_output(sink: Callable[[str, str], Any] | None):
+    """Route `emit_live(tool, text)` calls made inside the block to `sink`."""
+    token = _live_sink.set(sink)
+    try:
+        yield
+    finally:
+        _live_sink.reset(token)
+
+
+def emit_live(tool: str, text: str) -> None:
+    """Forward a chunk of partial output from a running tool to the host."""
+    sink = _live_sink.get()
+    if sink is not None and text:
+        sink(tool, text)
+
+
+def _scratch_dir() -> Path:
+    """The session scratch directory, created on first spill."""
+    global _scratch
+    if _scratch is None:
+        _scratch = Path(tempfile.mkdtemp(prefix="lovelaice-"))
+        atexit.register(shutil.rmtree, _scratch, ignore_errors=True)
+    return _scratch
+
+
+def _handle_path(handle: str) -> Path:
+    if _scratch is None or not handle.startswith("out-") or not handle[4:].isdigit():
+        raise ValueError(f"unknown output handle {handle!r}")
+    path = _scratch / f"{handle}.txt"
+    if not path.is_file():
+        raise ValueError(f"unknown output handle {handle!r}")
+    return path
+
+
+def spill(text: str, *, limit: int | None = None) -> str:
+    """
+    Return `text` unchanged if it fits in `limit` (default
+    `OBSERVATION_LIMIT`) characters. Otherwise store it in the scratch
+    area and return a head/tail excerpt that names the handle.
+    """
+    limit = OBSERVATION_LIMIT if limit is None else limit
+    if len(text) <= limit:
+        return text
+
+    handle = f"out-{next(_counter)}"
+    (_scratch_dir() / f"{handle}.txt").write_text(text, encoding="utf-8")
+
+    head_chars = min(HEAD_CHARS, limit * HEAD_CHARS // (HEAD_CHARS + TAIL_CHARS))
+    tail_chars = min(TAIL_CHARS, limit - head_chars)
+    head = text[:head_chars]
+    tail = text[len(text) - tail_chars:]
+    elided = len(text) - len(head) - len(tail)
+    return (
+        f"{head}\n"
+        f"... [{elided} chars elided; full output ({len(text)} chars) is stored as "
+        f"{handle!r} — page through it with read_output({handle!r}, offset, length)] ...\n"
+        f"{tail}"
+    )
+
+
+async def read_output(handle: str, offset: int = 0, length: int | None = None) -> str:
+    """
+    Read part of a tool output that was too large to show inline. Large
+    results are replaced by an excerpt naming a handle like 'out-3'; use
+    this with that handle to page through the full text. `offset` and
+    `length` are in characters; pages are at most about the observation
+    limit long, which is also the default `length`.
+    """
+    text = _handle_path(handle).read_text(encoding="utf-8")
+    # A longer page would itself be spilled under a new handle.
+    page = max(1, OBSERVATION_LIMIT - PAGE_HEADER_CHARS)
+    length = page if length is None else min(length, page)
+    offset = max(0, offset)
+    chunk = text[offset:offset + max(0, length)]
+    end = offset + len(chunk)
+    more = f"; next offset {end}" if end < len(text) else "; end of output"
+    return f"[{handle}: chars {offset}-{end} of {len(text)}{more}]\n{chunk}"
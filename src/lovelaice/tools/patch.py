@@ -0,0 +1,226 @@
+"""`apply_edits`: many edits, or a unified diff, across files in one call.
+
+Every edit is matched against the files as they stand in memory first;
+if any fails, nothing is written and the error lists every failure.
+Only then are the new bodies committed through `files.commit`
+(temp file + `os.replace`, rolled back if a move fails), so a refactor
+is never left half-applied.
+
+Unified diff hunks become edits of their own: context plus removed
+lines are the text to find, context plus added lines the replacement.
+Matching is tiered as for `edit` (see `matching.py`); when the text
+occurs more than once, the hunk header's line number picks the nearest
+occurrence.
+"""
+from __future__ import annotations
+
+import difflib
+import os
+import re
+from dataclasses import dataclass
+
+from pydantic import BaseModel
+
+from .files import commit, read_text
+from .matching import match_edit
+
+
+class Edit(BaseModel):
+    """Replace `old` with `new` in the file at `path`. An empty `old` creates the file."""
+    path: str
+    old: str
+    new: str
+
+
+@dataclass
+class _Hunk:
+    path: str
+    old: str
+    new: str
+    line: int | None = None
+    create: bool = False
+    delete: bool = False
+
+
+_HUNK_HEADER = re.compile(r"^@@ -(\d+)(?:,\d+)? \+\d+(?:,\d+)? @@")
+
+
+def _diff_path(raw: str) -> str | None:
+    path = raw.split("\t")[0].strip()
+    if path == "/dev/null":
+        return None
+    if path[:2] in ("a/", "b/") and not os.path.exists(path):
+        return path[2:]
+    return path
+
+
+def parse_patch(patch: str) -> list[_Hunk]:
+    """Split a unified diff into one `_Hunk` per @@ section (plus creations/deletions)."""
+    lines = patch.splitlines(keepends=True)
+    # Bare blank lines inside a hunk are read as blank context, so drop
+    # the ones trailing the patch; and give the last line its newline.
+    while lines and lines[-1] == "\n":
+        lines.pop()
+    if lines and not lines[-1].endswith("\n"):
+        lines[-1] += "\n"
+    hunks: list[_Hunk] = []
+    i = 0
+    while i < len(lines):
+        if not (lines[i].startswith("--- ") and i + 1 < len(lines) and lines[i + 1].startswith("+++ ")):
+            i += 1
+            continue
+        source = _diff_path(lines[i][4:])
+        target = _diff_path(lines[i + 1][4:])
+        i += 2
+        path = target or source
+        if path is None:
+            raise ValueError("diff section with /dev/null on both sides")
+
+        file_hunks: list[_Hunk] = []
+        while i < len(lines) and (header := _HUNK_HEADER.match(lines[i])):
+            old: list[str] = []
+            new: list[str] = []
+            last: list[list[str]] = []
+            i += 1
+            while i < len(lines) and lines[i][:1] in (" ", "-", "+", "\\", "\n"):
+                # The next file's header, not a removed "-- ..." line.
+                if lines[i].startswith("--- ") and lines[i + 1:i + 2] and lines[i + 1].startswith("+++ "):
+                    break
+                tag, body = lines[i][:1], lines[i][1:]
+                if tag == "\n":
+                    tag, body = " ", "\n"
+                if tag == "\\":
+                    # "\ No newline at end of file" applies to the line before.
+                    for side in last:
+                        side[-1] = side[-1].rstrip("\n")
+                else:
+                    last = [old, new] if tag == " " else [old] if tag == "-" else [new]
+                    for side in last:
+                        side.append(body)
+                i += 1
+            file_hunks.append(_Hunk(
+                path=path, old="".join(old), new="".join(new), line=int(header[1]),
+                create=source is None, delete=target is None,
+            ))
+        if not file_hunks:
+            raise ValueError(f"diff section for {path} has no hunks")
+        hunks.extend(file_hunks)
+    if not hunks:
+        raise ValueError("no unified diff sections found in `patch`")
+    return hunks
+
+
+class _Moves:
+    """
+    How the edits applied so far to one file moved its lines: each as
+    (original line, lines added, is an insertion). Diff line numbers
+    refer to the original file; this maps them onto the edited text.
+    """
+
+    def __init__(self) -> None:
+        self._moves: list[tuple[int, int, bool]] = []
+
+    def current(self, line: int) -> int:
+        """Where the gap before original line index `line` is now."""
+        return line + sum(d for o, d, ins in self._moves if o < line or (ins and o == line))
+
+    def record(self, at: int, delta: int, *, insertion: bool = False) -> None:
+        """Note an edit starting at current line index `at` that added `delta` lines."""
+        offset = 0
+        for o, d, ins in sorted(self._moves):
+            if o + offset < at or (ins and o + offset == at):
+                offset += d
+        self._moves.append((at - offset, delta, insertion))
+
+
+def _apply_hunk(text: str, hunk: _Hunk, moves: _Moves) -> str:
+    """Apply `hunk` to `text`, and record how it moved the lines in `moves`."""
+    if not hunk.old and hunk.line is None:
+        moves.record(0, hunk.new.count("\n"), insertion=True)
+        return hunk.new + text
+    if not hunk.old:
+        # A pure insertion (`git diff -U0`) goes after line `hunk.line`; 0 is the top.
+        lines = text.splitlines(keepends=True)
+        at = moves.current(hunk.line)
+        if at > len(lines):
+            raise ValueError(f"insertion after line {hunk.line}, but the file has {len(lines)} lines")
+        moves.record(at, hunk.new.count("\n"), insertion=True)
+        return "".join(lines[:at]) + hunk.new + "".join(lines[at:])
+    # Ambiguous context in a diff hunk resolves to the header's line.
+    near = None if hunk.line is None else moves.current(hunk.line - 1) + 1
+    match = match_edit(text, hunk.old, hunk.new, hunk.path, near_line=near)
+    removed = text[match.start:match.end]
+    moves.record(text.count("\n", 0, match.start), match.new.count("\n") - removed.count("\n"))
+    return text[:match.start] + match.new + text[match.end:]
+
+
+async def apply_edits(edits: list[Edit] | None = None, patch: str | None = None) -> str:
+    """
+    Apply several edits at once, across one or more files, atomically.
+
+    Pass `edits` as a list of {path, old, new} replacements (each `old`
+    must match exactly once in the file as left by the edits before it;
+    an empty `old` creates a new file), and/or `patch` as a unified diff
+    (`--- a/x` / `+++ b/x` / `@@` hunks) touching any number of files.
+    All edits are checked before anything is written: if one fails, no
+    file changes. Returns per-file line counts and a compact diff. Prefer
+    this over several `edit` calls for multi-site changes.
+    """
+    hunks = [
+        _Hunk(path=e.path, old=e.old, new=e.new, create=not e.old)
+        for e in (Edit.model_validate(e) for e in edits or [])
+    ]
+    if patch:
+        hunks.extend(parse_patch(patch))
+    if not hunks:
+        raise ValueError("nothing to apply: pass `edits`, `patch`, or both")
+
+    before: dict[str, str | None] = {}
+    after: dict[str, str | None] = {}
+    moves: dict[str, _Moves] = {}
+    errors: list[str] = []
+    for n, hunk in enumerate(hunks, start=1):
+        try:
+            if hunk.path not in after:
+                before[hunk.path] = read_text(hunk.path) if os.path.exists(hunk.path) else None
+                after[hunk.path] = before[hunk.path]
+            text = after[hunk.path]
+            if hunk.delete:
+                if text is None:
+                    raise ValueError(f"{hunk.path} does not exist")
+                after[hunk.path] = None
+                continue
+            if hunk.create and text:
+                raise ValueError(f"{hunk.path} already exists; give the text to replace in `old`")
+            if text is None:
+                if not hunk.create:
+                    raise ValueError(f"{hunk.path} does not exist")
+                text = ""
+            after[hunk.path] = _apply_hunk(text, hunk, moves.setdefault(hunk.path, _Moves()))
+        except (OSError, ValueError) as e:
+            errors.append(f"  edit {n} ({hunk.path}): {e}")
+
+    if errors:
+        raise ValueError(
+            f"no changes applied; {len(errors)} of {len(hunks)} edits failed:\n" + "\n".join(errors)
+        )
+
+    changed = {p: t for p, t in after.items() if t != before[p]}
+    commit({p: None if t is None else t.encode("utf-8") for p, t in changed.items()})
+    return _summary(before, changed, len(hunks))
+
+
+def _summary(before: dict[str, str | None], changed: dict[str, str | None], count: int) -> str:
+    stats: list[str] = []
+    diffs: list[str] = []
+    for path, text in changed.items():
+        old = (before[path] or "").splitlines(keepends=True)
+        new = (text or "").splitlines(keepends=True)
+        lines = list(difflib.unified_diff(old, new, fromfile=path, tofile=path, n=0))
+        added = sum(1 for l in lines[2:] if l.startswith("+"))
+        removed = sum(1 for l in lines[2:] if l.startswith("-"))
+        note = " (new)" if before[path] is None else " (deleted)" if text is None else ""
+        stats.append(f"  {path}  +{added} -{removed}{note}")
+        diffs.append("".join(l if l.endswith("\n") else l + "\n" for l in lines))
+    head = f"applied {count} edits to {len(changed)} files"
+    return "\n".join([head, *stats, "", *diffs]).rstrip("\n")
@@ -0,0 +1,375 @@
+"""The grep engine: whole-buffer regex search over many files, in parallel.
+
+Each file is read once — memory-mapped when it is at least
+`MMAP_THRESHOLD` bytes — and the regex runs over the whole buffer
+rather than line by line. Match offsets are mapped back to line numbers
+by counting newlines between consecutive hits, and the search resumes
+at the next line, so each line is reported once.
+
+Patterns that mean the same on bytes (ASCII literals and classes,
+repeats, groups, alternations and line anchors) are compiled as bytes
+and run directly on the raw buffer; the rest — `.`, `\\w`,
+case-insensitive ones — run on the decoded text. Either way the pattern is in
+MULTILINE mode, so `^`/`$` still anchor at line boundaries. A pattern
+with no regex syntax at all skips the regex engine and is found with
+`find`. Several patterns are searched in one pass as one alternation;
+each hit is then tagged with the patterns that match on its line.
+
+`search()` splits the file list into batches of `BATCH_FILES`. Small
+searches (or `GREP_WORKERS <= 1`) run in one worker thread; larger ones
+go to a process pool. Batches are collected in order and the search
+stops as soon as the ordered hits reach the cap, so results are
+deterministic and the cap cuts the work short.
+"""
+from __future__ import annotations
+
+import asyncio
+import mmap
+import multiprocessing
+import os
+import re
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Callable
+
+
+GREP_WORKERS: int = os.cpu_count() or 1
+
+MMAP_THRESHOLD = 1 << 20
+BATCH_FILES = 256
+# Below this many files, a process pool costs more than it saves.
+PARALLEL_MIN_FILES = 2 * BATCH_FILES
+# Files with a NUL byte in this many leading bytes are treated as binary.
+BINARY_SNIFF = 1024
+
+
+@dataclass(frozen=True)
+class Hit:
+    """One matching line, with `context` lines either side if asked for."""
+    path: str
+    line: int
+    text: str
+    # Offset of the match within `text`, in characters.
+    column: int = field(default=0, compare=False)
+    before: tuple[str, ...] = ()
+    after: tuple[str, ...] = ()
+    # In a several-pattern search, the 1-based numbers of those that match.
+    labels: tuple[int, ...] = ()
+
+
+class _Span:
+    __slots__ = ("_start", "_end")
+
+    def __init__(self, start: int, end: int) -> None:
+        self._start, self._end = start, end
+
+    def start(self) -> int:
+        return self._start
+
+    def end(self) -> int:
+        return self._end
+
+
+class Literal:
+    """
+    A pattern with no regex syntax, found with `find` (a memchr-driven
+    substring search) instead of the regex engine. Quacks like the parts
+    of `re.Pattern` the engine uses.
+    """
+
+    def __init__(self, pattern: str | bytes) -> None:
+        self.pattern = pattern
+
+    def search(self, buf, pos: int = 0, endpos: int | None = None) -> _Span | None:
+        i = buf.find(self.pattern, pos, len(buf) if endpos is None else endpos)
+        return None if i < 0 else _Span(i, i + len(self.pattern))
+
+    def match(self, buf, pos: int = 0) -> _Span | None:
+        end = pos + len(self.pattern)
+        return _Span(pos, end) if buf[pos:end] == self.pattern else None
+
+
+def parse_regex(pattern: str):
+    """
+    `pattern` parsed by the stdlib's private `re._parser`, with the
+    module of opcode constants to read it with; None if it doesn't parse
+    or that internal API isn't there (it was `sre_parse` before 3.11).
+    Callers treat None, or a parse tree they can't walk, as knowing
+    nothing about the pattern.
+    """
+    try:
+        from re import _constants as constants, _parser as parser
+        return parser.parse(pattern), constants
+    except (ImportError, AttributeError, re.error):
+        return None
+
+
+def literal_text(pattern: str) -> str | None:
+    """The text `pattern` matches if it is a plain (case-sensitive) literal, else None."""
+    parsed = parse_regex(pattern)
+    if parsed is None:
+        return None
+    tree, c = parsed
+    try:
+        if tree.state.flags & (re.IGNORECASE | re.LOCALE):
+            return None
+        if not all(op is c.LITERAL for op, _ in tree):
+            return None
+        return "".join(chr(av) for _, av in tree)
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+def bytes_safe(pattern: str) -> bool:
+    """
+    Whether `pattern` matches the same on raw UTF-8 bytes as on text: it
+    is ASCII and built only from ASCII literals and classes of them,
+    repeats, groups, alternations and line anchors. `.`, negated classes,
+    `\\w`-style categories, `\\b` and case-insensitivity all mean
+    something else per byte.
+    """
+    if not pattern.isascii():
+        return False
+    parsed = parse_regex(pattern)
+    if parsed is None:
+        return False
+    tree, c = parsed
+    anchors = {c.AT_BEGINNING, c.AT_BEGINNING_STRING, c.AT_END, c.AT_END_STRING}
+
+    def safe(seq) -> bool:
+        for op, av in seq:
+            if op is c.LITERAL:
+                ok = av < 128
+            elif op is c.AT:
+                ok = av in anchors
+            elif op is c.IN:
+                # UTF-8 never uses ASCII bytes inside a multi-byte character.
+                ok = all(
+                    (kind is c.LITERAL and v < 128) or (kind is c.RANGE and v[1] < 128)
+                    for kind, v in av
+                )
+            elif op is c.SUBPATTERN:
+                ok = not av[1] & re.IGNORECASE and safe(av[3])
+            elif op in (c.MAX_REPEAT, c.MIN_REPEAT, c.POSSESSIVE_REPEAT):
+                ok = safe(av[2])
+            elif op is c.BRANCH:
+                ok = all(safe(branch) for branch in av[1])
+            elif op is c.ATOMIC_GROUP:
+                ok = safe(av)
+            elif op in (c.ASSERT, c.ASSERT_NOT):
+                ok = safe(av[1])
+            else:
+                ok = op is c.GROUPREF
+            if not ok:
+                return False
+        return True
+
+    try:
+        return not tree.state.flags & (re.IGNORECASE | re.LOCALE) and safe(tree)
+    except (AttributeError, TypeError, ValueError):
+        return False
+
+
+def compile_pattern(pattern: str, *, text: bool = False) -> re.Pattern | Literal:
+    """
+    Compile `pattern` for whole-buffer search: as bytes if it means the
+    same on bytes (`bytes_safe`) and `text` isn't asked for, else for the
+    decoded text; and as a `Literal` if it has no regex syntax.
+    """
+    literal = literal_text(pattern)
+    if literal is not None:
+        # Decide from what it matches: `caf\xe9` is ASCII source for "café".
+        return Literal(literal.encode("ascii") if not text and literal.isascii() else literal)
+    if not text and bytes_safe(pattern):
+        return re.compile(pattern.encode("ascii"), re.MULTILINE)
+    return re.compile(pattern, re.MULTILINE)
+
+
+def combine_patterns(patterns: list[str]) -> str:
+    """One regex matching wherever any of `patterns` does."""
+    for p in patterns:
+        compile_pattern(p)
+        if re.search(r"\\[1-9]|\(\?P=|\(\?\(", p):
+            raise ValueError(f"backreferences can't be used with several patterns: {p!r}")
+    combined = "|".join(f"(?:{p})" for p in patterns)
+    try:
+        re.compile(combined)
+    except re.error as e:
+        raise ValueError(
+            f"patterns can't be combined ({e}); use scoped flags like (?i:...) instead of (?i)"
+        ) from None
+    return combined
+
+
+def _count(buf, start: int, end: int, nl) -> int:
+    if isinstance(buf, mmap.mmap):
+        return buf[start:end].count(nl)
+    return buf.count(nl, start, end)
+
+
+def _decode(text) -> str:
+    return text if isinstance(text, str) else text.decode("utf-8", errors="replace")
+
+
+def _line_text(buf, start: int, end: int) -> str:
+    return _decode(buf[start:end]).rstrip("\r")
+
+
+def _context(buf, start: int, end: int, n: int, nl) -> tuple[tuple[str, ...], tuple[str, ...]]:
+    """Up to `n` whole lines before offset `start` and after the line ending at `end`."""
+    size = len(buf)
+    before: list[str] = []
+    pos = start
+    while len(before) < n and pos > 0:
+        prev = buf.rfind(nl, 0, pos - 1) + 1
+        before.append(_line_text(buf, prev, pos - 1))
+        pos = prev
+    after: list[str] = []
+    pos = end + 1
+    # The newline ending the buffer doesn't start another line.
+    while len(after) < n and pos < size:
+        nxt = buf.find(nl, pos)
+        nxt = size if nxt < 0 else nxt
+        after.append(_line_text(buf, pos, nxt))
+        pos = nxt + 1
+    return tuple(reversed(before)), tuple(after)
+
+
+def search_buffer(
+    buf, regex: re.Pattern | Literal, path: str, cap: int, context: int = 0,
+    labels: list[re.Pattern | Literal] | None = None,
+) -> list[Hit]:
+    """
+    The first `cap` matching lines of `buf` (bytes, str or mmap). With
+    `labels`, each hit records which of them match on its line.
+    """
+    nl = "\n" if isinstance(buf, str) else b"\n"
+    size = len(buf)
+    hits: list[Hit] = []
+    line, counted, pos = 1, 0, 0
+    while len(hits) < cap and pos <= size:
+        m = regex.search(buf, pos)
+        if m is None:
+            break
+        # An empty match after the final newline is not a line of its own.
+        if m.start() == size and size and buf[size - 1:size] == nl:
+            break
+        start = buf.rfind(nl, 0, m.start()) + 1
+        line += _count(buf, counted, start, nl)
+        counted = start
+        end = buf.find(nl, m.start())
+        end = size if end < 0 else end
+        column = len(_decode(buf[start:m.start()]))
+        before, after = _context(buf, start, end, context, nl) if context else ((), ())
+        tags = tuple(
+            n for n, r in enumerate(labels or (), start=1)
+            if r.search(buf, start, end) or r.match(buf, m.start())
+        )
+        hits.append(Hit(path, line, _line_text(buf, start, end), column, before, after, tags))
+        pos = end + 1
+    return hits
+
+
+def search_file(
+    path: str, regex: re.Pattern | Literal, cap: int, read: Callable[[str], bytes | None] | None = None,
+    context: int = 0, labels: list[re.Pattern | Literal] | None = None,
+) -> list[Hit]:
+    """
+    Search one file, reading it once. `read` may supply the bytes (e.g.
+    from the session file cache); when it returns None, the file is read
+    directly, or memory-mapped if it is large. Binary files yield nothing.
+    """
+    try:
+        data = read(path) if read is not None else None
+        if data is not None:
+            return _search_data(data, regex, path, cap, context, labels)
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < MMAP_THRESHOLD:
+                return _search_data(f.read(), regex, path, cap, context, labels)
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if b"\x00" in mm[:BINARY_SNIFF]:
+                    return []
+                buf = mm if isinstance(regex.pattern, bytes) else _decode(mm[:])
+                return search_buffer(buf, regex, path, cap, context, labels)
+    except (OSError, ValueError):
+        return []
+
+
+def _search_data(
+    data: bytes, regex: re.Pattern | Literal, path: str, cap: int, context: int = 0,
+    labels: list[re.Pattern | Literal] | None = None,
+) -> list[Hit]:
+    if b"\x00" in data[:BINARY_SNIFF]:
+        return []
+    buf = data if isinstance(regex.pattern, bytes) else _decode(data)
+    return search_buffer(buf, regex, path, cap, context, labels)
+
+
+def search_files(
+    pattern: str, paths: list[str], cap: int, read: Callable[[str], bytes | None] | None = None,
+    *, context: int = 0, per_file: int | None = None, labels: list[str] | None = None,
+) -> list[Hit]:
+    """
+    Search `paths` in order, stopping once `cap` hits are found; at most
+    `per_file` hits come from any one file. `labels` are the patterns
+    `pattern` combines, for tagging hits.
+    """
+    regex = compile_pattern(pattern)
+    text = not isinstance(regex.pattern, bytes)
+    tags = [compile_pattern(p, text=text) for p in labels] if labels else None
+    hits: list[Hit] = []
+    for path in paths:
+        limit = cap - len(hits) if per_file is None else min(per_file, cap - len(hits))
+        hits.extend(search_file(path, regex, limit, read, context, tags))
+        if len(hits) >= cap:
+            break
+    return hits
+
+
+_pool: Executor | None = None
+
+
+def _process_pool() -> Executor:
+    global _pool
+    if _pool is None:
+        # forkserver: forking an interpreter that runs threads (asyncio
+        # workers, MCP sessions) is unsafe.
+        method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        _pool = ProcessPoolExecutor(GREP_WORKERS, mp_context=multiprocessing.get_context(method))
+    return _pool
+
+
+async def search(
+    pattern: str, paths: list[str], cap: int, read: Callable[[str], bytes | None] | None = None,
+    *, context: int = 0, per_file: int | None = None, labels: list[str] | None = None,
+) -> list[Hit]:
+    """
+    Search `paths` for `pattern` off the event loop; returns at most `cap`
+    hits in path order (at most `per_file` from one file), each with
+    `context` lines either side and, given the `labels` patterns that
+    `pattern` combines, the numbers of those matching its line. `read`
+    is only used by the in-thread path (a process pool can't share the
+    caller's cache).
+    """
+    options = dict(context=context, per_file=per_file, labels=labels)
+    if GREP_WORKERS <= 1 or len(paths) < PARALLEL_MIN_FILES:
+        return await asyncio.to_thread(partial(search_files, pattern, paths, cap, read, **options))
+
+    loop = asyncio.get_running_loop()
+    pool = _process_pool()
+    futures = [
+        loop.run_in_executor(pool, partial(search_files, pattern, paths[i:i + BATCH_FILES], cap, **options))
+        for i in range(0, len(paths), BATCH_FILES)
+    ]
+    hits: list[Hit] = []
+    try:
+        for future in futures:
+            hits.extend(await future)
+            if len(hits) >= cap:
+                break
+    finally:
+        for future in futures:
+            future.cancel()
+    return hits[:cap]
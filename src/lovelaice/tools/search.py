@@ -1,18 +1,15 @@
 """Search tools: glob and grep, both rooted at cwd (the workspace root)."""
 from __future__ import annotations
 
+import asyncio
+import os
 import re
-from pathlib import Path
+from pathlib import Path, PurePosixPath
 
-import pathspec
-
-
-def _gitignore_spec() -> pathspec.PathSpec | None:
-    """Load .gitignore from cwd, if present, into a PathSpec."""
-    gi = Path(".gitignore")
-    if not gi.is_file():
-        return None
-    return pathspec.PathSpec.from_lines("gitignore", gi.read_text().splitlines())
+from . import inventory
+from .cache import file_cache
+from .index import workspace_index
+from .scan import Hit, combine_patterns, compile_pattern, search
 
 
 async def glob(pattern: str) -> list[str]:
@@ -20,54 +17,162 @@ async def glob(pattern: str) -> list[str]:
     Return paths matching `pattern` (e.g., "src/**/*.py"), as forward-slash
     strings relative to cwd. Patterns follow Python's pathlib glob syntax.
 
-    Honors `.gitignore` if present at the workspace root: ignored entries
-    are filtered from the result. Always excludes `.git/`.
+    Honors `.gitignore`/`.ignore` files at any depth and
+    `.git/info/exclude`: ignored entries are filtered from the result and
+    ignored directories are never entered. Always excludes `.git/`.
     """
-    spec = _gitignore_spec()
-    results: list[str] = []
-    for p in Path(".").glob(pattern):
-        rel = p.as_posix()
-        if rel.startswith(".git/") or rel == ".git":
-            continue
-        if spec is not None and spec.match_file(rel):
-            continue
-        results.append(rel)
-    return sorted(results)
-
-
-async def grep(pattern: str, path: str = ".") -> str:
+    pattern = pattern.removeprefix("./")
+    parts = pattern.split("/")
+    # Start the walk below the pattern's literal leading directories, and
+    # stop at its depth unless it has a `**`.
+    fixed: list[str] = []
+    for part in parts[:-1]:
+        if any(c in part for c in "*?["):
+            break
+        fixed.append(part)
+    top = "/".join(fixed) or "."
+    if not os.path.isdir(top):
+        return []
+    depth = None if "**" in pattern else len(parts) - len(fixed)
+    return sorted(
+        p for p in inventory.walk(top, dirs=True, max_depth=depth)
+        if PurePosixPath(p).full_match(pattern)
+    )
+
+
+GREP_HIT_CAP = 200
+# Longer lines (minified code, data) are cut to this many characters.
+GREP_LINE_CHARS = 200
+
+
+def _candidates(patterns: list[str], path: str) -> list[str]:
+    """The files under `path` to scan, narrowed by the trigram index if there is one."""
+    paths = inventory.walk(path)
+    index = workspace_index()
+    if index is None:
+        return paths
+    keep: set[str] = set()
+    for pattern in patterns:
+        narrowed = index.narrow(pattern, paths)
+        if narrowed is None:
+            return paths
+        keep.update(narrowed)
+    return [p for p in paths if p in keep]
+
+
+def _clip(text: str, column: int = 0) -> str:
+    """`text` cut to `GREP_LINE_CHARS` characters, keeping the match in view."""
+    if len(text) <= GREP_LINE_CHARS:
+        return text
+    start = max(0, min(column - GREP_LINE_CHARS // 4, len(text) - GREP_LINE_CHARS))
+    head = "…" if start else ""
+    return f"{head}{text[start:start + GREP_LINE_CHARS]}… [{len(text)} chars]"
+
+
+def _blocks(hits: list[Hit]) -> dict[str, list[list[tuple[int, str, bool]]]]:
+    """Per file, runs of consecutive (line, text, is_match) with overlapping context merged."""
+    lines: dict[str, dict[int, tuple[str, bool]]] = {}
+    for h in hits:
+        numbered = lines.setdefault(h.path, {})
+        for k, text in enumerate(h.before, start=h.line - len(h.before)):
+            numbered.setdefault(k, (_clip(text), False))
+        tag = f"[{','.join(map(str, h.labels))}] " if h.labels else ""
+        numbered[h.line] = (tag + _clip(h.text, h.column), True)
+        for k, text in enumerate(h.after, start=h.line + 1):
+            numbered.setdefault(k, (_clip(text), False))
+    out: dict[str, list[list[tuple[int, str, bool]]]] = {}
+    for path, numbered in lines.items():
+        runs: list[list[tuple[int, str, bool]]] = []
+        for k in sorted(numbered):
+            if not runs or runs[-1][-1][0] != k - 1:
+                runs.append([])
+            runs[-1].append((k, *numbered[k]))
+        out[path] = runs
+    return out
+
+
+def _format(hits: list[Hit], group: bool, context: int) -> str:
+    out: list[str] = []
+    for path, runs in _blocks(hits).items():
+        if group:
+            if out:
+                out.append("")
+            out.append(path)
+        for n, run in enumerate(runs):
+            # As grep does, "--" separates non-adjacent context blocks.
+            if n and context:
+                out.append("--")
+            for line, text, match in run:
+                sep = ":" if match else "-"
+                out.append(f"{line}{sep}{text}" if group else f"{path}{sep}{line}{sep}{text}")
+    return "\n".join(out)
+
+
+async def grep(
+    pattern: str | list[str],
+    path: str = ".",
+    fixed_strings: bool = False,
+    context: int = 0,
+    group: bool = False,
+    files_only: bool = False,
+    per_file: int | None = None,
+) -> str:
     """
     Search files under `path` for `pattern` (treated as a regex). Returns
     matching lines formatted as `path:line:text`, capped at 200 hits. Use
     `bash("rg ...")` for richer search if ripgrep is on the PATH.
 
-    Honors `.gitignore`. Skips binary files (any file containing a NUL byte
+    `fixed_strings=True` matches `pattern` literally. Pass a list of
+    patterns to search for all of them in one pass: the output starts
+    with a numbered legend and each hit is tagged with the numbers of the
+    patterns found on its line (`path:line:[1,3] text`).
+
+    Options, to get the same information in fewer tokens:
+    - `context=N`: also show N lines before and after each match
+      (`path-line-text`), so no `read` is needed afterwards.
+    - `group=True`: print each file's path once, then `line:text` below it.
+    - `files_only=True`: list only the paths of files with a match.
+    - `per_file=N`: show at most N matches from any one file.
+    Lines longer than 200 characters are cut around the match.
+
+    Honors `.gitignore`/`.ignore` files at any depth (ignored directories
+    are never entered). Skips binary files (any file containing a NUL byte
     in its first 1024 bytes).
     """
-    spec = _gitignore_spec()
-    regex = re.compile(pattern)
-    hits: list[str] = []
-
+    patterns = [pattern] if isinstance(pattern, str) else list(pattern)
+    if not patterns:
+        raise ValueError("no pattern given")
+    if fixed_strings:
+        patterns = [re.escape(p) for p in patterns]
+    several = len(patterns) > 1
+    if several:
+        combined = combine_patterns(patterns)
+    else:
+        combined = patterns[0]
+        compile_pattern(combined)  # fail fast on a bad regex
     base = Path(path)
-    iterator = base.rglob("*") if base.is_dir() else [base]
-    for p in iterator:
-        if not p.is_file():
-            continue
-        rel = p.as_posix()
-        if rel.startswith(".git/"):
-            continue
-        if spec is not None and spec.match_file(rel):
-            continue
-        try:
-            head = p.read_bytes()[:1024]
-            if b"\x00" in head:
-                continue
-            text = p.read_text(encoding="utf-8", errors="replace")
-        except OSError:
-            continue
-        for i, line in enumerate(text.splitlines(), start=1):
-            if regex.search(line):
-                hits.append(f"{rel}:{i}:{line}")
-                if len(hits) >= 200:
-                    return "\n".join(hits) + "\n... (truncated at 200 hits)"
-    return "\n".join(hits)
+    if base.is_dir():
+        paths = await asyncio.to_thread(_candidates, patterns, path)
+    else:
+        paths = [base.as_posix()]
+
+    # Files the session already holds are searched from memory; grep
+    # doesn't fill the cache with everything it scans.
+    context = 0 if files_only else max(0, context)
+    hits = await search(
+        combined, paths, GREP_HIT_CAP, read=file_cache.peek,
+        context=context, per_file=1 if files_only else per_file,
+        labels=patterns if several and not files_only else None,
+    )
+    if files_only:
+        out = "\n".join(h.path for h in hits)
+        if len(hits) >= GREP_HIT_CAP:
+            out += f"\n... (truncated at {GREP_HIT_CAP} files)"
+        return out
+    out = _format(hits, group, context)
+    if several:
+        legend = "  ".join(f"[{n}] {p}" for n, p in enumerate(pattern, start=1))
+        out = f"{legend}\n{out}" if out else out
+    if len(hits) >= GREP_HIT_CAP:
+        out += f"\n... (truncated at {GREP_HIT_CAP} hits)"
+    return out
@@ -0,0 +1,216 @@
+"""Python symbol index: `find_symbol` and `outline`.
+
+Every `.py`/`.pyi` file the workspace inventory lists is parsed with
+`ast` into its classes, functions and methods — qualified name, line
+span and the first line of the docstring. The index is kept per file
+and keyed by the file's stamp, so each lookup re-parses only the files
+that changed since the last one. When many files need parsing (the
+first lookup in a large repo), they go to grep's process pool in
+batches; a handful are parsed in a worker thread.
+"""
+from __future__ import annotations
+
+import ast
+import asyncio
+import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+
+from . import inventory, scan
+from .cache import Stamp, stamp_of
+
+
+PY_SUFFIXES = (".py", ".pyi")
+FIND_SYMBOL_CAP = 50
+# Below this many files to parse, a process pool costs more than it saves.
+PARSE_PARALLEL_MIN = 64
+PARSE_BATCH = 32
+
+
+@dataclass(frozen=True)
+class Symbol:
+    """A class, function or method definition."""
+    name: str
+    qualname: str
+    kind: str  # "class", "function", "async function", "method", "async method"
+    path: str
+    line: int
+    end_line: int
+    doc: str
+
+    def describe(self) -> str:
+        doc = f" — {self.doc}" if self.doc else ""
+        return f"{self.path}:{self.line}-{self.end_line} {self.kind} {self.qualname}{doc}"
+
+
+def _doc_line(node: ast.AST) -> str:
+    doc = ast.get_docstring(node, clean=True) if isinstance(
+        node, (ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef)
+    ) else None
+    return doc.strip().splitlines()[0] if doc and doc.strip() else ""
+
+
+def parse_symbols(source: str | bytes, path: str) -> list[Symbol]:
+    """The definitions in `source`, in file order (empty if it doesn't parse)."""
+    try:
+        tree = ast.parse(source, filename=path)
+    except (SyntaxError, ValueError):
+        return []
+    out: list[Symbol] = []
+
+    def visit(body: list[ast.stmt], prefix: str, in_class: bool) -> None:
+        for node in body:
+            if isinstance(node, ast.ClassDef):
+                kind = "class"
+            elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                kind = "method" if in_class else "function"
+                if isinstance(node, ast.AsyncFunctionDef):
+                    kind = f"async {kind}"
+            else:
+                # Definitions nested in if/try blocks at module or class level.
+                for field in ("body", "orelse", "finalbody", "handlers"):
+                    nested = getattr(node, field, None)
+                    if isinstance(nested, list):
+                        visit([n for n in nested if isinstance(n, ast.AST)], prefix, in_class)
+                continue
+            qualname = f"{prefix}{node.name}"
+            start = min([node.lineno, *(d.lineno for d in node.decorator_list)])
+            out.append(Symbol(
+                node.name, qualname, kind, path, start, node.end_lineno or node.lineno, _doc_line(node),
+            ))
+            visit(node.body, qualname + ".", kind == "class")
+
+    visit(tree.body, "", False)
+    return out
+
+
+def _parse_files(paths: list[str]) -> list[tuple[str, Stamp | None, list[Symbol]]]:
+    """Parse each file; runs in pool workers, so takes and returns plain data."""
+    out = []
+    for path in paths:
+        try:
+            with open(path, "rb") as f:
+                st = os.fstat(f.fileno())
+                data = f.read()
+        except OSError:
+            out.append((path, None, []))
+            continue
+        out.append((path, stamp_of(st), parse_symbols(data, path)))
+    return out
+
+
+class SymbolIndex:
+    """Symbols per Python file, re-parsed only when a file's stamp changes."""
+
+    def __init__(self) -> None:
+        self._files: dict[str, tuple[Stamp, list[Symbol]]] = {}
+        self._lock = threading.Lock()
+
+    def stale(self, paths: list[str], *, complete: bool = False) -> list[str]:
+        """
+        Those of `paths` never parsed or changed since. With `complete`
+        (`paths` is every Python file), forgets files no longer listed.
+        """
+        out = []
+        with self._lock:
+            if complete:
+                wanted = set(paths)
+                for path in [p for p in self._files if p not in wanted]:
+                    del self._files[path]
+            for path in paths:
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    self._files.pop(path, None)
+                    continue
+                entry = self._files.get(path)
+                if entry is None or entry[0] != stamp_of(st):
+                    out.append(path)
+        return out
+
+    def store(self, parsed: list[tuple[str, Stamp | None, list[Symbol]]]) -> None:
+        with self._lock:
+            for path, stamp, symbols in parsed:
+                if stamp is None:
+                    self._files.pop(path, None)
+                else:
+                    self._files[path] = (stamp, symbols)
+
+    async def refresh(self, paths: list[str], *, complete: bool = False) -> None:
+        """Bring `paths` up to date, parsing changed files in parallel if there are many."""
+        todo = await asyncio.to_thread(self.stale, paths, complete=complete)
+        if not todo:
+            return
+        if scan.GREP_WORKERS <= 1 or len(todo) < PARSE_PARALLEL_MIN:
+            self.store(await asyncio.to_thread(_parse_files, todo))
+            return
+        loop = asyncio.get_running_loop()
+        pool = scan._process_pool()
+        batches = [todo[i:i + PARSE_BATCH] for i in range(0, len(todo), PARSE_BATCH)]
+        for parsed in await asyncio.gather(
+            *(loop.run_in_executor(pool, _parse_files, batch) for batch in batches)
+        ):
+            self.store(parsed)
+
+    def symbols(self, path: str) -> list[Symbol]:
+        with self._lock:
+            entry = self._files.get(path)
+            return list(entry[1]) if entry else []
+
+    def all(self) -> list[Symbol]:
+        with self._lock:
+            return [s for path in sorted(self._files) for s in self._files[path][1]]
+
+
+symbol_index = SymbolIndex()
+
+
+def _python_files() -> list[str]:
+    return [p for p in inventory.walk(".") if p.endswith(PY_SUFFIXES)]
+
+
+async def find_symbol(name: str) -> str:
+    """
+    Find where a Python class, function or method is defined in the
+    workspace. `name` is a bare name (`parse`) or a dotted suffix of the
+    qualified name (`Parser.parse`). Returns one line per definition:
+    `path:start-end kind qualname — first docstring line`; read just
+    that line range instead of the whole file. Falls back to
+    case-insensitive substring matches when nothing matches exactly.
+    """
+    await symbol_index.refresh(await asyncio.to_thread(_python_files), complete=True)
+    symbols = symbol_index.all()
+    hits = [s for s in symbols if s.qualname == name or s.qualname.endswith("." + name)]
+    note = ""
+    if not hits:
+        low = name.lower()
+        hits = [s for s in symbols if low in s.qualname.lower()]
+        note = "no exact match; partial matches:\n" if hits else ""
+    if not hits:
+        return f"no Python definition named {name!r}"
+    out = note + "\n".join(s.describe() for s in hits[:FIND_SYMBOL_CAP])
+    if len(hits) > FIND_SYMBOL_CAP:
+        out += f"\n... ({len(hits) - FIND_SYMBOL_CAP} more; use a more specific name)"
+    return out
+
+
+async def outline(path: str) -> str:
+    """
+    List the classes, functions and methods defined in a Python file, one
+    per line as `start-end kind name — first docstring line`, indented by
+    nesting. Much cheaper than reading the file to find your way around it.
+    """
+    if not os.path.isfile(path):
+        raise FileNotFoundError(f"{path} not found")
+    path = Path(os.path.normpath(path)).as_posix()
+    await symbol_index.refresh([path])
+    symbols = symbol_index.symbols(path)
+    if not symbols:
+        return f"{path}: no classes or functions found"
+    lines = [f"{path}:"]
+    for s in symbols:
+        indent = "  " * (s.qualname.count(".") + 1)
+        doc = f" — {s.doc}" if s.doc else ""
+        lines.append(f"{indent}{s.line}-{s.end_line} {s.kind} {s.name}{doc}")
+    return "\n".join(lines)
@@ -0,0 +1,136 @@
+"""Workspace walker shared by glob, grep and list.
+
+`walk()` is a depth-first `os.scandir` traversal that applies ignore
+rules *before* descending, so an ignored `node_modules/` or `.venv/` is
+never opened. Rules follow git: `.git/info/exclude`, then every
+`.gitignore` from the workspace root down to the directory being
+listed, with deeper files overriding shallower ones and `!negation`
+supported. A `.ignore` file (as read by ripgrep) sits beside
+`.gitignore` and wins over it. `.git/` itself is always skipped.
+
+Ignore paths are relative to the workspace root (cwd); walking a
+subdirectory still applies the rules of its ancestors. Entries come out
+sorted per directory, so results are deterministic.
+"""
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator
+
+import pathspec
+
+
+IGNORE_FILES = (".gitignore", ".ignore")
+ALWAYS_SKIP = {".git"}
+
+
+@dataclass
+class _Layer:
+    """The ignore rules declared in one directory."""
+    # Workspace-relative posix path of that directory, "" for the root.
+    base: str
+    spec: pathspec.PathSpec
+
+
+def _read_lines(path: str) -> list[str]:
+    try:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            return f.read().splitlines()
+    except OSError:
+        return []
+
+
+def _layer(
+    directory: str, base: str, *, root: bool = False, names: set[str] | None = None,
+) -> _Layer | None:
+    """
+    Load the ignore rules `directory` declares (None if it has none).
+    `names`, when the caller has already listed the directory, saves
+    trying to open files that are not there.
+    """
+    lines: list[str] = []
+    if root and (names is None or ".git" in names):
+        lines += _read_lines(os.path.join(directory, ".git", "info", "exclude"))
+    for name in IGNORE_FILES:
+        if names is None or name in names:
+            lines += _read_lines(os.path.join(directory, name))
+    if not any(l.strip() and not l.startswith("#") for l in lines):
+        return None
+    return _Layer(base=base, spec=pathspec.PathSpec.from_lines("gitignore", lines))
+
+
+def is_ignored(rel: str, is_dir: bool, layers: list[_Layer]) -> bool:
+    """Whether workspace-relative `rel` is ignored under `layers` (shallowest first)."""
+    for layer in reversed(layers):
+        sub = rel[len(layer.base) + 1:] if layer.base else rel
+        result = layer.spec.check_file(sub + "/" if is_dir else sub)
+        if result.include is not None:
+            return result.include
+    return False
+
+
+def _start(top: str) -> tuple[str, str, list[_Layer]]:
+    """(absolute top, its workspace-relative path, layers of its ancestors)."""
+    root = os.getcwd()
+    top_abs = os.path.abspath(top)
+    if top_abs == root or not top_abs.startswith(root + os.sep):
+        # The root itself, or outside the workspace, where only rules
+        # found from `top` down apply.
+        return top_abs, "", []
+
+    rel = Path(os.path.relpath(top_abs, root)).as_posix()
+    layers: list[_Layer] = []
+    current, base = root, ""
+    for part in ["", *rel.split("/")[:-1]]:
+        current = os.path.join(current, part) if part else current
+        base = f"{base}/{part}" if base else part
+        layer = _layer(current, base, root=not part)
+        if layer:
+            layers.append(layer)
+    return top_abs, rel, layers
+
+
+def walk(top: str = ".", *, dirs: bool = False, max_depth: int | None = None) -> Iterator[str]:
+    """
+    Yield the paths of the non-ignored files under `top` (and, with
+    `dirs=True`, directories too), as forward-slash strings prefixed the
+    way `top` was given (`"."` yields bare relative paths). `max_depth`
+    limits how many levels below `top` are listed (1 = direct children).
+    """
+    top_abs, top_rel, layers = _start(top)
+    prefix = "" if os.path.normpath(top) == "." else Path(top).as_posix().rstrip("/") + "/"
+    # (absolute dir, workspace-relative dir, display-relative dir, depth, layers)
+    stack = [(top_abs, top_rel, "", 1, layers)]
+    while stack:
+        path, rel, shown, depth, layers = stack.pop()
+        try:
+            with os.scandir(path) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError:
+            continue
+        layer = _layer(path, rel, root=not rel, names={e.name for e in entries})
+        if layer is not None:
+            layers = [*layers, layer]
+        subdirs = []
+        for entry in entries:
+            if entry.name in ALWAYS_SKIP:
+                continue
+            entry_rel = f"{rel}/{entry.name}" if rel else entry.name
+            entry_shown = f"{shown}{entry.name}"
+            try:
+                is_dir = entry.is_dir(follow_symlinks=False)
+            except OSError:
+                continue
+            if is_ignored(entry_rel, is_dir, layers):
+                continue
+            if is_dir:
+                if dirs:
+                    yield prefix + entry_shown
+                if max_depth is None or depth < max_depth:
+                    subdirs.append((entry.path, entry_rel, entry_shown + "/", depth + 1, layers))
+            else:
+                yield prefix + entry_shown
+        # Reversed so the stack pops them in sorted order.
+        stack.extend(reversed(subdirs))
@@ -46,7 +46,6 @@ class LovelaiceApp(App):
         self._build_agent = _build_agent
         self._agent: Any = None
         self._last_ctrl_c_t: float = 0.0
-        self._cumulative_usage = {"prompt": 0, "completion": 0, "total": 0}
         self._available_models: list[str] = []
         self._active_model: Optional[str] = None
         self._current_turn: Any = None
@@ -81,6 +80,10 @@ class LovelaiceApp(App):
         else:
             self._agent = self._build_agent()
 
+    async def on_unmount(self) -> None:
+        from ..mcp import aclose
+        await aclose()
+
     async def on_input_submitted(self, event) -> None:
         """User pressed Enter in the input box."""
         text = event.value.strip()
@@ -115,18 +118,30 @@ class LovelaiceApp(App):
 
         try:
             self._agent._on_tool_call = on_tool_call
+            self._agent._on_tool_output = transcript.on_tool_output
             await self._agent.chat(prompt)
             transcript.close_reply_block()
-            usage = getattr(self._agent.messages[-1], "usage", None)
-            if usage is not None:
-                self._cumulative_usage["prompt"] += usage.prompt_tokens
-                self._cumulative_usage["completion"] += usage.completion_tokens
-                self._cumulative_usage["total"] += usage.total_tokens
+            stats = getattr(self._agent, "turn_stats", None)
+            if isinstance(stats, dict):
+                self._report_turn_stats(stats)
         except Exception as e:
             transcript.add_error(f"{type(e).__name__}: {e}")
         finally:
             self.query_one("#input", Input).disabled = False
 
+    def _report_turn_stats(self, stats: dict) -> None:
+        """Note anything noteworthy from a finished turn's stats."""
+        transcript = self.query_one("#transcript", Transcript)
+        if stats.get("compacted_tokens"):
+            transcript.add_note(
+                f"↳ context compacted before this turn (~{stats['compacted_tokens']} tokens freed)"
+            )
+        if stats.get("round_trips_saved"):
+            transcript.add_note(
+                f"↳ {stats['llm_calls']} LLM calls, "
+                f"{stats['round_trips_saved']} round-trips saved"
+            )
+
     async def action_cancel_or_quit(self) -> None:
         """Single Ctrl+C cancels the current turn; double within 1s quits."""
         import time
@@ -3,6 +3,9 @@ from __future__ import annotations
 
 import os
 
+from ..tools.cache import forget_seen
+from ..usage import UsageTracker, by_phase
+
 
 HELP_TEXT = """
 Slash commands:
@@ -10,8 +13,12 @@ Slash commands:
   /model              list configured models (current is starred)
   /model <alias>      switch active model for next turn
   /clear              wipe in-memory conversation context
+  /compact            elide old tool output and summarize old turns
   /cost               show cumulative token usage since launch
+  /perf               per-call tokens and latency for the last turn
   /cwd                print the workspace root
+  /mcp                MCP servers: status, tools, calls, latency, restarts
+  /mcp refresh        forget cached MCP tool lists (re-listed next launch)
   /exit, /quit        exit the app
 
 Keys:
@@ -22,6 +29,30 @@ Keys:
 """.strip()
 
 
+def _seconds(value: float | None) -> str:
+    return "-" if value is None else f"{value:.2f}s"
+
+
+def perf_report(tracker: UsageTracker) -> str:
+    """Per-call table for the last turn, then per-phase totals for the session."""
+    header = f"  {'#':>3}  {'phase':<8} {'prompt':>8} {'cached':>8} {'compl':>7} {'ttft':>7} {'latency':>8}"
+    records = tracker.turn_records()
+    lines = [f"Last turn ({len(records)} calls):", header]
+    for i, r in enumerate(records, start=1):
+        lines.append(
+            f"  {i:>3}  {r.phase:<8} {r.prompt_tokens:>8} {r.cached_tokens:>8} "
+            f"{r.completion_tokens:>7} {_seconds(r.ttft):>7} {_seconds(r.latency):>8}"
+        )
+    lines += ["", f"Session by phase ({len(tracker.records)} calls):", header]
+    for name, r in by_phase(tracker.records).items():
+        calls = sum(1 for x in tracker.records if x.phase == name)
+        lines.append(
+            f"  {calls:>3}  {name:<8} {r.prompt_tokens:>8} {r.cached_tokens:>8} "
+            f"{r.completion_tokens:>7} {_seconds(r.ttft):>7} {_seconds(r.latency):>8}"
+        )
+    return "\n".join(lines)
+
+
 async def handle_slash(app, text: str) -> None:
     transcript = app.query_one("#transcript")
     parts = text.split(maxsplit=1)
@@ -36,6 +67,18 @@ async def handle_slash(app, text: str) -> None:
         transcript.add_user_message(os.getcwd())
         return
 
+    if cmd == "/mcp" and arg == "refresh":
+        from ..mcp import invalidate_tool_cache
+        invalidate_tool_cache()
+        transcript.add_user_message("MCP tool cache cleared; servers are listed afresh on next launch.")
+        return
+
+    if cmd == "/mcp":
+        servers = getattr(app._agent, "mcp_servers", None) or []
+        lines = [s.describe() for s in servers] or ["No MCP servers configured."]
+        transcript.add_user_message("\n".join(lines))
+        return
+
     if cmd in ("/exit", "/quit"):
         await app.action_quit()
         return
@@ -43,21 +86,46 @@ async def handle_slash(app, text: str) -> None:
     if cmd == "/clear":
         if app._agent is not None:
             app._agent.messages = []
+        forget_seen()
         transcript.clear_context_marker()
         return
 
+    if cmd == "/compact":
+        if app._agent is None:
+            transcript.add_error("agent not ready")
+            return
+        result = await app._agent.compact(force=True)
+        if not result.changed:
+            transcript.add_note("nothing to compact")
+        else:
+            transcript.add_note(
+                f"── context compacted: ~{result.tokens_before} → ~{result.tokens_after} tokens ──"
+            )
+        return
+
     if cmd == "/cost":
-        usage = getattr(app, "_cumulative_usage", None)
-        if not usage or usage.get("total", 0) == 0:
+        tracker = getattr(app._agent, "usage", None)
+        if not isinstance(tracker, UsageTracker) or tracker.totals.calls == 0:
             transcript.add_user_message("No usage recorded yet.")
         else:
+            t = tracker.totals
             transcript.add_user_message(
-                f"prompt_tokens={usage['prompt']}  "
-                f"completion_tokens={usage['completion']}  "
-                f"total={usage['total']}"
+                f"calls={t.calls}  "
+                f"prompt_tokens={t.prompt_tokens}  "
+                f"completion_tokens={t.completion_tokens}  "
+                f"total={t.prompt_tokens + t.completion_tokens}  "
+                f"cached_tokens={t.cached_tokens}"
             )
         return
 
+    if cmd == "/perf":
+        tracker = getattr(app._agent, "usage", None)
+        if not isinstance(tracker, UsageTracker) or not tracker.records:
+            transcript.add_user_message("No LLM calls recorded yet.")
+        else:
+            transcript.add_user_message(perf_report(tracker))
+        return
+
     if cmd == "/model":
         from textual.widgets import Static
         models = getattr(app, "_available_models", None) or []
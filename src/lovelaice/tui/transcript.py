@@ -24,6 +24,8 @@ class Transcript(VerticalScroll):
         self._current_reply: Optional[ReplyBlock] = None
         self._current_thinking: Optional[ThinkingBlock] = None
         self._sink: Optional[Static] = None
+        # Tool calls still running, by tool name, showing their live output.
+        self._live_tools: dict[str, ToolCallBlock] = {}
 
     def on_mount(self) -> None:
         self._sink = Static("", expand=True)
@@ -60,13 +62,26 @@ class Transcript(VerticalScroll):
             self._refresh()
 
     def add_tool_call(self, tool_name: str, summary: str, result: str = "", error: str | None = None) -> None:
-        self.blocks.append(ToolCallBlock(tool_name=tool_name, summary=summary, result=result, error=error))
+        block = ToolCallBlock(tool_name=tool_name, summary=summary, result=result, error=error)
+        # Concurrent calls of one tool each have a live block; the first
+        # one still open makes way for the finished call.
+        key = next((k for k in self._live_tools if k.partition("#")[0] == tool_name), None)
+        live = self._live_tools.pop(key, None) if key is not None else None
+        index = next((i for i, b in enumerate(self.blocks) if b is live), None)
+        if index is not None:
+            self.blocks[index] = block
+        else:
+            self.blocks.append(block)
         self._refresh()
 
     def add_error(self, message: str) -> None:
         self.blocks.append(ErrorBlock(message=message))
         self._refresh()
 
+    def add_note(self, text: str) -> None:
+        self.blocks.append(MessageBlock(role="system", text=text))
+        self._refresh()
+
     def clear_context_marker(self) -> None:
         self.blocks.append(MessageBlock(role="system", text="── context cleared ──"))
         self._refresh()
@@ -82,6 +97,20 @@ class Transcript(VerticalScroll):
         self._current_reply.append(token)
         self._refresh()
 
+    def on_tool_output(self, key: str, chunk: str) -> None:
+        """Partial output from a running tool call (`bash#3`): show its latest line."""
+        block = self._live_tools.get(key)
+        if block is None:
+            block = ToolCallBlock(tool_name=key.partition("#")[0], summary="")
+            self._live_tools[key] = block
+            self.blocks.append(block)
+        # Only the tail matters for the live view; the full result
+        # arrives with add_tool_call.
+        block.result = (block.result + chunk)[-4000:]
+        lines = block.result.rstrip("\n").splitlines()
+        block.summary = lines[-1][:80] if lines else ""
+        self._refresh()
+
     def on_reasoning_token(self, token: str) -> None:
         if self._current_thinking is None:
             self.open_thinking_block()
@@ -0,0 +1,185 @@
+"""Token and latency accounting for every LLM round-trip an agent makes.
+
+`lingo.Usage` only carries prompt/completion/total counts, and only the
+final reply's usage is kept on the conversation. `UsageTracker` wraps
+the `chat.completions` resource of a `lingo.LLM`'s OpenAI client so both
+the streaming `chat()` path and the structured-output `create()` path
+report here, one `CallRecord` per request: the phase that issued it,
+prompt/completion tokens, provider-side cache hits
+(`prompt_tokens_details.cached_tokens` on OpenAI/OpenRouter,
+`cache_read_input_tokens` on Anthropic-shaped responses), time to first
+streamed chunk and total latency.
+
+The phase comes from `phase()`, a context manager the engine wrapper in
+`core.py` (and a few call sites of their own) enter around each call.
+"""
+from __future__ import annotations
+
+import contextlib
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Callable
+
+
+_phase: ContextVar[str | None] = ContextVar("lovelaice_llm_phase", default=None)
+
+
+@contextlib.contextmanager
+def phase(name: str):
+    """
+    Attribute LLM calls made inside the block to `name`. The outermost
+    phase wins, so `Engine.decide` → `Engine.create` is still "decide".
+    """
+    if _phase.get() is not None:
+        yield
+        return
+    token = _phase.set(name)
+    try:
+        yield
+    finally:
+        _phase.reset(token)
+
+
+@dataclass
+class CallRecord:
+    """One LLM request."""
+    turn: int
+    phase: str
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0
+    ttft: float | None = None
+    latency: float = 0.0
+
+
+@dataclass
+class UsageTotals:
+    """Cumulative token counts across LLM calls."""
+    calls: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0
+
+    def minus(self, other: "UsageTotals") -> "UsageTotals":
+        return UsageTotals(
+            calls=self.calls - other.calls,
+            prompt_tokens=self.prompt_tokens - other.prompt_tokens,
+            completion_tokens=self.completion_tokens - other.completion_tokens,
+            cached_tokens=self.cached_tokens - other.cached_tokens,
+        )
+
+
+def cached_tokens_of(usage: Any) -> int:
+    """Pull the cache-hit prompt token count out of a provider usage object."""
+    details = getattr(usage, "prompt_tokens_details", None)
+    cached = getattr(details, "cached_tokens", None) if details is not None else None
+    if cached is None:
+        cached = getattr(usage, "cache_read_input_tokens", None)
+    if cached is None:
+        extra = getattr(usage, "model_extra", None) or {}
+        cached = extra.get("cache_read_input_tokens")
+    return int(cached or 0)
+
+
+class UsageTracker:
+    """Records every completion made through an attached LLM."""
+
+    def __init__(self) -> None:
+        self.totals = UsageTotals()
+        self.records: list[CallRecord] = []
+        self.turn = 0
+        # Called with each CallRecord as it completes (e.g. `--json` events).
+        self.on_call: Callable[[CallRecord], Any] | None = None
+
+    def attach(self, llm: Any) -> None:
+        """Route `llm`'s completions through this tracker. Idempotent."""
+        chat = llm.client.chat
+        if isinstance(chat.completions, _TrackedCompletions):
+            return
+        chat.completions = _TrackedCompletions(chat.completions, self)
+
+    def begin_turn(self) -> None:
+        self.turn += 1
+
+    def snapshot(self) -> UsageTotals:
+        return UsageTotals(**vars(self.totals))
+
+    def turn_records(self, turn: int | None = None) -> list[CallRecord]:
+        turn = self.turn if turn is None else turn
+        return [r for r in self.records if r.turn == turn]
+
+    def record(self, usage: Any, *, ttft: float | None = None, latency: float = 0.0) -> CallRecord:
+        rec = CallRecord(
+            turn=self.turn,
+            phase=_phase.get() or "other",
+            prompt_tokens=getattr(usage, "prompt_tokens", 0) or 0,
+            completion_tokens=getattr(usage, "completion_tokens", 0) or 0,
+            cached_tokens=cached_tokens_of(usage) if usage is not None else 0,
+            ttft=ttft,
+            latency=latency,
+        )
+        self.records.append(rec)
+        self.totals.calls += 1
+        self.totals.prompt_tokens += rec.prompt_tokens
+        self.totals.completion_tokens += rec.completion_tokens
+        self.totals.cached_tokens += rec.cached_tokens
+        if self.on_call is not None:
+            self.on_call(rec)
+        return rec
+
+
+def by_phase(records: list[CallRecord]) -> dict[str, CallRecord]:
+    """Sum `records` per phase; `ttft` becomes the mean over streamed calls."""
+    out: dict[str, CallRecord] = {}
+    ttfts: dict[str, list[float]] = {}
+    for r in records:
+        agg = out.setdefault(r.phase, CallRecord(turn=r.turn, phase=r.phase))
+        agg.prompt_tokens += r.prompt_tokens
+        agg.completion_tokens += r.completion_tokens
+        agg.cached_tokens += r.cached_tokens
+        agg.latency += r.latency
+        if r.ttft is not None:
+            ttfts.setdefault(r.phase, []).append(r.ttft)
+    for name, values in ttfts.items():
+        out[name].ttft = sum(values) / len(values)
+    return out
+
+
+class _TrackedCompletions:
+    """Proxy over `AsyncOpenAI().chat.completions` that reports usage and timing."""
+
+    def __init__(self, inner: Any, tracker: UsageTracker) -> None:
+        self._inner = inner
+        self._tracker = tracker
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._inner, name)
+
+    async def create(self, **kwargs: Any) -> Any:
+        start = time.perf_counter()
+        response = await self._inner.create(**kwargs)
+        if not kwargs.get("stream"):
+            self._tracker.record(
+                getattr(response, "usage", None), latency=time.perf_counter() - start,
+            )
+            return response
+        return self._relay(response, start)
+
+    async def _relay(self, stream: Any, start: float):
+        usage = None
+        ttft = None
+        async for chunk in stream:
+            if ttft is None and getattr(chunk, "choices", None):
+                ttft = time.perf_counter() - start
+            usage = getattr(chunk, "usage", None) or usage
+            yield chunk
+        self._tracker.record(usage, ttft=ttft, latency=time.perf_counter() - start)
+
+    async def parse(self, **kwargs: Any) -> Any:
+        start = time.perf_counter()
+        response = await self._inner.parse(**kwargs)
+        self._tracker.record(
+            getattr(response, "usage", None), latency=time.perf_counter() - start,
+        )
+        return response
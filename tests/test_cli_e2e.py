@@ -108,6 +108,28 @@ def test_cli_json_emits_reasoning_then_content_then_done(tmp_path: Path) -> None
     assert done["content"] == "".join(DEFAULT_CONTENT_CHUNKS)
 
 
+def test_cli_json_reports_each_llm_call(tmp_path: Path) -> None:
+    """Every LLM round-trip shows up as an `llm_call` event tagged with its
+    phase, token counts and latency, ahead of the final `done`."""
+    with FakeServer() as server:
+        _write_config(tmp_path, server.base_url)
+        proc = _run_lovelaice(tmp_path, "say hi", "--json")
+
+    assert proc.returncode == 0, f"exit {proc.returncode}\nstderr: {proc.stderr}"
+
+    events = [json.loads(line) for line in proc.stdout.splitlines() if line.strip()]
+    calls = [e for e in events if e["type"] == "llm_call"]
+    assert len(calls) == 1
+    assert calls[0]["phase"] == "reply"
+    assert calls[0]["prompt_tokens"] == 10
+    assert calls[0]["completion_tokens"] == 8
+    assert calls[0]["ttft"] is not None
+    assert calls[0]["latency"] >= calls[0]["ttft"]
+
+    stats = next(e for e in events if e["type"] == "stats")
+    assert stats["prompt_tokens"] == 10
+
+
 def test_cli_plain_routes_content_to_stdout_and_reasoning_to_stderr(tmp_path: Path) -> None:
     """`--plain` is the pipeline-friendly mode: content tokens stream to
     stdout, reasoning tokens stream to stderr, no Rich markup involved."""
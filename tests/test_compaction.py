@@ -0,0 +1,73 @@
+"""Context compaction: elide old observations, summarize old turns, keep recent ones."""
+from __future__ import annotations
+
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from lingo import Message
+
+from lovelaice.compaction import Summary, compact, estimate_tokens
+from lovelaice.core import Lovelaice
+
+
+def _turn(i: int, observation_chars: int = 2000) -> list[Message]:
+    return [
+        Message.user(f"request {i}"),
+        Message.system(f"[tool read result]\n" + "x" * observation_chars),
+        Message.assistant(f"answer {i}"),
+    ]
+
+
+def _history(turns: int) -> list[Message]:
+    return [m for i in range(turns) for m in _turn(i)]
+
+
+@pytest.mark.asyncio
+async def test_compact_is_a_noop_under_budget() -> None:
+    llm = MagicMock(); llm.create = AsyncMock()
+    messages = _history(3)
+    out, result = await compact(messages, llm, budget=10_000)
+    assert out is messages
+    assert not result.changed
+    llm.create.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_compact_elides_old_observations_and_keeps_recent_turns() -> None:
+    llm = MagicMock(); llm.create = AsyncMock()
+    messages = _history(4)
+    # Over budget, but eliding alone gets back under it.
+    out, result = await compact(messages, llm, budget=1500, keep_turns=2)
+
+    assert result.elided == 2
+    assert result.summarized == 0
+    assert "elided" in str(out[1].content)
+    assert out[-6:] == messages[-6:]
+    assert result.tokens_after < result.tokens_before
+    llm.create.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_compact_summarizes_when_eliding_is_not_enough() -> None:
+    llm = MagicMock(); llm.create = AsyncMock(return_value=Summary(summary="did stuff"))
+    messages = _history(4)
+    out, result = await compact(messages, llm, budget=1030, keep_turns=2)
+
+    assert result.summarized == 6
+    assert "[summary of earlier conversation]" in str(out[0].content)
+    assert "did stuff" in str(out[0].content)
+    assert out[1:] == messages[-6:]
+    assert estimate_tokens(out) == result.tokens_after
+
+
+@pytest.mark.asyncio
+async def test_agent_compact_force_with_no_budget() -> None:
+    llm = MagicMock(); llm.create = AsyncMock(return_value=Summary(summary="earlier"))
+    bot = Lovelaice(llm=llm, prompt="x")
+    bot.messages = _history(3)
+
+    result = await bot.compact(force=True)
+
+    assert result.changed
+    assert str(bot.messages[0].content).endswith("earlier")
+    assert len(bot.messages) == 1 + 6
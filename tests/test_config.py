@@ -34,6 +34,29 @@ def test_config_bash_timeout_mutates_module() -> None:
         bash_module.BASH_TIMEOUT = original
 
 
+def test_config_bash_output_cap_mutates_module() -> None:
+    original = bash_module.BASH_OUTPUT_CAP
+    try:
+        cfg = Config(models={"default": {"model": "x"}}, prompt="x", bash_output_cap=4096)
+        cfg._apply_bash_output_cap()
+        assert bash_module.BASH_OUTPUT_CAP == 4096
+    finally:
+        bash_module.BASH_OUTPUT_CAP = original
+
+
+def test_config_tool_concurrency_mutates_module() -> None:
+    react_module = sys.modules.setdefault(
+        "lovelaice.commands.react", __import__("lovelaice.commands.react", fromlist=["_"])
+    )
+    original = react_module.MAX_PARALLEL_TOOLS
+    try:
+        cfg = Config(models={"default": {"model": "x"}}, prompt="x", tool_concurrency=3)
+        cfg._apply_tool_concurrency()
+        assert react_module.MAX_PARALLEL_TOOLS == 3
+    finally:
+        react_module.MAX_PARALLEL_TOOLS = original
+
+
 def test_config_mcp_stores_specs() -> None:
     cfg = Config(
         models={"default": {"model": "x"}},
@@ -46,3 +69,15 @@ def test_config_mcp_stores_specs() -> None:
 def test_config_default_mcp_is_empty() -> None:
     cfg = Config(models={"default": {"model": "x"}}, prompt="x")
     assert cfg.mcp == []
+
+
+def test_config_mcp_startup_timeout_mutates_module() -> None:
+    from lovelaice import mcp as mcp_module
+
+    original = mcp_module.MCP_STARTUP_DEADLINE
+    try:
+        cfg = Config(models={"default": {"model": "x"}}, prompt="x", mcp_startup_timeout=2.5)
+        cfg._apply_mcp_startup_timeout()
+        assert mcp_module.MCP_STARTUP_DEADLINE == 2.5
+    finally:
+        mcp_module.MCP_STARTUP_DEADLINE = original
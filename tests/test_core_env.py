@@ -1,21 +1,25 @@
-"""The Lovelaice subclass injects an environment-status block each turn."""
+"""The Lovelaice subclass lays the prompt out as a static prefix plus a volatile tail."""
 from __future__ import annotations
 
 from pathlib import Path
 from unittest.mock import MagicMock
 
 import pytest
-from lingo import Context
+from lingo import Context, Message
 
 from lovelaice.core import Lovelaice
 
 
+def _bot(tools=(), **kwargs) -> Lovelaice:
+    bot = Lovelaice(llm=MagicMock(), prompt="You are a test agent.", **kwargs)
+    bot.tools = list(tools)
+    return bot
+
+
 @pytest.mark.asyncio
 async def test_explain_context_mentions_workspace_root(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
     monkeypatch.chdir(tmp_path)
-    bot = Lovelaice.__new__(Lovelaice)
-    bot.skills = []
-    bot.tools = []
+    bot = _bot()
 
     ctx = Context([])
     engine = MagicMock()
@@ -29,15 +33,104 @@ async def test_explain_context_mentions_workspace_root(tmp_path: Path, monkeypat
 @pytest.mark.asyncio
 async def test_explain_context_lists_mcp_tools(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
     monkeypatch.chdir(tmp_path)
-    bot = Lovelaice.__new__(Lovelaice)
-    bot.skills = []
     fake_tool = MagicMock(); fake_tool.name = "mcp:fs:read"; fake_tool.description = "read a file"
-    bot.tools = [fake_tool]
+    bot = _bot(tools=[fake_tool])
 
     ctx = Context([])
     engine = MagicMock()
     await bot.explain_context(ctx, engine)
 
-    last_text = str(ctx.messages[-1].content)
-    assert "mcp:fs:read" in last_text
-    assert "read a file" in last_text
+    prefix_text = str(ctx.messages[0].content)
+    assert "mcp:fs:read" in prefix_text
+    assert "read a file" in prefix_text
+
+
+@pytest.mark.asyncio
+async def test_static_prefix_is_stable_and_volatile_facts_go_last(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """The flow's bare system prompt is swapped for a byte-identical prefix every turn."""
+    monkeypatch.chdir(tmp_path)
+    bot = _bot()
+
+    first = Context([Message.system(bot.system_prompt), Message.user("hi")])
+    await bot.explain_context(first, MagicMock())
+    second = Context([Message.system(bot.system_prompt), Message.user("again")])
+    await bot.explain_context(second, MagicMock())
+
+    assert first.messages[0].model_dump() == second.messages[0].model_dump()
+    assert "You are a test agent." in str(first.messages[0].content)
+    assert "Time:" not in str(first.messages[0].content)
+    assert "Time:" in str(first.messages[-1].content)
+    assert [m.role for m in first.messages] == ["system", "user", "system"]
+
+
+def test_static_prefix_carries_cache_control_when_enabled() -> None:
+    dumped = _bot(cache_control=True).static_prefix().model_dump()
+    assert dumped["content"][0]["cache_control"] == {"type": "ephemeral"}
+
+    plain = _bot().static_prefix().model_dump()
+    assert isinstance(plain["content"], str)
+
+
+class _Flow:
+    """Stands in for the Lingo flow: runs the context hook, then replies."""
+
+    def __init__(self, bot: Lovelaice, reply: str) -> None:
+        self.bot, self.reply = bot, reply
+
+    async def execute(self, context: Context, engine) -> None:
+        await self.bot.explain_context(context, engine)
+        context.append(Message.assistant(self.reply))
+
+
+@pytest.mark.asyncio
+async def test_environment_tail_is_not_kept_in_history(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.chdir(tmp_path)
+    bot = _bot()
+    monkeypatch.setattr(bot, "_build_flow", lambda: _Flow(bot, "ok"))
+    await bot.chat("one")
+    await bot.chat("two")
+    assert [(m.role, m.content) for m in bot.messages] == [
+        ("user", "one"), ("assistant", "ok"), ("user", "two"), ("assistant", "ok"),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_failed_turn_forgets_pages_seen_during_it(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    from lovelaice.tools.cache import file_cache
+
+    class _FailingFlow:
+        async def execute(self, context: Context, engine) -> None:
+            file_cache.mark_seen(("a.py", 1), (0, 0, 0), None, "a.py")
+            raise RuntimeError("provider down")
+
+    monkeypatch.chdir(tmp_path)
+    bot = _bot()
+    monkeypatch.setattr(bot, "_build_flow", lambda: _FailingFlow())
+    with pytest.raises(RuntimeError):
+        await bot.chat("read a.py")
+    assert file_cache.seen(("a.py", 1)) is None
+    assert [m.content for m in bot.messages] == ["read a.py"]
+
+
+@pytest.mark.asyncio
+async def test_tools_added_late_join_at_the_next_turn(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    import threading
+
+    monkeypatch.chdir(tmp_path)
+    late = MagicMock(); late.name = "mcp:slow:b"; late.description = "late tool"
+    bot = _bot()
+    monkeypatch.setattr(bot, "_build_flow", lambda: _Flow(bot, "ok"))
+    listed_before = str(bot.static_prefix().content)
+
+    thread = threading.Thread(target=bot.add_tools, args=([late],))
+    thread.start(); thread.join()
+    assert bot.tools == [] and str(bot.static_prefix().content) == listed_before
+
+    await bot.chat("hi")
+    assert bot.tools == [late]
+    assert "mcp:slow:b" in str(bot.static_prefix().content)
+
+    bot.remove_tools(["mcp:slow:b"])
+    await bot.chat("again")
+    assert bot.tools == []
+    assert "mcp:slow:b" not in str(bot.static_prefix().content)
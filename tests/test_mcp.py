@@ -1,11 +1,19 @@
 """MCP integration: tool wrapping and registration with `mcp:server:tool` naming."""
 from __future__ import annotations
 
+import asyncio
+import socket
+import subprocess
+import sys
+import threading
+import time
+from contextlib import asynccontextmanager
 from unittest.mock import AsyncMock, MagicMock
 
 import pytest
 
-from lovelaice.mcp import _mcp_display_name, _params_from_input_schema, _wrap_mcp_tool
+from lovelaice import mcp as mcp_module
+from lovelaice.mcp import _mcp_display_name, _params_from_input_schema, _wrap_mcp_tool, register_mcp_tools
 
 
 def test_mcp_display_name() -> None:
@@ -56,3 +64,359 @@ async def test_wrap_mcp_tool_calls_session() -> None:
     out = await wrapped.run(path="/tmp/x")
     session.call_tool.assert_awaited_once_with("read_file", {"path": "/tmp/x"})
     assert "hello from mcp" in out
+
+
+class _FakeSession:
+    def __init__(self, delay: float, tools: list[str], fail: bool, version: str = "1.0") -> None:
+        self.delay, self.tool_names, self.fail, self.version = delay, tools, fail, version
+
+    async def initialize(self):
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("boom")
+        return MagicMock(serverInfo=MagicMock(version=self.version))
+
+    dead = False
+    in_flight = max_in_flight = 0
+
+    async def call_tool(self, name: str, kwargs: dict):
+        if self.dead or name == "crash":
+            self.dead = True
+            raise ConnectionError("server gone")
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(kwargs.get("sleep", 0))
+        except asyncio.CancelledError:
+            self.cancelled = name
+            raise
+        finally:
+            self.in_flight -= 1
+        part = MagicMock(); part.text = f"{name}({kwargs})"
+        return MagicMock(content=[part])
+
+    async def send_ping(self):
+        if self.dead:
+            raise ConnectionError("server gone")
+
+    async def list_tools(self):
+        tools = []
+        for name in self.tool_names:
+            t = MagicMock(); t.name = name; t.description = name; t.inputSchema = {}
+            tools.append(t)
+        return MagicMock(tools=tools)
+
+
+class _Spawned(list):
+    """
+    Names of the servers spawned so far; `closed` those whose session was
+    closed, `sessions` the fake sessions handed out.
+    """
+    closed: list[str]
+    sessions: list[_FakeSession]
+
+
+@pytest.fixture
+def fake_servers(tmp_path, monkeypatch: pytest.MonkeyPatch):
+    """
+    `spec["delay"]`, `spec["tools"]`, `spec["fail"]`, `spec["version"]`
+    drive a fake server. Every session is closed after the test.
+    """
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    spawned = _Spawned()
+    spawned.closed, spawned.sessions = [], []
+
+    @asynccontextmanager
+    async def open_session(spec):
+        spawned.append(spec["name"])
+        session = _FakeSession(
+            spec.get("delay", 0.0), spec.get("tools", []), spec.get("fail", False), spec.get("version", "1.0"),
+        )
+        spawned.sessions.append(session)
+        try:
+            yield session
+        finally:
+            spawned.closed.append(spec["name"])
+
+    monkeypatch.setattr(mcp_module, "_open_session", open_session)
+    yield spawned
+    asyncio.run(mcp_module.aclose())
+
+
+class _Agent:
+    def __init__(self) -> None:
+        self.tools: list = []
+        self.added: list = []
+
+    def add_tools(self, tools: list) -> None:
+        self.added.extend(tools)
+        self.tools.extend(tools)
+
+    def remove_tools(self, names: list[str]) -> None:
+        self.tools = [t for t in self.tools if t.name not in names]
+
+
+def test_servers_start_concurrently_with_timings(fake_servers) -> None:
+    agent = _Agent()
+    specs = [{"name": f"s{i}", "command": f"s{i}", "tools": [f"t{i}"], "delay": 0.3} for i in range(5)]
+    specs.append({"name": "bad", "command": "bad", "fail": True})
+    started = time.monotonic()
+    reports = register_mcp_tools(agent, specs)
+    assert time.monotonic() - started < 1.0  # not 5 x 0.3s
+    assert [t.name for t in agent.tools] == [f"mcp:s{i}:t{i}" for i in range(5)]
+    assert [r.status for r in reports] == ["ready"] * 5 + ["failed"]
+    assert all(r.seconds is not None and r.seconds >= 0.3 for r in reports[:5])
+    assert reports[0].describe().startswith("s0: ready in 0.3")
+    assert "boom" in reports[-1].describe()
+    assert agent.mcp_servers is reports
+
+
+def test_slow_servers_register_when_ready(fake_servers, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(mcp_module, "MCP_STARTUP_DEADLINE", 0.2)
+    agent = _Agent()
+    reports = register_mcp_tools(agent, [
+        {"name": "fast", "command": "fast", "tools": ["a"]},
+        {"name": "slow", "command": "slow", "tools": ["b"], "delay": 0.6},
+    ])
+    assert [t.name for t in agent.tools] == ["mcp:fast:a"]
+    assert reports[1].describe() == "slow: still starting"
+    deadline = time.monotonic() + 5
+    while not agent.added and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert [t.name for t in agent.added] == ["mcp:slow:b"]
+    assert reports[1].status == "ready"
+
+
+@pytest.mark.asyncio
+async def test_cached_servers_spawn_on_first_call(fake_servers: list[str]) -> None:
+    spec = {"name": "fs", "command": "fs-server", "args": ["."], "env": {"TOKEN": "secret"}, "tools": ["read"]}
+    register_mcp_tools(_Agent(), [spec])
+    assert fake_servers == ["fs"]
+    assert "secret" not in mcp_module.tool_cache_path().read_text()
+
+    # Next launch: registered from the cache, nothing spawned until used.
+    agent = _Agent()
+    reports = await asyncio.to_thread(register_mcp_tools, agent, [{**spec, "tools": ["read", "write"]}])
+    assert fake_servers == ["fs"]
+    assert [t.name for t in agent.tools] == ["mcp:fs:read"]
+    assert reports[0].describe() == "fs: 1 tools from cache; starts on first call"
+
+    assert await agent.tools[0].run(path="x") == "read({'path': 'x'})"
+    assert fake_servers == ["fs", "fs"]
+    assert reports[0].status == "ready"
+    # The server now reports another tool: it is added, and cached for next time.
+    assert [t.name for t in agent.added] == ["mcp:fs:write"]
+    assert [t["name"] for t in mcp_module._ToolCache(mcp_module.tool_cache_path()).get(spec)["tools"]] == ["read", "write"]
+
+
+@pytest.mark.asyncio
+async def test_tools_the_server_dropped_are_removed(fake_servers: list[str]) -> None:
+    spec = {"name": "fs", "command": "fs-server", "tools": ["read", "stat"]}
+    register_mcp_tools(_Agent(), [spec])
+
+    agent = _Agent()
+    await asyncio.to_thread(register_mcp_tools, agent, [{**spec, "tools": ["read"], "version": "2.0"}])
+    assert [t.name for t in agent.tools] == ["mcp:fs:read", "mcp:fs:stat"]
+    await agent.tools[0].run(path="x")
+    assert [t.name for t in agent.tools] == ["mcp:fs:read"]
+    entry = mcp_module._ToolCache(mcp_module.tool_cache_path()).get(spec)
+    assert entry["version"] == "2.0" and [t["name"] for t in entry["tools"]] == ["read"]
+
+
+def test_changed_launch_or_invalidation_misses_the_cache(fake_servers: list[str]) -> None:
+    spec = {"name": "fs", "command": "fs-server", "tools": ["read"]}
+    register_mcp_tools(_Agent(), [spec])
+    register_mcp_tools(_Agent(), [{**spec, "env": {"A": "1"}}])
+    register_mcp_tools(_Agent(), [{**spec, "lazy": False}])
+    assert fake_servers == ["fs", "fs", "fs"]
+    register_mcp_tools(_Agent(), [spec])
+    assert len(fake_servers) == 3
+    mcp_module.invalidate_tool_cache([spec])
+    register_mcp_tools(_Agent(), [spec])
+    assert len(fake_servers) == 4
+
+
+@pytest.mark.asyncio
+async def test_sessions_share_one_loop_and_close_gracefully(fake_servers: list[str]) -> None:
+    agent = _Agent()
+    await asyncio.to_thread(register_mcp_tools, agent, [
+        {"name": f"s{i}", "command": f"s{i}", "tools": [f"t{i}"], "lazy": False} for i in range(3)
+    ])
+    loops = {t._session._startup.session.loop for t in agent.tools}
+    assert len(loops) == 1 and loops != {asyncio.get_running_loop()}
+    assert [t.name for t in threading.enumerate()].count("mcp-runtime") == 1
+    assert await agent.tools[2].run(x=1) == "t2({'x': 1})"
+
+    await mcp_module.aclose()
+    assert sorted(fake_servers.closed) == ["s0", "s1", "s2"]
+    assert "mcp-runtime" not in [t.name for t in threading.enumerate()]
+
+
+@pytest.mark.asyncio
+async def test_servers_spawned_on_first_use_live_on_the_callers_loop(
+    fake_servers: list[str], monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    spec = {"name": "fs", "command": "fs-server", "tools": ["read"]}
+    await asyncio.to_thread(register_mcp_tools, _Agent(), [spec])
+    agent = _Agent()
+    await asyncio.to_thread(register_mcp_tools, agent, [spec])
+
+    def no_hop(*args):
+        raise AssertionError("call went through another loop")
+
+    with monkeypatch.context() as m:
+        m.setattr(asyncio, "run_coroutine_threadsafe", no_hop)
+        assert await agent.tools[0].run(path="x") == "read({'path': 'x'})"
+    assert agent.tools[0]._session._startup.session.loop is asyncio.get_running_loop()
+
+    await mcp_module.aclose()
+    assert sorted(fake_servers.closed) == ["fs", "fs"]
+
+
+async def _eager(spec: dict) -> _Agent:
+    agent = _Agent()
+    await asyncio.to_thread(register_mcp_tools, agent, [{"lazy": False, **spec}])
+    return agent
+
+
+@pytest.mark.asyncio
+async def test_calls_time_out_without_retiring_a_healthy_server(fake_servers) -> None:
+    agent = await _eager({"name": "s", "command": "s", "tools": ["work"], "timeout": 0.1})
+    with pytest.raises(TimeoutError, match="s:work did not answer within 0.1s"):
+        await agent.tools[0].run(sleep=5)
+    assert await agent.tools[0].run() == "work({})"
+    report = agent.mcp_servers[0]
+    assert (report.status, report.calls, report.failed_calls, report.restarts) == ("ready", 2, 1, 0)
+    assert report.max_call_seconds >= 0.1
+    assert "2 calls (1 failed)" in report.describe()
+
+
+@pytest.mark.asyncio
+async def test_dead_servers_respawn_with_backoff(fake_servers, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(mcp_module, "MCP_RESTART_BACKOFF", 0.2)
+    agent = await _eager({"name": "s", "command": "s", "tools": ["crash", "work"]})
+    crash, work = agent.tools
+    with pytest.raises(ConnectionError):
+        await crash.run()
+    report = agent.mcp_servers[0]
+    assert report.status == "down" and "ping" in report.error
+    # Fails fast until the backoff has passed, then respawns.
+    with pytest.raises(RuntimeError, match="next restart in"):
+        await work.run()
+    assert fake_servers == ["s"]
+    await asyncio.sleep(0.25)
+    assert await work.run() == "work({})"
+    assert fake_servers == ["s", "s"] and fake_servers.closed == ["s"]
+    assert (report.status, report.restarts) == ("ready", 1)
+    assert report.describe().endswith("restarted 1x")
+
+
+@pytest.mark.asyncio
+async def test_health_checks_retire_silent_servers(fake_servers, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(mcp_module, "MCP_HEALTH_INTERVAL", 0.05)
+    agent = await _eager({"name": "s", "command": "s", "tools": ["work"]})
+    fake_servers.sessions[0].dead = True
+    for _ in range(100):
+        if agent.mcp_servers[0].status == "down":
+            break
+        await asyncio.sleep(0.02)
+    assert agent.mcp_servers[0].describe().startswith("s: down (health check failed")
+    assert fake_servers.closed == ["s"]
+
+
+@pytest.mark.asyncio
+async def test_concurrency_limit_and_cancellation(fake_servers) -> None:
+    agent = await _eager({"name": "s", "command": "s", "tools": ["work"], "max_concurrency": 2})
+    await asyncio.gather(*(agent.tools[0].run(sleep=0.05) for _ in range(5)))
+    session = fake_servers.sessions[0]
+    assert session.max_in_flight == 2
+
+    # Cancelling the caller cancels the call on the runtime's loop.
+    call = asyncio.create_task(agent.tools[0].run(sleep=10))
+    await asyncio.sleep(0.1)
+    call.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await call
+    await asyncio.sleep(0.05)
+    assert session.cancelled == "work" and session.in_flight == 0
+
+
+STAND_IN_SERVER = """
+import sys
+from mcp.server.mcpserver import MCPServer
+app = MCPServer("stand-in")
+
+@app.tool()
+def echo(text: str) -> str:
+    \"\"\"Echo text.\"\"\"
+    return text
+
+app.run(transport=sys.argv[1], host="127.0.0.1", port=int(sys.argv[2]))
+"""
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture(scope="module")
+def url_servers():
+    """A streamable HTTP and an SSE stand-in MCP server on localhost; yields their URLs."""
+    pytest.importorskip("mcp.server.mcpserver")
+    ports = {"streamable-http": _free_port(), "sse": _free_port()}
+    procs = [
+        subprocess.Popen(
+            [sys.executable, "-c", STAND_IN_SERVER, transport, str(port)],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        for transport, port in ports.items()
+    ]
+    try:
+        for port in ports.values():
+            deadline = time.monotonic() + 20
+            while True:
+                try:
+                    socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+                    break
+                except OSError:
+                    if time.monotonic() > deadline:
+                        pytest.skip("stand-in MCP server did not start")
+                    time.sleep(0.1)
+        yield [f"http://127.0.0.1:{ports['streamable-http']}/mcp", f"http://127.0.0.1:{ports['sse']}/sse"]
+    finally:
+        for proc in procs:
+            proc.terminate()
+            proc.wait()
+
+
+def test_url_specs_key_on_url_and_pick_a_transport() -> None:
+    spec = {"name": "ci", "url": "http://host:8000/mcp", "headers": {"Authorization": "Bearer x"}}
+    assert mcp_module._spec_key(spec) != mcp_module._spec_key({**spec, "headers": {}})
+    assert mcp_module._http_transport(spec) == "http"
+    assert mcp_module._http_transport({"url": "http://host:8000/sse/"}) == "sse"
+    assert mcp_module._http_transport({"url": "http://host:8000/events", "transport": "sse"}) == "sse"
+    with pytest.raises(ValueError, match="unknown MCP transport"):
+        mcp_module._http_transport({"url": "http://host/mcp", "transport": "ws"})
+
+
+@pytest.mark.asyncio
+async def test_url_servers_share_a_pooled_client(url_servers, tmp_path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    specs = [{"name": "http", "url": url_servers[0]}, {"name": "sse", "url": url_servers[1]}]
+    for _ in range(2):  # connected at build, then registered from the cache
+        agent = _Agent()
+        await asyncio.to_thread(register_mcp_tools, agent, specs)
+        assert [t.name for t in agent.tools] == ["mcp:http:echo", "mcp:sse:echo"]
+        assert await agent.tools[0].run(text="a") == "a"
+        assert await agent.tools[1].run(text="b") == "b"
+        runtimes = {t._session._startup.runtime for t in agent.tools}
+        assert len(runtimes) == 1 and len(runtimes.pop()._clients) == 1
+        await mcp_module.aclose()
+    # Closing our sessions leaves the shared servers running.
+    assert agent.mcp_servers[0].status == "stopped"
+    agent = _Agent()
+    await asyncio.to_thread(register_mcp_tools, agent, specs[:1])
+    assert await agent.tools[0].run(text="again") == "again"
+    await mcp_module.aclose()
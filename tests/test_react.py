@@ -1,6 +1,8 @@
 """ReAct loop semantics, isolated from the LLM."""
 from __future__ import annotations
 
+import asyncio
+import typing
 from unittest.mock import AsyncMock, MagicMock
 
 import pytest
@@ -65,3 +67,240 @@ async def test_react_handles_invoke_error() -> None:
     failed_msgs = [m for m in sys_msgs if "[tool bash failed]" in str(m.content)]
     assert len(failed_msgs) == 1
     assert "boom" in str(failed_msgs[0].content)
+
+
+def _call_model(model_cls, tool_name: str):
+    """Pull the per-tool call model for `tool_name` out of a NextAction model."""
+    item = typing.get_args(model_cls.model_fields["calls"].annotation)[0]
+    options = typing.get_args(item) or (item,)
+    return next(o for o in options if o.__name__ == f"Call_{tool_name}")
+
+
+def _fake_tool(name: str, run) -> MagicMock:
+    tool = MagicMock()
+    tool.name = name
+    tool.description = f"{name} tool"
+    tool.parameters = MagicMock(return_value={"path": str})
+    tool.run = AsyncMock(side_effect=run)
+    return tool
+
+
+@pytest.mark.asyncio
+async def test_react_fused_uses_one_call_per_step() -> None:
+    """In fused mode, engine.create picks done/tool/args; decide/equip/invoke are never called."""
+    context = Context([Message.user("hi")])
+    read_tool = _fake_tool("read", lambda path: f"contents of {path}")
+    other_tool = _fake_tool("list", lambda path: [])
+
+    engine = MagicMock()
+    engine._tools = [read_tool, other_tool]
+    engine._lovelaice_turn_stats = {}
+    engine.decide = AsyncMock()
+    engine.equip = AsyncMock()
+    engine.invoke = AsyncMock()
+    engine.reply = AsyncMock(return_value=Message.assistant("ok"))
+
+    async def create(ctx, model_cls, *instructions):
+        call_cls = _call_model(model_cls, "read")
+        if engine.create.await_count == 1:
+            return model_cls(reasoning="", done=False, calls=[call_cls(tool="read", path="a.txt")])
+        return model_cls(reasoning="", done=True, calls=[])
+
+    engine.create = AsyncMock(side_effect=create)
+
+    await react(context, engine, fused=True)
+
+    assert engine.create.await_count == 2
+    engine.decide.assert_not_awaited()
+    engine.equip.assert_not_awaited()
+    engine.invoke.assert_not_awaited()
+    read_tool.run.assert_awaited_once_with(path="a.txt")
+    sys_msgs = [str(m.content) for m in context.messages if m.role == "system"]
+    assert any("[tool read result]" in m and "contents of a.txt" in m for m in sys_msgs)
+    assert engine._lovelaice_turn_stats == {"llm_calls": 3, "round_trips_saved": 2}
+
+
+@pytest.mark.asyncio
+async def test_react_fused_reports_tool_errors() -> None:
+    """A raising tool becomes a `failed` observation, same as Engine.invoke."""
+    context = Context([Message.user("hi")])
+
+    def boom(path):
+        raise FileNotFoundError(path)
+
+    read_tool = _fake_tool("read", boom)
+    engine = MagicMock()
+    engine._tools = [read_tool]
+    engine.reply = AsyncMock(return_value=Message.assistant("ok"))
+
+    async def create(ctx, model_cls, *instructions):
+        call_cls = _call_model(model_cls, "read")
+        if engine.create.await_count == 1:
+            return model_cls(reasoning="", done=False, calls=[call_cls(tool="read", path="nope")])
+        return model_cls(reasoning="", done=True, calls=[])
+
+    engine.create = AsyncMock(side_effect=create)
+
+    await react(context, engine, fused=True)
+
+    sys_msgs = [str(m.content) for m in context.messages if m.role == "system"]
+    assert any("[tool read failed]" in m and "nope" in m for m in sys_msgs)
+
+
+@pytest.mark.asyncio
+async def test_react_fused_runs_batched_calls_concurrently() -> None:
+    """A batch of calls runs through asyncio.gather, capped by max_parallel, results in order."""
+    context = Context([Message.user("hi")])
+    running = 0
+    peak = 0
+
+    async def slow_read(path):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return f"contents of {path}"
+
+    read_tool = _fake_tool("read", slow_read)
+    seen = []
+    engine = MagicMock()
+    engine._tools = [read_tool]
+    engine._lovelaice_turn_stats = {}
+    engine._lovelaice_on_tool_call = seen.append
+    engine.reply = AsyncMock(return_value=Message.assistant("ok"))
+
+    async def create(ctx, model_cls, *instructions):
+        call_cls = _call_model(model_cls, "read")
+        if engine.create.await_count == 1:
+            return model_cls(
+                reasoning="",
+                done=False,
+                calls=[call_cls(tool="read", path=f"{i}.txt") for i in range(5)],
+            )
+        return model_cls(reasoning="", done=True, calls=[])
+
+    engine.create = AsyncMock(side_effect=create)
+
+    await react(context, engine, fused=True, max_parallel=2)
+
+    assert read_tool.run.await_count == 5
+    assert peak == 2
+    assert sorted(r.result for r in seen) == [f"contents of {i}.txt" for i in range(5)]
+    observations = [str(m.content) for m in context.messages if "[tool read result]" in str(m.content)]
+    assert len(observations) == 5
+    # Five single-tool steps would cost 5 * (decide + invoke) = 10 calls; the batch cost 1.
+    assert engine._lovelaice_turn_stats["round_trips_saved"] == 9
+
+
+@pytest.mark.asyncio
+async def test_react_fused_falls_back_when_the_structured_answer_fails() -> None:
+    """A fused step that doesn't validate is redone with decide/equip/invoke."""
+    context = Context([Message.user("hi")])
+    read_tool = _fake_tool("read", lambda path: "x")
+    engine = MagicMock()
+    engine._tools = [read_tool]
+    engine._lovelaice_turn_stats = {}
+    engine.decide = AsyncMock(side_effect=[False, True])
+    engine.equip = AsyncMock(return_value=read_tool)
+    engine.invoke = AsyncMock(return_value=ToolResult(tool="read", error="bad arguments"))
+    engine.reply = AsyncMock(return_value=Message.assistant("ok"))
+
+    async def create(ctx, model_cls, *instructions):
+        if engine.create.await_count == 1:
+            raise ValueError("calls.0.path: field required")
+        raise RuntimeError("still malformed")
+
+    engine.create = AsyncMock(side_effect=create)
+
+    await react(context, engine, fused=True)
+
+    assert engine.invoke.await_count == 1
+    assert engine._lovelaice_turn_stats["fused_fallbacks"] == 2
+    assert any("[tool read failed]\nbad arguments" in str(m.content) for m in context.messages)
+
+
+@pytest.mark.asyncio
+async def test_react_fused_renames_parameters_named_tool() -> None:
+    context = Context([Message.user("hi")])
+    run_tool = _fake_tool("run", lambda tool, tool_: f"{tool}/{tool_}")
+    run_tool.parameters = MagicMock(return_value={"tool": str, "tool_": str})
+    engine = MagicMock()
+    engine._tools = [run_tool]
+    engine.reply = AsyncMock(return_value=Message.assistant("ok"))
+
+    async def create(ctx, model_cls, *instructions):
+        call_cls = _call_model(model_cls, "run")
+        assert set(call_cls.model_fields) == {"tool", "tool__", "tool_"}
+        if engine.create.await_count == 1:
+            return model_cls(reasoning="", done=False, calls=[call_cls(tool="run", tool__="pytest", tool_="x")])
+        return model_cls(reasoning="", done=True, calls=[])
+
+    engine.create = AsyncMock(side_effect=create)
+
+    await react(context, engine, fused=True)
+
+    run_tool.run.assert_awaited_once_with(tool="pytest", tool_="x")
+
+
+@pytest.mark.asyncio
+async def test_react_fuses_by_default_and_reports_calls_as_they_complete() -> None:
+    context = Context([Message.user("hi")])
+    seen = []
+
+    async def read(path):
+        await asyncio.sleep(float(path))
+        seen.append(("ran", path))
+        return path
+
+    read_tool = _fake_tool("read", read)
+    engine = MagicMock()
+    engine._tools = [read_tool]
+    engine._lovelaice_on_tool_call = lambda r: seen.append(("reported", r.result))
+    engine.reply = AsyncMock(return_value=Message.assistant("ok"))
+
+    async def create(ctx, model_cls, *instructions):
+        call_cls = _call_model(model_cls, "read")
+        if engine.create.await_count == 1:
+            return model_cls(reasoning="", done=False, calls=[
+                call_cls(tool="read", path="0.2"), call_cls(tool="read", path="0.0"),
+            ])
+        return model_cls(reasoning="", done=True, calls=[])
+
+    engine.create = AsyncMock(side_effect=create)
+
+    await react(context, engine)
+
+    # The quick call is reported before the slow one finishes.
+    assert seen == [("ran", "0.0"), ("reported", "0.0"), ("ran", "0.2"), ("reported", "0.2")]
+    observations = [str(m.content) for m in context.messages if "[tool read result]" in str(m.content)]
+    assert observations == ["[tool read result]\n0.2", "[tool read result]\n0.0"]
+
+
+@pytest.mark.asyncio
+async def test_react_fused_surfaces_hook_errors_without_rerunning_tools() -> None:
+    context = Context([Message.user("hi")])
+    read_tool = _fake_tool("read", lambda path: "x")
+    engine = MagicMock()
+    engine._tools = [read_tool]
+    engine._lovelaice_turn_stats = {}
+    engine.decide = AsyncMock(return_value=False)
+    engine.invoke = AsyncMock()
+
+    def hook(result):
+        raise RuntimeError("host hook broke")
+
+    engine._lovelaice_on_tool_call = hook
+
+    async def create(ctx, model_cls, *instructions):
+        call_cls = _call_model(model_cls, "read")
+        return model_cls(reasoning="", done=False, calls=[call_cls(tool="read", path="a")])
+
+    engine.create = AsyncMock(side_effect=create)
+
+    with pytest.raises(RuntimeError, match="host hook broke"):
+        await react(context, engine)
+
+    read_tool.run.assert_awaited_once_with(path="a")
+    engine.invoke.assert_not_awaited()
+    assert "fused_fallbacks" not in engine._lovelaice_turn_stats
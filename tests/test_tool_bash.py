@@ -38,3 +38,98 @@ async def test_bash_nonzero_exit_returns_output() -> None:
     """A nonzero exit doesn't raise; the output (incl. stderr) is returned."""
     out = await bash_module.bash("false; echo done")
     assert "done" in out
+
+
+@pytest.fixture
+async def persistent(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(bash_module, "BASH_PERSISTENT", True)
+    yield
+    await bash_module._session().close()
+
+
+@pytest.mark.asyncio
+async def test_persistent_bash_keeps_cwd_and_env(persistent, tmp_path) -> None:
+    await bash_module.bash(f"cd {tmp_path} && export LOVELAICE_X=42")
+    out = await bash_module.bash("pwd; echo $LOVELAICE_X")
+    assert out.splitlines() == [str(tmp_path), "42"]
+
+
+@pytest.mark.asyncio
+async def test_persistent_bash_survives_syntax_errors_and_restarts_after_exit(persistent) -> None:
+    out = await bash_module.bash("if then fi")
+    assert "syntax error" in out
+    assert (await bash_module.bash("echo still here")).strip() == "still here"
+
+    await bash_module.bash("export LOVELAICE_Y=1")
+    out = await bash_module.bash("exit 3")
+    assert "shell exited" in out
+    assert (await bash_module.bash("echo ${LOVELAICE_Y:-fresh}")).strip() == "fresh"
+
+
+@pytest.mark.asyncio
+async def test_persistent_bash_times_out_and_restarts(persistent, monkeypatch) -> None:
+    monkeypatch.setattr(bash_module, "BASH_TIMEOUT", 0.5)
+    with pytest.raises(TimeoutError):
+        await bash_module.bash("sleep 5")
+    assert (await bash_module.bash("echo back")).strip() == "back"
+
+
+
+@pytest.mark.asyncio
+async def test_persistent_bash_cancelled_mid_command_leaves_nothing_behind(persistent) -> None:
+    import asyncio
+
+    call = asyncio.create_task(bash_module.bash("echo started; sleep 0.5; echo stale"))
+    await asyncio.sleep(0.2)
+    call.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await call
+    await asyncio.sleep(0.5)
+    assert (await bash_module.bash("echo fresh")).strip() == "fresh"
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("persistent_mode", [False, True])
+async def test_bash_keeps_head_and_tail_of_huge_output(monkeypatch, persistent_mode) -> None:
+    monkeypatch.setattr(bash_module, "BASH_OUTPUT_CAP", 1000)
+    monkeypatch.setattr(bash_module, "BASH_PERSISTENT", persistent_mode)
+    try:
+        out = await bash_module.bash("echo FIRST; seq 1 100000; echo LAST")
+    finally:
+        if persistent_mode:
+            await bash_module._session().close()
+    assert out.startswith("FIRST\n")
+    assert out.rstrip().endswith("LAST")
+    assert "bytes of output elided" in out
+    assert len(out) < 1100
+
+
+@pytest.mark.asyncio
+async def test_bash_streams_chunks_to_live_sink() -> None:
+    from lovelaice.tools.output import live_output
+
+    seen: list[tuple[str, str]] = []
+    with live_output(lambda tool, text: seen.append((tool, text))):
+        out = await bash_module.bash("echo one; sleep 0.2; echo two")
+    assert len({key for key, _ in seen}) == 1
+    assert seen[0][0].startswith("bash#")
+    assert "".join(text for _, text in seen) == out
+    assert len(seen) >= 2
+
+
+@pytest.mark.asyncio
+async def test_concurrent_bash_calls_stream_under_their_own_keys() -> None:
+    import asyncio
+
+    from lovelaice.tools.output import live_output
+
+    seen: dict[str, str] = {}
+
+    def sink(key: str, text: str) -> None:
+        seen[key] = seen.get(key, "") + text
+
+    with live_output(sink):
+        outs = await asyncio.gather(
+            bash_module.bash("echo a1; sleep 0.1; echo a2"),
+            bash_module.bash("echo b1; sleep 0.1; echo b2"),
+        )
+    assert sorted(seen.values()) == sorted(outs)
@@ -6,6 +6,8 @@ from pathlib import Path
 import pytest
 
 from lovelaice.tools import edit, list_, read, write
+from lovelaice.tools import files as files_module
+from lovelaice.tools.cache import FileCache, forget_seen
 
 
 @pytest.mark.asyncio
@@ -24,10 +26,122 @@ async def test_list_underscore_explicit_path(tmp_path: Path) -> None:
     assert await list_(str(sub)) == ["x"]
 
 
+@pytest.mark.asyncio
+async def test_list_recursive_skips_ignored(tmp_path: Path) -> None:
+    (tmp_path / "sub" / "deep").mkdir(parents=True)
+    (tmp_path / "sub" / "deep" / "x.py").write_text("")
+    (tmp_path / "sub" / "y.log").write_text("")
+    (tmp_path / "sub" / ".gitignore").write_text("*.log\n")
+    assert await list_(str(tmp_path / "sub"), recursive=True) == [".gitignore", "deep/x.py"]
+
+
 @pytest.mark.asyncio
 async def test_read_write_edit_roundtrip(tmp_path: Path) -> None:
     p = tmp_path / "f.txt"
     await write(str(p), "hello world")
-    assert await read(str(p)) == "hello world"
+    assert (await read(str(p))).endswith("\n1\thello world")
     await edit(str(p), "world", "lovelaice")
-    assert await read(str(p)) == "hello lovelaice"
+    assert "\n-hello world\n\\ No newline at end of file\n+hello lovelaice" in await read(str(p))
+    await write(str(p), "fresh")
+    forget_seen()
+    assert (await read(str(p))).endswith("\n1\tfresh")
+
+
+@pytest.mark.asyncio
+async def test_reread_reports_unchanged_or_diff(tmp_path: Path) -> None:
+    p = tmp_path / "f.py"
+    p.write_text("".join(f"x{i} = {i}\n" for i in range(50)))
+    full = await read(str(p))
+    assert "49\tx48 = 48" in full
+
+    again = await read(str(p))
+    assert again.startswith(f"[{p}: lines 1-50 of 50; end of file; unchanged since step")
+    assert "x48" not in again
+
+    p.write_text(p.read_text().replace("x10 = 10", "x10 = 'ten'"))
+    diff = await read(str(p))
+    assert "changed since step" in diff
+    assert "-x10 = 10\n+x10 = 'ten'" in diff
+    assert "x48" not in diff
+
+
+def test_file_cache_is_content_addressed_and_stamp_checked(tmp_path: Path) -> None:
+    cache = FileCache()
+    a, b = tmp_path / "a", tmp_path / "b"
+    a.write_text("same")
+    b.write_text("same")
+    assert cache.read_bytes(str(a)) == cache.read_bytes(str(b)) == b"same"
+    assert cache.digest(str(a)) == cache.digest(str(b))
+    assert cache.read_bytes(str(a)) == b"same"
+    assert (cache.hits, cache.misses) == (1, 2)
+
+    a.write_text("changed!")
+    assert cache.read_bytes(str(a)) == b"changed!"
+    assert cache.misses == 3
+
+
+@pytest.mark.asyncio
+async def test_read_pages_by_line_through_the_index(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    # A tiny index stride exercises lookups that land mid-chunk.
+    monkeypatch.setattr(files_module, "INDEX_CHUNK", 64)
+    p = tmp_path / "big.log"
+    p.write_text("".join(f"line {i}\n" for i in range(1, 1001)))
+
+    out = await read(str(p), offset=500, limit=3)
+    assert out.splitlines() == [
+        f"[{p}: lines 500-502 of 1000; next offset 503]",
+        " 500\tline 500",
+        " 501\tline 501",
+        " 502\tline 502",
+    ]
+    assert (await read(str(p), offset=1000)).endswith("1000\tline 1000")
+    assert "end of file" in await read(str(p), offset=999)
+    assert "past the end" in await read(str(p), offset=2000)
+
+
+@pytest.mark.asyncio
+async def test_read_stops_at_byte_cap_and_cuts_long_lines(tmp_path: Path) -> None:
+    p = tmp_path / "f.txt"
+    p.write_text("x" * 5000 + "\n" + "short\n" * 100)
+    out = await read(str(p), max_bytes=200)
+    assert "lines 1-1 of 101; next offset 2" in out
+    assert "[line cut at" in out
+    out = await read(str(p), offset=2, max_bytes=50)
+    assert len(out.split("\n", 1)[1]) <= 50
+
+
+@pytest.mark.asyncio
+async def test_read_pages_fit_one_observation(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    from lovelaice.tools import output
+    from lovelaice.tools.output import spill
+
+    monkeypatch.setattr(output, "OBSERVATION_LIMIT", 500)
+    forget_seen()
+    p = tmp_path / "f.txt"
+    p.write_text("".join(f"line {i}\n" for i in range(1000)))
+    out = await read(str(p), max_bytes=100_000)
+    assert spill(out) == out
+    assert "next offset" in out
+    # Seen in full, so a repeat is answered briefly.
+    assert "unchanged since step" in await read(str(p), max_bytes=100_000)
+
+
+@pytest.mark.asyncio
+async def test_write_keeps_umask_modes_and_writes_through_symlinks(tmp_path: Path) -> None:
+    import os
+    import stat
+
+    mask = os.umask(0o022)
+    try:
+        await write(str(tmp_path / "new.txt"), "hi\n")
+    finally:
+        os.umask(mask)
+    assert stat.S_IMODE((tmp_path / "new.txt").stat().st_mode) == 0o644
+
+    (tmp_path / "real.txt").write_text("old\n")
+    (tmp_path / "real.txt").chmod(0o755)
+    (tmp_path / "link.txt").symlink_to("real.txt")
+    await edit(str(tmp_path / "link.txt"), "old", "new")
+    assert (tmp_path / "link.txt").is_symlink()
+    assert (tmp_path / "real.txt").read_text() == "new\n"
+    assert stat.S_IMODE((tmp_path / "real.txt").stat().st_mode) == 0o755
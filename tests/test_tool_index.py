@@ -0,0 +1,100 @@
+"""Tests for the trigram search index."""
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+import pytest
+
+from lovelaice.tools import inventory
+from lovelaice.tools.index import TrigramIndex, required_literals
+from lovelaice.tools.search import grep
+
+
+@pytest.fixture
+def workspace(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    root = tmp_path / "ws"
+    root.mkdir()
+    monkeypatch.chdir(root)
+    for i in range(20):
+        (root / f"f{i}.txt").write_text(f"filler line {i}\n")
+    (root / "sub").mkdir()
+    (root / "sub" / "hit.py").write_text("def HandleRequest():\n    pass\n")
+    return root
+
+
+def test_required_literals_skip_optional_parts() -> None:
+    assert required_literals("def foo_bar") == [b"def foo_bar"]
+    assert required_literals(r"Handle\w+Request") == [b"handle", b"request"]
+    assert required_literals("(?:abc)+wxyz?") == [b"abc", b"wxy"]
+    assert required_literals("foo|bar") == []
+    assert required_literals("(abcd)?") == []
+    assert required_literals("[") == []
+
+
+
+@pytest.mark.parametrize("broken", ["missing", "reshaped"])
+def test_pattern_analysis_falls_back_if_the_regex_parser_changes(monkeypatch: pytest.MonkeyPatch, broken: str) -> None:
+    import re._parser
+
+    from lovelaice.tools.scan import literal_text
+
+    if broken == "missing":
+        monkeypatch.delattr(re._parser, "parse")
+    else:
+        monkeypatch.setattr(re._parser, "parse", lambda pattern: [(None, None, None)])
+    assert literal_text("foo") is None
+    assert required_literals("def foo_bar") == []
+
+def test_refresh_only_rereads_changed_files(workspace: Path) -> None:
+    index = TrigramIndex(os.path.abspath("."))
+    stats = index.refresh()
+    assert (stats.added, stats.updated, stats.removed) == (21, 0, 0)
+    assert index.path.is_file()
+
+    (workspace / "f0.txt").write_text("something longer than before\n")
+    (workspace / "f1.txt").unlink()
+    stats = TrigramIndex.load(".").refresh()
+    assert (stats.added, stats.updated, stats.removed, stats.unchanged) == (0, 1, 1, 19)
+
+
+@pytest.mark.parametrize("watched", [False, True], ids=["stat", "inventory"])
+def test_narrow_keeps_candidates_and_stale_files(
+    workspace: Path, monkeypatch: pytest.MonkeyPatch, request: pytest.FixtureRequest, watched: bool,
+) -> None:
+    index = TrigramIndex(os.path.abspath("."))
+    index.refresh()
+    paths = sorted(str(p.relative_to(workspace).as_posix()) for p in workspace.rglob("*") if p.is_file())
+    if watched:
+        inv = inventory.Inventory(".")
+        inv.build()
+        request.addfinalizer(inv.close)
+        if not inv.watching:
+            pytest.skip("needs inotify")
+        monkeypatch.setattr(inventory, "_inventory", inv)
+        # Metadata comes from memory, and agrees with the disk.
+        assert inventory.stats(paths) == [
+            (os.stat(p).st_mtime_ns, os.stat(p).st_size) for p in paths
+        ]
+
+    assert index.narrow("handlerequest", paths) == ["sub/hit.py"]
+    # Case-insensitive signatures: case is left to the regex itself.
+    assert index.narrow("HandleRequest", paths) == ["sub/hit.py"]
+    # A file changed since the refresh is always scanned.
+    (workspace / "f3.txt").write_text("HandleRequest, new\n")
+    assert index.narrow("HandleRequest", paths) == ["f3.txt", "sub/hit.py"]
+    # No literals, or too many stale files: full scan.
+    assert index.narrow("a|b", paths) is None
+    for i in range(10):
+        (workspace / f"f{i}.txt").write_text("changed again\n")
+    assert index.narrow("HandleRequest", paths) is None
+
+
+@pytest.mark.asyncio
+async def test_grep_uses_index_without_changing_results(workspace: Path) -> None:
+    before = await grep(r"def \w+Request")
+    TrigramIndex(os.path.abspath(".")).refresh()
+    assert await grep(r"def \w+Request") == before == "sub/hit.py:1:def HandleRequest():"
+    (workspace / "f5.txt").write_text("def OtherRequest\n")
+    assert "f5.txt:1:def OtherRequest" in await grep(r"def \w+Request")
@@ -0,0 +1,113 @@
+"""Tests for the in-memory workspace inventory."""
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+import pytest
+
+from lovelaice.tools import inventory
+from lovelaice.tools.inventory import Inventory
+from lovelaice.tools.walk import walk
+
+
+def _tree(root: Path, files: dict[str, str]) -> None:
+    for rel, content in files.items():
+        p = root / rel
+        p.parent.mkdir(parents=True, exist_ok=True)
+        p.write_text(content)
+
+
+@pytest.fixture
+def workspace(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    monkeypatch.chdir(tmp_path)
+    _tree(tmp_path, {
+        ".gitignore": "node_modules/\n*.log\n",
+        ".git/info/exclude": "secret.txt\n",
+        "secret.txt": "",
+        "a.py": "",
+        "debug.log": "",
+        "node_modules/pkg/index.js": "",
+        "pkg/.gitignore": "build/\n!keep.log\n",
+        "pkg/keep.log": "",
+        "pkg/src/mod.py": "",
+        "pkg/src/deep/x.py": "",
+        "pkg/build/out.py": "",
+    })
+    return tmp_path
+
+
+@pytest.fixture(params=[True, False], ids=["inotify", "polling"])
+def inv(request, workspace: Path):
+    inv = Inventory(".")
+    inv.build(use_inotify=request.param)
+    yield inv
+    inv.close()
+
+
+def _same_as_disk(inv: Inventory, top: str = ".", **kw) -> list[str]:
+    found = inv.walk(top, **kw)
+    assert found == list(walk(top, **kw))
+    return found
+
+
+def test_answers_match_the_disk_walker(inv: Inventory) -> None:
+    assert _same_as_disk(inv) == [".gitignore", "a.py", "pkg/.gitignore", "pkg/keep.log", "pkg/src/mod.py", "pkg/src/deep/x.py"]
+    _same_as_disk(inv, dirs=True)
+    _same_as_disk(inv, "pkg", dirs=True, max_depth=1)
+    _same_as_disk(inv, "./pkg/src/")
+    # Ignored or missing directories are not covered; walk() falls back.
+    assert inv.walk("node_modules") is None
+    assert inv.walk("/") is None
+
+
+def test_changes_show_up_immediately(inv: Inventory, workspace: Path) -> None:
+    (workspace / "pkg" / "src" / "new.py").write_text("")
+    (workspace / "pkg" / "src" / "deep" / "x.py").unlink()
+    (workspace / "fresh" / "dir").mkdir(parents=True)
+    (workspace / "fresh" / "dir" / "f.py").write_text("")
+    assert _same_as_disk(inv) == [
+        ".gitignore", "a.py", "fresh/dir/f.py", "pkg/.gitignore", "pkg/keep.log", "pkg/src/mod.py", "pkg/src/new.py",
+    ]
+
+    (workspace / "pkg" / ".gitignore").write_text("src/\n")
+    assert _same_as_disk(inv, "pkg") == ["pkg/.gitignore", "pkg/build/out.py"]
+    (workspace / "pkg" / ".gitignore").unlink()
+    assert "pkg/build/out.py" in _same_as_disk(inv)
+
+
+def test_module_walk_falls_back_until_ready(workspace: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(inventory, "_inventory", Inventory("."))
+    assert inventory.walk() == list(walk())
+    inventory._inventory.build()
+    os.remove("a.py")
+    assert inventory.walk() == list(walk())
+    inventory.stop()
+
+
+def test_too_many_files_gives_up(workspace: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(inventory, "INVENTORY_MAX_FILES", 2)
+    inv = Inventory(".")
+    inv.build()
+    assert not inv.ready and inv.walk() is None
+
+
+def test_renamed_and_removed_directories_drop_their_watches(
+    inv: Inventory, workspace: Path, tmp_path_factory: pytest.TempPathFactory,
+) -> None:
+    import shutil
+
+    _same_as_disk(inv)
+    (workspace / "pkg" / "src").rename(workspace / "pkg" / "lib")
+    (workspace / "pkg" / "src" / "deep").mkdir(parents=True)
+    _same_as_disk(inv)
+    (workspace / "pkg" / "lib" / "deep" / "y.py").write_text("")
+    (workspace / "pkg" / "src" / "deep" / "w.py").write_text("")
+    assert {"pkg/lib/deep/y.py", "pkg/src/deep/w.py"} <= set(_same_as_disk(inv))
+
+    (workspace / "pkg" / "lib").rename(tmp_path_factory.mktemp("outside") / "lib")
+    shutil.rmtree(workspace / "pkg" / "src")
+    _same_as_disk(inv)
+    if inv.watching:
+        # One watch per inventoried directory, none left on old paths.
+        assert sorted(inv._inotify.dirs.values()) == sorted(inv._dirs)
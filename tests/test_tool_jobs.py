@@ -0,0 +1,103 @@
+"""Tests for background bash jobs."""
+from __future__ import annotations
+
+import asyncio
+import re
+
+import pytest
+
+from lovelaice.tools import jobs
+
+
+def _next_since(out: str) -> int:
+    return int(re.search(r"next since (\d+)", out).group(1))
+
+
+async def _poll_until_done(job_id: str, since: int = 0) -> str:
+    for _ in range(100):
+        out = await jobs.bash_poll(job_id, since)
+        if "job forgotten" in out:
+            return out
+        await asyncio.sleep(0.05)
+    raise AssertionError("job did not finish")
+
+
+@pytest.mark.asyncio
+async def test_job_runs_in_background_and_polls_incrementally() -> None:
+    started = await jobs.bash_start("echo one; sleep 0.3; echo two")
+    job_id = re.search(r"job-\d+", started).group(0)
+
+    await asyncio.sleep(0.15)
+    first = await jobs.bash_poll(job_id)
+    assert "running" in first
+    assert first.endswith("one\n")
+
+    rest = await _poll_until_done(job_id, _next_since(first))
+    assert "exited with status 0" in rest
+    assert rest.endswith("two\n")
+    assert "one" not in rest.split("\n", 1)[1]
+    with pytest.raises(ValueError):
+        await jobs.bash_poll(job_id)
+
+
+@pytest.mark.asyncio
+async def test_kill_stops_job_and_forgets_it() -> None:
+    job_id = re.search(r"job-\d+", await jobs.bash_start("sleep 30")).group(0)
+    out = await jobs.bash_kill(job_id)
+    assert "killed by signal" in out
+    with pytest.raises(ValueError):
+        await jobs.bash_poll(job_id)
+
+
+@pytest.mark.asyncio
+async def test_job_buffer_is_bounded(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(jobs, "JOB_OUTPUT_CAP", 100)
+    job_id = re.search(r"job-\d+", await jobs.bash_start("seq 1 10000")).group(0)
+    out = await _poll_until_done(job_id)
+    assert "earlier bytes no longer buffered" in out
+    body = out.split("\n", 1)[1]
+    assert len(body) == 100
+    assert body.endswith("10000\n")
+
+
+@pytest.mark.asyncio
+async def test_poll_pages_fit_the_observation_limit(monkeypatch: pytest.MonkeyPatch) -> None:
+    from lovelaice.tools import output
+    monkeypatch.setattr(output, "OBSERVATION_LIMIT", 600)
+    job_id = re.search(r"job-\d+", await jobs.bash_start("seq 1 2000")).group(0)
+    pages, since = [], 0
+    for _ in range(100):
+        out = await jobs.bash_poll(job_id, since)
+        assert len(out) <= 600
+        pages.append(out.split("\n", 1)[1])
+        since = _next_since(out)
+        if "job forgotten" in out:
+            break
+        await asyncio.sleep(0.01)
+    assert "".join(pages) == "".join(f"{i}\n" for i in range(1, 2001))
+
+
+@pytest.mark.asyncio
+async def test_unread_finished_jobs_are_capped(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(jobs, "MAX_FINISHED_JOBS", 2)
+    monkeypatch.setattr(jobs, "_jobs", {})
+    ids = [re.search(r"job-\d+", await jobs.bash_start("true")).group(0) for _ in range(3)]
+    await asyncio.gather(*(job.reader for job in jobs._jobs.values()))
+    await jobs.bash_start("true")
+    assert ids[0] not in jobs._jobs
+    assert all(i in jobs._jobs for i in ids[1:])
+    await asyncio.gather(*(job.reader for job in jobs._jobs.values()))
+
+
+@pytest.mark.asyncio
+async def test_kill_returns_when_an_escaped_child_holds_the_pipe() -> None:
+    import time
+
+    # `setsid` puts the child in a group of its own, out of bash_kill's reach.
+    job_id = re.search(r"job-\d+", await jobs.bash_start("setsid sleep 3 & sleep 30")).group(0)
+    await asyncio.sleep(0.2)
+    started = time.monotonic()
+    out = await jobs.bash_kill(job_id)
+    assert time.monotonic() - started < 2.5
+    assert "killed by signal" in out
+    assert job_id not in jobs._jobs
@@ -0,0 +1,68 @@
+"""Tests for the tiered edit matcher."""
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from lovelaice.tools import edit
+from lovelaice.tools.matching import match_edit
+
+
+SOURCE = """\
+class A:
+    def f(self):
+        x = 1
+        return x
+
+    def g(self):
+        return 2
+"""
+
+
+def _apply(old: str, new: str) -> tuple[str, str]:
+    m = match_edit(SOURCE, old, new, "a.py")
+    return SOURCE[:m.start] + m.new + SOURCE[m.end:], m.tier
+
+
+def test_exact_tier_wins_first() -> None:
+    out, tier = _apply("x = 1", "x = 10")
+    assert tier == "exact"
+    assert "        x = 10\n" in out
+
+
+def test_whitespace_tier_ignores_trailing_and_inner_runs() -> None:
+    out, tier = _apply("        x  =  1   \n        return x", "        x = 2\n        return x")
+    assert tier == "whitespace"
+    assert "        x = 2\n        return x\n\n    def g" in out
+
+
+def test_indentation_tier_reindents_new() -> None:
+    out, tier = _apply("def f(self):\n    x = 1\n    return x\n", "def f(self):\n    return 1\n")
+    assert tier == "indentation"
+    assert "    def f(self):\n        return 1\n\n    def g" in out
+
+
+def test_ambiguous_match_is_an_error_unless_a_line_is_given() -> None:
+    text = "if a:\n    pass\nif b:\n    pass\n"
+    with pytest.raises(ValueError, match="2 places .* at lines 2, 4"):
+        match_edit(text, "    pass  ", "    done", "t.py")
+    m = match_edit(text, "    pass  ", "    done", "t.py", near_line=4)
+    assert text[:m.start].count("\n") == 3
+
+
+def test_not_found_quotes_closest_regions() -> None:
+    with pytest.raises(ValueError) as ei:
+        match_edit(SOURCE, "def g(self):\n    return 3", "", "a.py")
+    msg = str(ei.value)
+    assert "`old` not found in a.py; closest regions:" in msg
+    assert "6\t    def g(self):\n7\t        return 2" in msg
+
+
+@pytest.mark.asyncio
+async def test_edit_reports_the_tier(tmp_path: Path) -> None:
+    p = tmp_path / "a.py"
+    p.write_text(SOURCE)
+    out = await edit(str(p), "def g(self):\n    return 2", "def g(self):\n    return 3")
+    assert "re-indented" in out
+    assert "        return 3\n" in p.read_text()
@@ -0,0 +1,71 @@
+"""Spilling oversized observations to the scratch area and paging them back."""
+from __future__ import annotations
+
+import pytest
+from lingo.tools import ToolResult
+
+from lovelaice.commands.react import _observation
+from lovelaice.tools import read_output
+from lovelaice.tools.output import spill
+
+
+def test_spill_leaves_small_text_alone() -> None:
+    assert spill("short", limit=100) == "short"
+
+
+@pytest.mark.asyncio
+async def test_spill_returns_excerpt_and_handle_that_pages() -> None:
+    text = "".join(f"line {i}\n" for i in range(5000))
+    excerpt = spill(text, limit=1000)
+
+    assert len(excerpt) < 2500
+    assert excerpt.startswith("line 0\n")
+    assert excerpt.rstrip().endswith("line 4999")
+    handle = excerpt.split("stored as '")[1].split("'")[0]
+
+    page = await read_output(handle, offset=0, length=14)
+    assert page.splitlines()[1:] == ["line 0", "line 1"]
+    assert f"of {len(text)}" in page
+    assert "next offset 14" in page
+
+    last = await read_output(handle, offset=len(text) - 10, length=100)
+    assert "end of output" in last
+
+
+@pytest.mark.asyncio
+async def test_read_output_rejects_unknown_handles() -> None:
+    with pytest.raises(ValueError):
+        await read_output("out-999999")
+    with pytest.raises(ValueError):
+        await read_output("../etc/passwd")
+
+
+def test_react_observation_spills_large_results(monkeypatch: pytest.MonkeyPatch) -> None:
+    from lovelaice.tools import output as output_module
+    monkeypatch.setattr(output_module, "OBSERVATION_LIMIT", 500)
+
+    observation = _observation(ToolResult(tool="bash", result="y" * 50_000))
+    assert observation.startswith("[tool bash result]\n")
+    assert "read_output(" in observation
+    assert len(observation) < 6_000
+
+
+def test_spill_excerpt_splits_the_limit_between_head_and_tail() -> None:
+    text = "".join(chr(ord("a") + i % 26) for i in range(1500))
+    excerpt = spill(text, limit=1000)
+    head, rest = excerpt.split("\n... [", 1)
+    tail = rest.split("] ...\n", 1)[1]
+    assert len(head) + len(tail) == 1000
+    assert text.startswith(head) and text.endswith(tail)
+    assert "[500 chars elided" in excerpt
+
+
+@pytest.mark.asyncio
+async def test_read_output_pages_fit_the_observation_limit(monkeypatch: pytest.MonkeyPatch) -> None:
+    from lovelaice.tools import output as output_module
+    monkeypatch.setattr(output_module, "OBSERVATION_LIMIT", 500)
+    excerpt = spill("z" * 5000)
+    handle = excerpt.split("stored as '")[1].split("'")[0]
+    for length in (None, 8000):
+        page = await read_output(handle, length=length)
+        assert len(page) <= 500 and spill(page) == page
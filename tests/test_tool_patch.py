@@ -0,0 +1,115 @@
+"""Tests for apply_edits."""
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from lovelaice.tools import apply_edits
+from lovelaice.tools.patch import parse_patch
+
+
+@pytest.fixture
+def workspace(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "a.py").write_text("x = 1\ny = 2\nz = 3\n")
+    (tmp_path / "b.py").write_text("import a\nprint(a.x)\n")
+    return tmp_path
+
+
+@pytest.mark.asyncio
+async def test_apply_edits_across_files(workspace: Path) -> None:
+    out = await apply_edits(edits=[
+        {"path": "a.py", "old": "x = 1", "new": "x = 10"},
+        {"path": "a.py", "old": "z = 3\n", "new": "z = 30\nw = 4\n"},
+        {"path": "b.py", "old": "a.x", "new": "a.x + a.w"},
+        {"path": "new.py", "old": "", "new": "fresh\n"},
+    ])
+    assert (workspace / "a.py").read_text() == "x = 10\ny = 2\nz = 30\nw = 4\n"
+    assert (workspace / "b.py").read_text() == "import a\nprint(a.x + a.w)\n"
+    assert (workspace / "new.py").read_text() == "fresh\n"
+    assert out.startswith("applied 4 edits to 3 files")
+    assert "a.py  +3 -2" in out
+    assert "new.py  +1 -0 (new)" in out
+    assert "+print(a.x + a.w)" in out
+    assert not list(workspace.glob(".*.tmp"))
+
+
+@pytest.mark.asyncio
+async def test_apply_edits_changes_nothing_if_any_edit_fails(workspace: Path) -> None:
+    with pytest.raises(ValueError) as ei:
+        await apply_edits(edits=[
+            {"path": "a.py", "old": "x = 1", "new": "x = 10"},
+            {"path": "b.py", "old": "missing", "new": "!"},
+            {"path": "a.py", "old": " = ", "new": "="},
+        ])
+    msg = str(ei.value)
+    assert "no changes applied; 2 of 3 edits failed" in msg
+    assert "edit 2 (b.py)" in msg and "edit 3 (a.py)" in msg
+    assert (workspace / "a.py").read_text() == "x = 1\ny = 2\nz = 3\n"
+
+
+@pytest.mark.asyncio
+async def test_apply_unified_diff(workspace: Path) -> None:
+    patch = """\
+--- a/a.py
++++ b/a.py
+@@ -1,3 +1,3 @@
+ x = 1
+-y = 2
++y = 20
+ z = 3
+--- a/b.py
++++ /dev/null
+@@ -1,2 +0,0 @@
+-import a
+-print(a.x)
+--- /dev/null
++++ b/c.py
+@@ -0,0 +1 @@
++print("c")
+"""
+    out = await apply_edits(patch=patch)
+    assert (workspace / "a.py").read_text() == "x = 1\ny = 20\nz = 3\n"
+    assert not (workspace / "b.py").exists()
+    assert (workspace / "c.py").read_text() == 'print("c")\n'
+    assert "b.py  +0 -2 (deleted)" in out
+
+
+def test_parse_patch_handles_missing_trailing_newline_marker() -> None:
+    (hunk,) = parse_patch("--- f\n+++ f\n@@ -1 +1 @@\n-a\n\\ No newline at end of file\n+b\n")
+    assert (hunk.old, hunk.new) == ("a", "b\n")
+
+
+@pytest.mark.asyncio
+async def test_ambiguous_hunk_uses_header_line(workspace: Path) -> None:
+    (workspace / "d.txt").write_text("pass\n" * 5)
+    await apply_edits(patch="--- d.txt\n+++ d.txt\n@@ -4 +4 @@\n-pass\n+done\n")
+    assert (workspace / "d.txt").read_text().splitlines() == ["pass", "pass", "pass", "done", "pass"]
+
+
+@pytest.mark.asyncio
+async def test_zero_context_insertions_land_after_their_line(workspace: Path) -> None:
+    (workspace / "abcd.txt").write_text("a\nb\nc\nd\n")
+    await apply_edits(patch=(
+        "--- a/abcd.txt\n+++ b/abcd.txt\n"
+        "@@ -0,0 +1 @@\n+TOP\n"
+        "@@ -2,0 +4 @@\n+NEW\n"
+        "@@ -4,0 +7 @@\n+END\n"
+    ))
+    assert (workspace / "abcd.txt").read_text() == "TOP\na\nb\nNEW\nc\nd\nEND\n"
+    with pytest.raises(ValueError, match="insertion after line 9"):
+        await apply_edits(patch="--- a/abcd.txt\n+++ b/abcd.txt\n@@ -9,0 +10 @@\n+X\n")
+
+
+@pytest.mark.asyncio
+async def test_insertions_account_for_list_edits_in_the_same_file(workspace: Path) -> None:
+    (workspace / "abcd.txt").write_text("a\nb\nc\nd\n")
+    await apply_edits(
+        edits=[
+            {"path": "abcd.txt", "old": "a\n", "new": "a1\na2\na3\n"},
+            {"path": "abcd.txt", "old": "d\n", "new": ""},
+        ],
+        patch="--- a/abcd.txt\n+++ b/abcd.txt\n@@ -2,0 +3 @@\n+NEW\n@@ -3,0 +5 @@\n+END\n",
+    )
+    assert (workspace / "abcd.txt").read_text() == "a1\na2\na3\nb\nNEW\nc\nEND\n"
@@ -0,0 +1,97 @@
+"""Tests for the grep engine."""
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from lovelaice.tools import scan
+from lovelaice.tools.scan import Hit, Literal, compile_pattern, search, search_buffer, search_file
+
+
+def test_offsets_map_to_lines_once_per_line() -> None:
+    buf = b"foo foo\nbar\r\nfoo\n"
+    hits = search_buffer(buf, compile_pattern("foo"), "f", 10)
+    assert hits == [Hit("f", 1, "foo foo"), Hit("f", 3, "foo")]
+
+
+def test_anchors_are_per_line_and_cap_applies() -> None:
+    buf = b"a\nb\nc\n"
+    assert [h.line for h in search_buffer(buf, compile_pattern("^"), "f", 10)] == [1, 2, 3]
+    assert [h.line for h in search_buffer(buf, compile_pattern("$"), "f", 2)] == [1, 2]
+
+
+def test_context_lines_stop_at_buffer_edges() -> None:
+    hits = search_buffer(b"a\nb\nc\n", compile_pattern("[ac]"), "f", 10, context=2)
+    assert [(h.before, h.after) for h in hits] == [((), ("b", "c")), (("a", "b"), ())]
+    assert search_buffer(b"x\r\ny z\r\n", compile_pattern("z"), "f", 10, context=1)[0].before == ("x",)
+    assert search_buffer(b"abc needle", compile_pattern("needle"), "f", 1)[0].column == 4
+
+
+def test_plain_patterns_skip_the_regex_engine() -> None:
+    assert isinstance(compile_pattern(r"foo\.bar"), Literal)
+    assert compile_pattern(r"foo\.bar").pattern == b"foo.bar"
+    assert not isinstance(compile_pattern("(?i)foo"), Literal)
+    assert not isinstance(compile_pattern("fo+"), Literal)
+    hits = search_buffer(b"a foo.bar\nfooxbar\n", compile_pattern(r"foo\.bar"), "f", 10)
+    assert hits == [Hit("f", 1, "a foo.bar")] and hits[0].column == 2
+
+
+def test_non_ascii_pattern_runs_on_text() -> None:
+    hits = search_buffer("naïve\ncafé\n", compile_pattern("é$"), "f", 10)
+    assert hits == [Hit("f", 2, "café")]
+
+
+
+@pytest.mark.parametrize("pattern", [r"na\wve", "a.ve", "a[^x]ve", r"\bcaf\w\b", "(?i)NAÏVE", "(?i)na.ve"])
+def test_ascii_regexes_keep_their_meaning_on_non_ascii_text(tmp_path: Path, pattern: str) -> None:
+    p = tmp_path / "f.txt"
+    p.write_text("x\nnaïve café\n", encoding="utf-8")
+    assert search_file(str(p), compile_pattern(pattern), 5) == [Hit(str(p), 2, "naïve café")]
+
+
+def test_only_byte_safe_patterns_run_on_bytes() -> None:
+    assert isinstance(compile_pattern("^de[f-g] +(x|y)$").pattern, bytes)
+    for pattern in ("a.b", r"\w+", "[^a]", r"\bx", "(?i)x", "(?i:x)y"):
+        assert isinstance(compile_pattern(pattern).pattern, str), pattern
+
+
+@pytest.mark.parametrize("pattern", [r"caf\xe9", r"caf\u00e9", r"caf\xe9\s", r"caf\u00e9+"])
+def test_escaped_non_ascii_characters_match_text(tmp_path: Path, pattern: str) -> None:
+    p = tmp_path / "f.txt"
+    p.write_text("x\nnaïve café au lait\n", encoding="utf-8")
+    assert search_file(str(p), compile_pattern(pattern), 5) == [Hit(str(p), 2, "naïve café au lait")]
+    assert isinstance(compile_pattern(pattern).pattern, str)
+
+def test_large_files_are_memory_mapped(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(scan, "MMAP_THRESHOLD", 1)
+    p = tmp_path / "big"
+    p.write_bytes(b"x\n" * 1000 + b"needle\n")
+    assert search_file(str(p), compile_pattern("need"), 5) == [Hit(str(p), 1001, "needle")]
+    assert search_file(str(p), compile_pattern("nëed"), 5) == []
+    (tmp_path / "bin").write_bytes(b"\x00needle")
+    assert search_file(str(tmp_path / "bin"), compile_pattern("need"), 5) == []
+
+
+@pytest.mark.asyncio
+async def test_process_pool_keeps_order_and_cap(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(scan, "GREP_WORKERS", 2)
+    monkeypatch.setattr(scan, "BATCH_FILES", 3)
+    monkeypatch.setattr(scan, "PARALLEL_MIN_FILES", 1)
+    paths = []
+    for i in range(20):
+        p = tmp_path / f"f{i:02}.txt"
+        p.write_text("hit\nmiss\nhit\n")
+        paths.append(str(p))
+    try:
+        hits = await search("hit", paths, 100)
+        assert [(Path(h.path).name, h.line) for h in hits[:4]] == [
+            ("f00.txt", 1), ("f00.txt", 3), ("f01.txt", 1), ("f01.txt", 3),
+        ]
+        assert len(hits) == 40
+        capped = await search("hit", paths, 7)
+        assert capped == hits[:7]
+    finally:
+        if scan._pool is not None:
+            scan._pool.shutdown()
+            scan._pool = None
@@ -1,6 +1,7 @@
 """Tests for glob and grep."""
 from __future__ import annotations
 
+import re
 from pathlib import Path
 
 import pytest
@@ -73,3 +74,60 @@ async def test_grep_skips_binary(tmp_path: Path, monkeypatch: pytest.MonkeyPatch
     out = await grep("match")
     assert "bin:" not in out
     assert "txt:1:match" in out
+
+
+@pytest.fixture
+def code(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "a.py").write_text("one\ntwo hit\nthree\nfour hit\nfive\nsix\nseven\neight hit\n")
+    (tmp_path / "b.py").write_text("hit\n")
+    return tmp_path
+
+
+@pytest.mark.asyncio
+async def test_grep_context_merges_overlapping_blocks(code: Path) -> None:
+    from lovelaice.tools import grep
+
+    assert await grep("hit", "a.py", context=1) == "\n".join([
+        "a.py-1-one", "a.py:2:two hit", "a.py-3-three", "a.py:4:four hit", "a.py-5-five",
+        "--",
+        "a.py-7-seven", "a.py:8:eight hit",
+    ])
+
+
+@pytest.mark.asyncio
+async def test_grep_grouped_per_file_and_files_only(code: Path) -> None:
+    from lovelaice.tools import grep
+
+    assert await grep("hit", group=True, per_file=2) == "a.py\n2:two hit\n4:four hit\n\nb.py\n1:hit"
+    assert await grep("hit", files_only=True) == "a.py\nb.py"
+
+
+@pytest.mark.asyncio
+async def test_grep_cuts_long_lines_around_the_match(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    from lovelaice.tools import grep
+
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "min.js").write_text("x" * 5000 + "needle" + "y" * 5000 + "\n")
+
+    out = await grep("needle")
+    assert out.startswith("min.js:1:…x") and "needle" in out
+    assert out.endswith("… [10006 chars]")
+    assert len(out) < 300
+
+
+@pytest.mark.asyncio
+async def test_grep_fixed_strings_and_several_patterns(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    from lovelaice.tools import grep
+
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "a.py").write_text("x = f(a[0])\nfoo bar\nbar only\nnone\n")
+
+    assert await grep("f(a[0])", fixed_strings=True) == "a.py:1:x = f(a[0])"
+    with pytest.raises(re.error):
+        await grep(["foo", "f(a["])
+    out = await grep(["foo", "ba+r", "f(a["], fixed_strings=True)
+    assert out == "[1] foo  [2] ba+r  [3] f(a[\na.py:1:[3] x = f(a[0])\na.py:2:[1] foo bar"
+    assert await grep(["foo", "ba+r"]) == "[1] foo  [2] ba+r\na.py:2:[1,2] foo bar\na.py:3:[2] bar only"
+    with pytest.raises(ValueError, match="backreferences"):
+        await grep([r"(a)\1", "b"])
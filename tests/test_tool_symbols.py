@@ -0,0 +1,109 @@
+"""Tests for the Python symbol index and its tools."""
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from lovelaice.tools import scan, symbols
+from lovelaice.tools.symbols import SymbolIndex, find_symbol, outline, parse_symbols
+
+
+SOURCE = '''\
+"""Module doc."""
+import sys
+
+
+class Parser:
+    """Parse things.
+
+    Longer text.
+    """
+
+    @staticmethod
+    def parse(text):
+        """Parse `text`."""
+        def helper():
+            pass
+        return helper
+
+    async def feed(self, chunk):
+        pass
+
+
+if sys.version_info >= (3, 12):
+    def compat():
+        """Only on new Pythons."""
+'''
+
+
+@pytest.fixture
+def workspace(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(symbols, "symbol_index", SymbolIndex())
+    (tmp_path / "pkg").mkdir()
+    (tmp_path / "pkg" / "parser.py").write_text(SOURCE)
+    (tmp_path / "pkg" / "other.py").write_text("def parse():\n    pass\n")
+    (tmp_path / "notes.txt").write_text("def parse: notes, not Python\n")
+    return tmp_path
+
+
+def test_parse_symbols_spans_kinds_and_docs() -> None:
+    found = {s.qualname: s for s in parse_symbols(SOURCE, "m.py")}
+    assert list(found) == ["Parser", "Parser.parse", "Parser.parse.helper", "Parser.feed", "compat"]
+    assert (found["Parser"].line, found["Parser"].end_line, found["Parser"].doc) == (5, 19, "Parse things.")
+    # A decorated definition starts at its first decorator.
+    assert (found["Parser.parse"].line, found["Parser.parse"].kind) == (11, "method")
+    assert found["Parser.feed"].kind == "async method"
+    assert found["compat"].doc == "Only on new Pythons."
+    assert parse_symbols("def broken(:\n", "b.py") == []
+
+
+@pytest.mark.asyncio
+async def test_find_symbol_by_name_and_suffix(workspace: Path) -> None:
+    assert await find_symbol("Parser.parse") == "pkg/parser.py:11-16 method Parser.parse — Parse `text`."
+    assert (await find_symbol("parse")).splitlines() == [
+        "pkg/other.py:1-2 function parse",
+        "pkg/parser.py:11-16 method Parser.parse — Parse `text`.",
+    ]
+    assert (await find_symbol("pars")).startswith("no exact match; partial matches:\n")
+    assert await find_symbol("nothing") == "no Python definition named 'nothing'"
+
+
+@pytest.mark.asyncio
+async def test_only_changed_files_are_reparsed(workspace: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    parsed: list[str] = []
+    real = symbols._parse_files
+    monkeypatch.setattr(symbols, "_parse_files", lambda paths: parsed.extend(paths) or real(paths))
+
+    await find_symbol("parse")
+    assert sorted(parsed) == ["pkg/other.py", "pkg/parser.py"]
+    parsed.clear()
+    (workspace / "pkg" / "other.py").write_text("def renamed():\n    pass\n")
+    assert await find_symbol("renamed") == "pkg/other.py:1-2 function renamed"
+    assert parsed == ["pkg/other.py"]
+    (workspace / "pkg" / "other.py").unlink()
+    assert "other.py" not in await find_symbol("parse")
+
+
+@pytest.mark.asyncio
+async def test_parsing_many_files_uses_the_process_pool(workspace: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(scan, "GREP_WORKERS", 2)
+    monkeypatch.setattr(symbols, "PARSE_PARALLEL_MIN", 1)
+    monkeypatch.setattr(symbols, "PARSE_BATCH", 1)
+    assert "pkg/parser.py:5-19 class Parser" in await find_symbol("Parser")
+
+
+@pytest.mark.asyncio
+async def test_outline_nests_by_qualname(workspace: Path) -> None:
+    assert await outline("./pkg/parser.py") == (
+        "pkg/parser.py:\n"
+        "  5-19 class Parser — Parse things.\n"
+        "    11-16 method parse — Parse `text`.\n"
+        "      14-15 function helper\n"
+        "    18-19 async method feed\n"
+        "  23-24 function compat — Only on new Pythons."
+    )
+    assert await outline("notes.txt") == "notes.txt: no classes or functions found"
+    with pytest.raises(FileNotFoundError):
+        await outline("missing.py")
@@ -0,0 +1,70 @@
+"""Tests for the shared workspace walker."""
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+import pytest
+
+from lovelaice.tools import walk as walk_module
+from lovelaice.tools.walk import walk
+
+
+def _tree(root: Path, files: dict[str, str]) -> None:
+    for rel, content in files.items():
+        p = root / rel
+        p.parent.mkdir(parents=True, exist_ok=True)
+        p.write_text(content)
+
+
+@pytest.fixture
+def workspace(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    monkeypatch.chdir(tmp_path)
+    _tree(tmp_path, {
+        ".gitignore": "node_modules/\n*.log\n",
+        ".git/info/exclude": "secret.txt\n",
+        ".git/HEAD": "",
+        "secret.txt": "",
+        "a.py": "",
+        "debug.log": "",
+        "node_modules/pkg/index.js": "",
+        "pkg/.gitignore": "build/\n!keep.log\n",
+        "pkg/.ignore": "scratch.py\n",
+        "pkg/keep.log": "",
+        "pkg/other.log": "",
+        "pkg/scratch.py": "",
+        "pkg/src/mod.py": "",
+        "pkg/build/out.py": "",
+    })
+    return tmp_path
+
+
+def test_walk_applies_nested_rules(workspace: Path) -> None:
+    assert list(walk()) == [
+        ".gitignore", "a.py", "pkg/.gitignore", "pkg/.ignore", "pkg/keep.log", "pkg/src/mod.py",
+    ]
+
+
+def test_walk_of_a_subdirectory_keeps_ancestor_rules(workspace: Path) -> None:
+    assert list(walk("pkg")) == [
+        "pkg/.gitignore", "pkg/.ignore", "pkg/keep.log", "pkg/src/mod.py",
+    ]
+    assert list(walk("pkg/src", dirs=True)) == ["pkg/src/mod.py"]
+
+
+def test_walk_prunes_ignored_directories(workspace: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    opened: list[str] = []
+    real = os.scandir
+
+    def scandir(path):
+        opened.append(Path(path).name)
+        return real(path)
+
+    monkeypatch.setattr(walk_module.os, "scandir", scandir)
+    list(walk())
+    assert "node_modules" not in opened and "build" not in opened and ".git" not in opened
+    assert "src" in opened
+
+
+def test_walk_max_depth(workspace: Path) -> None:
+    assert list(walk(dirs=True, max_depth=1)) == [".gitignore", "a.py", "pkg"]
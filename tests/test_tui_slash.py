@@ -67,3 +67,30 @@ async def test_slash_exit_quits(workspace_dir: Path) -> None:
         await pilot.press("enter")
         await pilot.pause()
     # Run-test context exits on quit; reaching here means it quit cleanly.
+
+
+@pytest.mark.asyncio
+async def test_slash_perf_reports_last_turn_calls(workspace_dir: Path) -> None:
+    from lovelaice.usage import UsageTracker
+
+    tracker = UsageTracker()
+    tracker.begin_turn()
+    tracker.record(None, latency=0.5)
+    fake_agent = MagicMock()
+    fake_agent.usage = tracker
+    app = LovelaiceApp(
+        config_path=Path(".lovelaice.py"),
+        model=None,
+        _build_agent=lambda: fake_agent,
+    )
+    async with app.run_test() as pilot:
+        await pilot.pause()
+        await pilot.click("#input")
+        for ch in "/perf":
+            await pilot.press(ch if ch != "/" else "slash")
+        await pilot.press("enter")
+        await pilot.pause()
+        transcript = app.query_one("#transcript")
+        text_blob = "\n".join(getattr(b, "text", "") for b in transcript.blocks)
+        assert "Last turn (1 calls)" in text_blob
+        assert "0.50s" in text_blob
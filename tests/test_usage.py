@@ -0,0 +1,84 @@
+"""UsageTracker: per-call tokens (including cache hits), phase and latency."""
+from __future__ import annotations
+
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from lovelaice.usage import UsageTracker, by_phase, cached_tokens_of, phase
+
+
+def _usage(prompt: int, completion: int, cached: int | None = None):
+    details = SimpleNamespace(cached_tokens=cached) if cached is not None else None
+    return SimpleNamespace(
+        prompt_tokens=prompt, completion_tokens=completion, prompt_tokens_details=details,
+    )
+
+
+def test_cached_tokens_of_reads_openai_and_anthropic_shapes() -> None:
+    assert cached_tokens_of(_usage(10, 1, cached=7)) == 7
+    assert cached_tokens_of(SimpleNamespace(cache_read_input_tokens=5)) == 5
+    assert cached_tokens_of(_usage(10, 1)) == 0
+
+
+@pytest.mark.asyncio
+async def test_tracker_records_streaming_and_parse_usage() -> None:
+    async def stream():
+        yield SimpleNamespace(usage=None, choices=[])
+        yield SimpleNamespace(usage=_usage(100, 5, cached=80), choices=[])
+
+    llm = MagicMock()
+    llm.client.chat.completions.create = AsyncMock(return_value=stream())
+    llm.client.chat.completions.parse = AsyncMock(
+        return_value=SimpleNamespace(usage=_usage(50, 2, cached=40))
+    )
+
+    tracker = UsageTracker()
+    tracker.attach(llm)
+    tracker.attach(llm)  # idempotent
+
+    chunks = [c async for c in await llm.client.chat.completions.create(stream=True)]
+    await llm.client.chat.completions.parse(model="x")
+
+    assert len(chunks) == 2
+    assert tracker.totals.calls == 2
+    assert tracker.totals.prompt_tokens == 150
+    assert tracker.totals.completion_tokens == 7
+    assert tracker.totals.cached_tokens == 120
+
+
+@pytest.mark.asyncio
+async def test_tracker_tags_calls_with_outermost_phase_and_timing() -> None:
+    async def stream():
+        yield SimpleNamespace(usage=None, choices=[SimpleNamespace()])
+        yield SimpleNamespace(usage=_usage(10, 3), choices=[])
+
+    llm = MagicMock()
+    llm.client.chat.completions.create = AsyncMock(side_effect=lambda **kw: stream())
+    llm.client.chat.completions.parse = AsyncMock(
+        return_value=SimpleNamespace(usage=_usage(20, 1, cached=15))
+    )
+    tracker = UsageTracker()
+    tracker.attach(llm)
+    seen = []
+    tracker.on_call = seen.append
+    tracker.begin_turn()
+
+    with phase("decide"):
+        with phase("create"):
+            await llm.client.chat.completions.parse(model="x")
+    with phase("reply"):
+        async for _ in await llm.client.chat.completions.create(stream=True):
+            pass
+    await llm.client.chat.completions.parse(model="x")
+
+    assert [r.phase for r in tracker.turn_records()] == ["decide", "reply", "other"]
+    assert seen == tracker.records
+    reply = tracker.records[1]
+    assert reply.ttft is not None and reply.latency >= reply.ttft
+    assert tracker.records[0].ttft is None
+
+    totals = by_phase(tracker.records)
+    assert totals["decide"].cached_tokens == 15
+    assert totals["reply"].completion_tokens == 3